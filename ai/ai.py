@@ -6,171 +6,201 @@
 2) Decide to bet or not according to the probabilities(check/fold, check/call, call/raise, all-in)
 3) Try to guess opponents' hands by their bets
 """
-from functools import lru_cache
-from secrets import SystemRandom
-
-from common.config import WEIGHT_QUOTIENT
+from functools import cached_property
+from itertools import combinations
+from random import Random
+from typing import Optional, Sequence
+
+import numpy as np
+
+from ai.canonical import canonicalize_cards
+from ai.decision_cache import DecisionCache
+from ai.equity import exact_equity, monte_carlo_equity
+from ai.equity_cache import equity_cache
+from ai.hand_potential import HandPotential, hand_potential
+from ai.players_history import PlayersHistory
+from ai.preflop_equity import MAX_OPPONENTS, preflop_table
+from ai.ranges import Range, RangeTracker, range_equity, sampled_range_equity
+from ai.stage_context import StageContext, StageContexts
+from common.config import WEIGHT_QUOTIENT, EQUITY_TIME_BUDGET, EQUITY_TARGET_ERROR, EQUITY_MAX_SAMPLES, \
+    EQUITY_RANGE_SAMPLES, HAND_POTENTIAL_MAX_RUNOUTS, HAND_POTENTIAL_DRAW, DECISION_CACHE_MAX_BYTES, \
+    DECISION_CACHE_TTL_ROUNDS, AI_OPPONENT_RANGES
 from common.event import EventType, subscribe
+from common.rng import game_rng, make_numpy_rng
 from entities.bet import Bet, Decision
-from entities.cards import Card, Deck, VALUES
-from entities.combinations import best_hand, Combination, COMBINATIONS
+from entities.cards import Card, VALUES, remaining_cards
+from entities.combinations import COMBINATIONS
 from entities.players import Player
 from entities.round import Round
-from errors.errors import UnavailableDecision, TooSmallBetError
+from errors.errors import UnavailableDecision
 
-random = SystemRandom()
+# chances and equities of canonical situations shared by all AI players
+decisions_cache = DecisionCache(DECISION_CACHE_MAX_BYTES, DECISION_CACHE_TTL_ROUNDS)
+# opponents' ranges in the current rounds narrowed by their moves
+opponent_ranges = RangeTracker()
+# statistics of the players' behavior over all rounds
+players_history = PlayersHistory()
+# board-only analysis of the current stages shared by all AI players
+stage_contexts = StageContexts()
 
 
-@lru_cache(128)
 def all_possible_sets_to_open(
         known_cards: [tuple[Card], set[Card]],
         for_competitor=False
 ) -> set[frozenset[Card]]:
     """find all cards that can be possibly opened later or found in competitor's hand"""
-    result: set[frozenset[Card]] = set()
-    deck_rest = Deck.all_cards() - set(known_cards)
     number_of_cards_to_open = 7 - len(known_cards) + (2 * for_competitor)
-    if number_of_cards_to_open == 0:
-        return result
-
-    if number_of_cards_to_open == 1:
-        return {frozenset([card]) for card in deck_rest}
-
-    for card in deck_rest:
-        for _result in all_possible_sets_to_open(known_cards + (card,), for_competitor=for_competitor):
-            intermediate_inner_result = _result | {card}
-            result.add(intermediate_inner_result)
-    return result
-
-
-@lru_cache(128)
-def possible_boards(board: tuple[Card]) -> set[frozenset[Card]]:
-    """Find all cards that can complete the board if we wouldn't know our own pocket cards"""
-    deck_rest = Deck.all_cards() - set(board)
-    if len(board) == 5:
+    if number_of_cards_to_open <= 0:
         return set()
 
-    if 5 - len(board) == 1:
-        return {frozenset([card]) for card in deck_rest}
-
-    result: set[frozenset[Card]] = set()
-    for card in deck_rest:
-        for _result in possible_boards(board + (card,)):  # noqa
-            result.add(_result | {card})
-    return result
-
-
-def possible_board_according_to_hand(board: tuple[Card], hand: tuple[Card]) -> set[frozenset[Card]]:
-    """All possible boards knowing own hand"""
-    possible_rest = possible_boards(board)
-    result = possible_rest.copy()
-    for _result in possible_rest:
-        for card in hand:
-            if card in _result:
-                result.discard(_result)
-                break
-    return result
-
-
-def possible_competitors_sets(board: tuple[Card], hand: tuple[Card]) -> set[frozenset[Card]]:
-    """All possible competitors hands(TBC)"""
-    possible_rest = possible_board_according_to_hand(board, hand)
-    result = possible_rest.copy()
-    # todo add possible hands
-    return result
+    return {frozenset(cards) for cards in combinations(remaining_cards(known_cards), number_of_cards_to_open)}
 
 
-def update_smallest(chances: dict[Combination: float]) -> None:
-    """find the smallest combination with >0 chance and set its chances to 1"""
-    for cmb in chances:
-        smaller_cmbs = COMBINATIONS[COMBINATIONS.index(cmb) + 1:]
-        if len(smaller_cmbs) == 0:
-            return
-
-        if max(chances[smaller_cmb] for smaller_cmb in smaller_cmbs) == 0 and chances[cmb] > 0:
-            chances[cmb] = 1.0
-            break
-
-
-@lru_cache(128)
 class StageBetAI:
     """
     Bet decider for AI in the middle of the game
-    Calculates all possible community cards and all possible opponent's pocket cards,
-    then calculates the chances for each combination and multiplies if by weight of the combination.
-    Decides if AI should bet or not and how much according to the weight ration of possible own and opponent's hands.
-    Has a chance of bluff.
+    Calculates the equity of the pocket cards against the opponents who haven't folded,
+    against their ranges if they are followed, and compares it with the fair share of the pot,
+    the share each player would get if all hands were equal.
+    Decides if AI should bet or not and how much according to the ratio of the equity to the fair share,
+    plays on the strong draws when the ratio is not decisive.
+    Calculates the chances of the opponent's combinations weighted by their priorities
+    and has a chance of bluff when they are low.
     """
 
-    def __init__(self, board: tuple[Card], player: Player, blind: float, players_left: int):
+    def __init__(self, board: tuple[Card], player: Player, blind: float, players_left: int,
+                 opponent_ranges: Sequence[Range] = (), context: Optional[StageContext] = None,
+                 rng: Optional[Random] = None):
         self.player = player
+        self.rng = rng or game_rng()
+        # the seed of the NumPy stream is drawn for every decision, so the draws don't depend on the cache hits
+        self._numpy_seed = self.rng.getrandbits(64)
+        self.opponent_ranges = tuple(opponent_ranges)
         self.board = board
         self.hand = tuple(player.hand)
         self.known_cards = self.hand + board
         self.blind = blind
         self.players_left = players_left
-        self.possible_left_cards = possible_board_according_to_hand(board, self.hand)
-        self.possible_competitors_cards = all_possible_sets_to_open(self.known_cards, True)
-        self.possible_variations = len(self.possible_left_cards) or 1
-        self.possible_competitors_variations = len(self.possible_competitors_cards)
-        self.my_chances = self._guess_my_chances()
-        self.competitors_chances = self._guess_opponents_chances()
-        self.my_weight = sum(self.my_chances[cmb] * (WEIGHT_QUOTIENT ** cmb.priority) for cmb in COMBINATIONS)
+        self.situation = canonicalize_cards(self.hand, board)
+        self.context = context or StageContext([card.index for card in board])
+        key, hand = self.situation.key, [card.index for card in self.hand]
+        self.competitors_chances = decisions_cache.get_or_calculate(
+            ('competitors_chances', *key), self.context.opponent_combination_chances, hand)
         self.competitors_weight = sum(
             self.competitors_chances[cmb] * (WEIGHT_QUOTIENT ** cmb.priority) for cmb in COMBINATIONS)
-        self.weight_ratio = self.my_weight / self.competitors_weight
         self.bluff: bool = False
 
-    def _guess_my_chances(self) -> dict[Combination: float]:
-        """Chances of getting each combination"""
-        # todo add combination's kicker
-        absolute_chances = {cmb: 0 for cmb in COMBINATIONS}
-        if len(self.known_cards) == 7:
-            absolute_chances.update({best_hand(self.known_cards)[0]: 1})
-            return absolute_chances
-
-        for possible_card_set in self.possible_left_cards:
-            possible_hand = self.known_cards + tuple(possible_card_set)
-            absolute_chances[best_hand(possible_hand)[0]] += 1
-        relative_chances = {k: v / self.possible_variations for k, v in absolute_chances.items()}
-        update_smallest(relative_chances)
-        return relative_chances
-
-    def _guess_opponents_chances(self) -> dict[Combination: float]:
-        """Chances for an opponent to get each combination"""
-        # todo add combination's kicker
-        absolute_chances = {cmb: 0 for cmb in COMBINATIONS}
-        for possible_card_set in self.possible_competitors_cards:
-            possible_hand = self.board + tuple(possible_card_set)
-            absolute_chances[best_hand(possible_hand)[0]] += 1
-        relative_chances = {k: (v / self.possible_competitors_variations) for k, v in absolute_chances.items()}
-        update_smallest(relative_chances)
-        return relative_chances
-
-    @lru_cache(128)
-    def will_i_win_by_weight(self):
+    @cached_property
+    def numpy_rng(self) -> np.random.Generator:
+        """The NumPy stream of the sampled equities derived from the random source of the AI"""
+        return make_numpy_rng(self._numpy_seed)
+
+    @property
+    def opponents(self) -> int:
+        """The number of opponents who haven't folded"""
+        return max(self.players_left - 1, 1)
+
+    @cached_property
+    def equity(self) -> float:
+        """
+        Equity against the opponents who haven't folded, calculated on the first use
+        or taken from the persistent cache on the flop and the turn.
+        Exact against one opponent on the stages without a configured time budget,
+        estimated by sampling within the time budget otherwise
+        """
+        return decisions_cache.get_or_calculate(('equity', *self.situation.key, self.opponents), self.persistent_equity)
+
+    def persistent_equity(self) -> float:
+        """Equity taken from the persistent cache on the flop and the turn"""
+        # river situations are too many and too cheap to calculate to be worth a place in the persistent cache
+        cache = equity_cache() if len(self.board) < 5 else None
+        if cache is None:
+            return self.calculate_equity()
+        return cache.equity(self.situation, self.opponents, self.calculate_equity)
+
+    def calculate_equity(self) -> float:
+        """Equity calculated without the persistent cache"""
+        time_budget = EQUITY_TIME_BUDGET.get(len(self.board))
+        if time_budget is None and self.opponents == 1:
+            return exact_equity(*self.situation.key).equity
+        return monte_carlo_equity(*self.situation.key, opponents=self.opponents, max_samples=EQUITY_MAX_SAMPLES,
+                                  time_budget=time_budget, target_error=EQUITY_TARGET_ERROR,
+                                  rng=self.numpy_rng).equity
+
+    @cached_property
+    def range_equity(self) -> float:
+        """
+        Equity against the ranges of the opponents narrowed by their moves,
+        exact against one opponent on the stages without a configured time budget, sampled otherwise.
+        The same as equity if the ranges are unknown
+        """
+        if not self.opponent_ranges:
+            return self.equity
+        hand, board = [card.index for card in self.hand], [card.index for card in self.board]
+        if len(self.opponent_ranges) == 1 and len(self.board) not in EQUITY_TIME_BUDGET:
+            return range_equity(hand, board, self.opponent_ranges[0])
+        return sampled_range_equity(hand, board, self.opponent_ranges, samples=EQUITY_RANGE_SAMPLES,
+                                    rng=self.numpy_rng).equity
+
+    @cached_property
+    def potential(self) -> HandPotential:
+        """
+        Hand strength, potentials and effective hand strength against the opponent's range,
+        against all pocket cards if there are several opponents or the ranges are unknown
+        """
+        opponent_range = self.opponent_ranges[0] if len(self.opponent_ranges) == 1 else None
+        return hand_potential([card.index for card in self.hand], [card.index for card in self.board], opponent_range,
+                              max_runouts=HAND_POTENTIAL_MAX_RUNOUTS.get(len(self.board)), rng=self.numpy_rng)
+
+    @cached_property
+    def equity_ratio(self) -> float:
+        """
+        The equity against the opponents' ranges relative to the fair share of the pot,
+        greater than 1 if we are ahead of an average hand
+        """
+        return self.range_equity * (self.opponents + 1)
+
+    def will_i_win_by_weight(self) -> Optional[bool]:
         """
         Our assumption if we are winning or not
         True if we have good chances(or bluffing)
         False if chances are pretty bad
         None if we are not sure
         """
-        if self.weight_ratio > 1:
+        return self._win_guess
+
+    @property
+    def is_draw(self) -> bool:
+        """If the hand is behind now but often gets ahead by the river, only the flop and the turn have draws"""
+        if len(self.board) == 5:
+            return False
+        return self.potential.hand_strength < 0.5 and self.potential.positive_potential >= HAND_POTENTIAL_DRAW
+
+    @cached_property
+    def _win_guess(self) -> Optional[bool]:
+        """
+        The assumption is made once per decider, so the bluff is kept for the whole decision.
+        The potential of the hand is calculated only when the equity is not decisive, strong draws are played on
+        """
+        if self.equity_ratio > 1:
             return True
 
-        if self.weight_ratio < 0.79:
-            if self.competitors_weight < 5 and random.randint(0, 100) > 60:
+        if self.equity_ratio < 0.79:
+            if self.competitors_weight < 5 and self.rng.randint(0, 100) > 60:
                 self.bluff = True
                 return True
             return False
 
+        if self.is_draw:
+            return True
+
         return None
 
     def comfort_bet(self) -> float:
         """Defining the bet we are ready to call or raise"""
         if self.bluff:
-            return random.randint(1, 3) * self.blind
-        return round(self.weight_ratio ** 2) * self.blind
+            return self.rng.randint(1, 3) * self.blind
+        return round(self.equity_ratio ** 2) * self.blind
 
     def should_i_bet(self, max_bet) -> list[Bet]:
         """
@@ -194,20 +224,23 @@ class StageBetAI:
 
     def how_much_to_bet(self, max_bet) -> float:
         """Deciding about the size of the raise using random"""
-        bet = self.comfort_bet() * random.randint(0, 3)
-        return min(max(bet, max_bet), self.player.stack)
+        bet = self.comfort_bet() * self.rng.randint(0, 3)
+        return min(max(bet, max_bet), self.player.decision.size + self.player.stack)
 
 
 class PreFlopDecider:
     """
     Decides if AI should bet on pre-flop depending on
+    the equity of the pocket cards against the opponents from the pre-flop equity tables.
+    Without the tables file uses the formula of
     - if own pocket cards are pair
     - the values of the pocket cards
     """
 
-    def __init__(self, player: Player):
+    def __init__(self, player: Player, opponents: int = 1):
         self.player = player
         self.__hand = player.hand
+        self.opponents = min(max(opponents, 1), MAX_OPPONENTS)
         self._weight = self.weight()
 
     def is_pair(self) -> bool:
@@ -229,7 +262,14 @@ class PreFlopDecider:
         return max(self.__hand).value.order / max(VALUES).order
 
     def weight(self) -> float:
-        """The overall weight of the pocket cards according to the quotients above"""
+        """
+        The share of all pocket cards with a smaller equity against the opponents,
+        or the overall weight of the pocket cards according to the quotients above without the tables
+        """
+        table = preflop_table()
+        if table is not None:
+            return table.percentile([card.index for card in self.__hand], self.opponents)
+
         if self.is_pair():
             return self.highness()
 
@@ -267,65 +307,61 @@ class AI(Player):
                  name: str = '',
                  # pre_flop_agression: float = 0,
                  # stage_agression: float = 0
+                 rng: Optional[Random] = None
                  ):
         super().__init__(start_stack, is_ai=True, name=name)
+        self.rng = rng or game_rng()
 
-    def make_a_move(self, board, current_max_bet, stage_index, blind_size, number_of_players_left):
+    def make_a_move(self, board, current_max_bet, stage_index, blind_size, number_of_players_left,
+                    ranges: Sequence[Range] = (), context: Optional[StageContext] = None):
         """Calling the logic for bet decisions"""
         if stage_index == 1:
-            decider = PreFlopDecider(self)
+            decider = PreFlopDecider(self, number_of_players_left - 1)
             ai_decisions = decider.decision()
-            try:
-                action = [d for d in ai_decisions if d in self.available_actions][0]
-            except IndexError:
-                print("Something went wrong")
-                print(f"Player's available decisions: {self.available_actions}")
-                print(f"AI's suggested decisions: {ai_decisions}")
-                raise UnavailableDecision
             amount = decider.how_much_to_bet(blind_size, current_max_bet)
-            try:
-                self.decide(Decision(action, amount))
-            except TooSmallBetError as e:
-                print(f"{current_max_bet=}, {self.stack=}, "
-                      f"{self.requested_bet=}, {self.available_actions=}, "
-                      f"{self.decision.size=}, {action=}, {amount=}")
-                raise e
         else:
-            decider = StageBetAI(board, self, blind_size, number_of_players_left)
+            decider = StageBetAI(board, self, blind_size, number_of_players_left, ranges, context, self.rng)
             ai_decisions = decider.should_i_bet(current_max_bet)
-            try:
-                action = [d for d in ai_decisions if d in self.available_actions][0]
-            except IndexError:
-                print("Something went wrong")
-                print(f"Player's available decisions: {self.available_actions}")
-                print(f"AI's suggested decisions: {ai_decisions}")
-                raise UnavailableDecision
-            self.decide(Decision(action, decider.how_much_to_bet(current_max_bet)))
+            amount = decider.how_much_to_bet(current_max_bet)
+        try:
+            action = [d for d in ai_decisions if d in self.available_actions][0]
+        except IndexError:
+            raise UnavailableDecision(f"AI's suggested decisions {ai_decisions} are not available, "
+                                      f"the available ones are {self.available_actions}")
+        self.decide(Decision(action, amount))
 
     def make_a_move_by_round(self, game_round: Round):
         """adapter method for calling make a move providing round as a parameter"""
         if self.is_ai:
+            round_ranges = opponent_ranges.round_ranges(game_round.pot)
             self.make_a_move(
                 game_round.board,
                 self.requested_bet,
                 game_round.stage_index,
                 game_round.blind_size,
-                len(game_round.active_players)
+                len(game_round.active_players),
+                [round_ranges.range_of(player) for player in game_round.active_players if player is not self]
+                if round_ranges else (),
+                stage_contexts.context([card.index for card in game_round.board]) if game_round.board else None
             )
 
 
-def possible_competitors_hands(known_cards: tuple[Card] = None) -> set[frozenset[Card]]:
-    """all possible pocket cards can be found at a competitor's"""
-    cards = Deck.all_cards()
-    if known_cards:
-        for card in known_cards:
-            cards.discard(card)
-    result = set()
-    for card in cards:
-        for second_card in cards:
-            if card is not second_card:
-                result.add(frozenset([card, second_card]))
-    return result
-
-
-subscribe(EventType.PLAYER_MAKE_MOVE, AI.make_a_move_by_round)
+# the AI players and the shared analysis follow the game by these events
+AI_SUBSCRIPTIONS = (
+    (EventType.PLAYER_MAKE_MOVE, AI.make_a_move_by_round),
+    (EventType.ROUND_END, decisions_cache.new_round),
+    (EventType.NEW_STAGE, stage_contexts.new_stage),
+    (EventType.ROUND_END, stage_contexts.round_end),
+    (EventType.NEW_STAGE, players_history.new_stage),
+    (EventType.PLAYER_MOVED, players_history.player_moved),
+    (EventType.WINNERS_CALCULATED, players_history.winners_calculated),
+    (EventType.ROUND_END, players_history.round_end),
+)
+# the opponents' ranges are followed only on demand, as their updates and the equity against them are slower
+RANGE_SUBSCRIPTIONS = (
+    (EventType.NEW_STAGE, opponent_ranges.new_stage),
+    (EventType.PLAYER_MOVED, opponent_ranges.player_moved),
+    (EventType.ROUND_END, opponent_ranges.round_end),
+)
+for event_type, fn in AI_SUBSCRIPTIONS + (RANGE_SUBSCRIPTIONS if AI_OPPONENT_RANGES else ()):
+    subscribe(event_type, fn)
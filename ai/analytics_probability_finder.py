@@ -1,6 +1,8 @@
 from functools import cached_property
-from typing import Collection
+from typing import Collection, Optional
 
+from ai.board_texture import BoardTexture, board_texture
+from ai.draws import DrawAnalysis, analyse_draws
 from entities.cards import Card, Deck, SUITS, VALUES, Value, Suit, ZERO_ACE
 from entities.combinations import best_hand, duplicates, cards_by_suit, cards_in_ranges, CARD_RANGES
 
@@ -58,6 +60,20 @@ class ProbabilityCounter:
         """shows how many suited cards are present in the known community cards"""
         return cards_by_suit(self.board)
 
+    @cached_property
+    def draws(self) -> Optional[DrawAnalysis]:
+        """Outs, draws and chances to improve the hand, None if it's not the flop or the turn"""
+        if len(self.board) not in (3, 4):
+            return None
+        return analyse_draws([card.index for card in self.hand], [card.index for card in self.board])
+
+    @cached_property
+    def texture(self) -> Optional[BoardTexture]:
+        """Texture features of the board, None on pre-flop"""
+        if len(self.board) < 3:
+            return None
+        return board_texture([card.index for card in self.board])
+
     @cached_property
     def board_cards_by_range(self) -> dict:
         """Shows how many cards in each range there are on the board"""
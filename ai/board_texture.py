@@ -0,0 +1,151 @@
+"""
+Board texture features.
+The features of all 1755 canonical flops are calculated once into a (1755, 5) array of bytes, and every one of
+22100 flops is mapped to its canonical row by its combinatorial rank, so a flop is classified with two lookups.
+The arrays are generated once into a versioned binary file with a checksum, that is memory-mapped on the first use.
+Turns and rivers are calculated on the first use and kept by their canonical form.
+
+Features:
+- pairedness: the number of board cards that pair another one (0 unpaired, 1 paired, 2 two pairs or trips)
+- flush level: the most cards of one suit (1 rainbow, 2 two-tone, 3 monotone)
+- connectedness: the number of 5-value straight windows holding at least 3 board values (0 no straight possible)
+- high card: the value index of the highest card
+- nut category: the best combination priority any pocket cards can make on the board
+"""
+from functools import cache, lru_cache
+from itertools import combinations
+from math import comb
+from pathlib import Path
+from typing import NamedTuple, Sequence
+
+import numpy as np
+
+from ai.canonical import canonicalize
+from ai.draws import STRAIGHT_WINDOWS
+from ai.preflop_equity import POCKET_MASKS
+from ai.ranges import POCKET_CARDS
+from common.config import BOARD_TEXTURES_PATH
+from common.tables_file import load_tables_file, save_tables_file
+from entities.batch_evaluator import evaluate_extensions
+from entities.cards import indices_mask
+from entities.combinations import values_mask
+from entities.evaluator import category
+from errors.errors import BoardTexturesError
+
+HIGH_CARD_CLASSES = (7, 10)  # value indices starting the middle (nine) and the high (queen) classes
+FLOPS = comb(52, 3)
+CANONICAL_FLOPS = 1755
+
+# textures file: the numbers in its header are the number of flops and of canonical flops
+TEXTURES_MAGIC = b'PKBT'
+TEXTURES_VERSION = 1
+
+
+class BoardTexture(NamedTuple):
+    """Texture features of a board"""
+
+    pairedness: int
+    flush_level: int
+    connectedness: int
+    high_card: int
+    nut_category: int
+
+    @property
+    def high_card_class(self) -> int:
+        """0 for boards with the highest card of eight or lower, 1 for nine to jack, 2 for queen or higher"""
+        return sum(self.high_card >= start for start in HIGH_CARD_CLASSES)
+
+
+FEATURES = len(BoardTexture._fields)
+
+
+def board_rank(board: Sequence[int]) -> int:
+    """Combinatorial rank of the set of cards, the ranks of all flops are 0 to 22099"""
+    return sum(comb(index, number) for number, index in enumerate(sorted(board), 1))
+
+
+def texture_features(board: Sequence[int]) -> BoardTexture:
+    """Calculate the texture features of the board given by cards indices"""
+    board = tuple(board)
+    suits = [0] * 4
+    for index in board:
+        suits[index & 3] += 1
+    values = values_mask(board)
+    live = (POCKET_MASKS & indices_mask(board)) == 0
+    return BoardTexture(
+        pairedness=len(board) - len({index >> 2 for index in board}),
+        flush_level=max(suits),
+        connectedness=sum((window & values).bit_count() >= 3 for window in STRAIGHT_WINDOWS),
+        high_card=max(board) >> 2,
+        nut_category=category(int(evaluate_extensions(board, POCKET_CARDS[live]).max())),
+    )
+
+
+def build_flop_textures() -> tuple[np.ndarray, np.ndarray]:
+    """Calculate the canonical row of each flop by its rank and the features of the canonical flops"""
+    rows, features = {}, []
+    flop_rows = np.zeros(FLOPS, dtype=np.uint16)
+    for flop in combinations(range(52), 3):
+        canonical = canonicalize((), flop).board
+        if canonical not in rows:
+            rows[canonical] = len(features)
+            features.append(texture_features(canonical))
+        flop_rows[board_rank(flop)] = rows[canonical]
+    return flop_rows, np.array(features, dtype=np.uint8)
+
+
+def save_flop_textures(path: Path, flop_rows: np.ndarray, features: np.ndarray) -> None:
+    """Write the textures file"""
+    save_tables_file(path, TEXTURES_MAGIC, TEXTURES_VERSION, (len(flop_rows), len(features)),
+                     (flop_rows.astype('<u2'), np.ascontiguousarray(features, dtype=np.uint8)))
+
+
+def load_flop_textures(path: Path) -> tuple[np.ndarray, np.ndarray]:
+    """Memory-map the textures file and check its version, sizes and checksum, the arrays are views of the mapping"""
+    sizes, data = load_tables_file(path, TEXTURES_MAGIC, TEXTURES_VERSION, BoardTexturesError)
+    if sizes != (FLOPS, CANONICAL_FLOPS):
+        raise BoardTexturesError(f"{path} is made by another version of the textures")
+    if len(data) != 2 * FLOPS + CANONICAL_FLOPS * FEATURES:
+        raise BoardTexturesError(f"{path} is corrupted")
+    flop_rows = np.frombuffer(data, dtype='<u2', count=FLOPS)
+    features = np.frombuffer(data, dtype=np.uint8, offset=2 * FLOPS).reshape(CANONICAL_FLOPS, FEATURES)
+    return flop_rows, features
+
+
+def load_or_build_flop_textures(path: Path) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Map the textures file, regenerating it if it's missing or invalid.
+    If the file can not be written, the generated arrays are kept in the process memory
+    """
+    try:
+        return load_flop_textures(path)
+    except BoardTexturesError:
+        pass
+
+    flop_rows, features = build_flop_textures()
+    try:
+        save_flop_textures(path, flop_rows, features)
+        return load_flop_textures(path)
+    except (OSError, BoardTexturesError):
+        return flop_rows, features
+
+
+@cache
+def flop_textures() -> tuple[np.ndarray, np.ndarray]:
+    """The canonical row of each flop by its rank and the features of the canonical flops, loaded on the first call"""
+    return load_or_build_flop_textures(BOARD_TEXTURES_PATH)
+
+
+@lru_cache(100_000)
+def _canonical_texture(board: tuple[int, ...]) -> BoardTexture:
+    return texture_features(board)
+
+
+def board_texture(board: Sequence[int]) -> BoardTexture:
+    """Texture features of the flop, the turn or the river given by cards indices"""
+    if len(board) == 3:
+        flop_rows, features = flop_textures()
+        return BoardTexture(*(int(feature) for feature in features[flop_rows[board_rank(board)]]))
+    if len(board) not in (4, 5):
+        raise ValueError('Board texture is defined for 3 to 5 cards')
+    return _canonical_texture(canonicalize((), board).board)
@@ -0,0 +1,69 @@
+"""
+Suit-isomorphic canonical forms of game situations.
+Suits have no order in poker, so situations that differ only by renaming the suits
+(e.g. AsKs on a 2s7h9d flop and AhKh on a 2h7s9d flop) have the same chances.
+Caches and equity tables are keyed on the canonical form to share the results of all such situations.
+
+Each suit gets a signature: the bitmasks of the values of this suit in each group of cards (the hand, the board).
+Suits are renamed in the descending order of their signatures, so isomorphic situations get the same form.
+"""
+from typing import Iterable, NamedTuple
+
+from entities.cards import Card
+
+
+class CanonicalSituation(NamedTuple):
+    """The canonical cards indices of the hand and the board and the suits renaming that gives them"""
+
+    hand: tuple[int, ...]
+    board: tuple[int, ...]
+    suit_map: tuple[int, ...]  # canonical suit index of each original suit index
+
+    @property
+    def key(self) -> tuple[tuple[int, ...], tuple[int, ...]]:
+        """Hashable key of the situation for caches"""
+        return self.hand, self.board
+
+
+def _signatures(groups: tuple[tuple[int, ...], ...]) -> list[tuple[int, ...]]:
+    """The values bitmasks of each suit in each group of cards"""
+    signatures = [[0] * len(groups) for _ in range(4)]
+    for i, group in enumerate(groups):
+        for index in group:
+            signatures[index & 3][i] |= 1 << (index >> 2)
+    return [tuple(signature) for signature in signatures]
+
+
+def suit_map_of(*groups: Iterable[int]) -> tuple[int, ...]:
+    """The canonical suit index of each suit for the groups of cards indices"""
+    signatures = _signatures(tuple(tuple(group) for group in groups))
+    order = sorted(range(4), key=lambda suit: signatures[suit], reverse=True)
+    suit_map = [0] * 4
+    for canonical_suit, suit in enumerate(order):
+        suit_map[suit] = canonical_suit
+    return tuple(suit_map)
+
+
+def apply_suit_map(indices: Iterable[int], suit_map: tuple[int, ...]) -> tuple[int, ...]:
+    """Rename the suits of the cards and sort them"""
+    return tuple(sorted(index & ~3 | suit_map[index & 3] for index in indices))
+
+
+def inverse_suit_map(suit_map: tuple[int, ...]) -> tuple[int, ...]:
+    """The suits renaming that gives the original cards back from the canonical ones"""
+    inverse = [0] * 4
+    for suit, canonical_suit in enumerate(suit_map):
+        inverse[canonical_suit] = suit
+    return tuple(inverse)
+
+
+def canonicalize(hand: Iterable[int], board: Iterable[int] = ()) -> CanonicalSituation:
+    """The canonical form of the hand and the board given by cards indices"""
+    hand, board = tuple(hand), tuple(board)
+    suit_map = suit_map_of(hand, board)
+    return CanonicalSituation(apply_suit_map(hand, suit_map), apply_suit_map(board, suit_map), suit_map)
+
+
+def canonicalize_cards(hand: Iterable[Card], board: Iterable[Card] = ()) -> CanonicalSituation:
+    """The canonical form of the hand and the board"""
+    return canonicalize((card.index for card in hand), (card.index for card in board))
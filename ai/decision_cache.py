@@ -0,0 +1,116 @@
+"""
+Bounded cache of the AI decisions' calculations.
+Entries are kept by explicit hashable keys made of canonical cards and numbers, never of players or deciders,
+so a cached value is never stale and never pins game objects in memory.
+The cache is bounded by the estimated size of its values in bytes, the least recently used entries are evicted first.
+Entries live for a number of game rounds, the round counter is advanced by the ROUND_END event.
+The keys are also bucketed by the round they are stored in, so the expired entries are dropped by whole buckets
+without looking at the live ones.
+"""
+import sys
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+
+class DecisionCacheStats(NamedTuple):
+    """Counters and the current size of the cache"""
+
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    entries: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of lookups found in the cache"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def deep_sizeof(value: Any) -> int:
+    """Estimated size in bytes of the value with the contents of its containers"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_sizeof(key) + deep_sizeof(item) for key, item in value.items())
+    elif isinstance(value, (tuple, list, set, frozenset)):
+        size += sum(deep_sizeof(item) for item in value)
+    return size
+
+
+class DecisionCache:
+    """Least recently used cache bounded by bytes with entries expiring after a number of rounds"""
+
+    def __init__(self, max_bytes: int, ttl_rounds: int):
+        self.max_bytes = max_bytes
+        self.ttl_rounds = ttl_rounds
+        self.round = 0
+        self.size = 0
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        self._entries: OrderedDict[Hashable, tuple[Any, int, int]] = OrderedDict()  # value, size, round
+        self._rounds: dict[int, set[Hashable]] = {}  # keys by the round they are stored in, the oldest round first
+
+    def _expired(self, entry_round: int) -> bool:
+        return self.round - entry_round >= self.ttl_rounds
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, entry_round = self._entries.pop(key)
+        self._rounds[entry_round].discard(key)
+        self.size -= size
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """The cached value or None, counted as a hit or a miss"""
+        entry = self._entries.get(key)
+        if entry is not None and self._expired(entry[2]):
+            self._remove(key)
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store the value, evicting the least recently used entries over the size bound"""
+        if key in self._entries:
+            self._remove(key)
+        size = deep_sizeof(key) + deep_sizeof(value)
+        if size > self.max_bytes:
+            return
+        while self.size + size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        self._entries[key] = value, size, self.round
+        self._rounds.setdefault(self.round, set()).add(key)
+        self.size += size
+
+    def get_or_calculate(self, key: Hashable, calculate: Callable[..., Any], *args: Any) -> Any:
+        """The cached value, calculated by the function of the arguments and stored if it's missing"""
+        value = self.get(key)
+        if value is None:
+            value = calculate(*args)
+            self.put(key, value)
+        return value
+
+    def new_round(self, *args) -> None:
+        """Start the next round and drop the buckets of the expired entries"""
+        self.round += 1
+        while self._rounds and self._expired(next(iter(self._rounds))):
+            for key in self._rounds.pop(next(iter(self._rounds))):
+                _, size, _ = self._entries.pop(key)
+                self.size -= size
+                self.expirations += 1
+
+    def clear(self) -> None:
+        """Drop all the entries"""
+        self._entries.clear()
+        self._rounds.clear()
+        self.size = 0
+
+    def stats(self) -> DecisionCacheStats:
+        """Current counters and size of the cache"""
+        return DecisionCacheStats(self.hits, self.misses, self.evictions, self.expirations,
+                                  len(self._entries), self.size)
@@ -0,0 +1,110 @@
+"""
+Outs and draws of a hand on the flop or the turn.
+Cards are card indices and sets of cards are bitmasks, the improvements are evaluated in one batch,
+so an analysis takes well under a millisecond and can be done for every pocket cards of a range.
+
+Outs of a combination are the unseen cards that make it the best combination of the hand,
+when it's better than the current one. Draws are found on the values and suits bitmasks:
+- flush draw: 4 cards of a suit with at least one pocket card of it
+- open-ended: two values complete a straight with a pocket card, double gutshots are counted as open-ended too,
+  as they have the same 8 outs
+- gutshot: one value completes a straight with a pocket card
+"""
+from typing import NamedTuple, Sequence
+
+import numpy as np
+
+from ai.equity import deck_rest
+from entities.batch_evaluator import evaluate_extensions
+from entities.combinations import Combination, COMBINATIONS_BY_PRIORITY, values_mask
+from entities.evaluator import CATEGORY_STARTS, category, evaluate_indices
+
+CATEGORY_STARTS_ARRAY = np.array(CATEGORY_STARTS, dtype=np.int64)
+# windows of 5 values in the 14-bit values mask, where the bit 0 is an ace counted as the lowest value
+STRAIGHT_WINDOWS = tuple(0b11111 << low for low in range(10))
+
+
+class DrawAnalysis(NamedTuple):
+    """Outs, draws and the probabilities of improving the hand to each better combination"""
+
+    combination: Combination
+    outs: dict[Combination, int]  # bitmask of the unseen cards
+    flush_draw: bool
+    open_ended: bool
+    gutshot: bool
+    next_card: dict[Combination, float]
+    by_river: dict[Combination, float]
+
+    def outs_number(self, combination: Combination) -> int:
+        """The number of outs of the combination"""
+        return self.outs.get(combination, 0).bit_count()
+
+    @property
+    def total_outs(self) -> int:
+        """The number of unseen cards that improve the combination"""
+        return sum(outs.bit_count() for outs in self.outs.values())
+
+    @property
+    def improvement_by_river(self) -> float:
+        """The probability to get a better combination by the river"""
+        return sum(self.by_river.values())
+
+
+def straight_completions(hand: Sequence[int], board: Sequence[int]) -> int:
+    """Bitmask of the value indices that complete a straight using a pocket card, 0 if there is a straight already"""
+    known, pocket = values_mask(tuple(hand) + tuple(board)), values_mask(hand)
+    completions = 0
+    for window in STRAIGHT_WINDOWS:
+        missing = window & ~known
+        if not missing:
+            return 0
+        if missing.bit_count() == 1 and window & pocket & ~missing:
+            completions |= missing
+    return completions >> 1 | (completions & 1) << 12
+
+
+def flush_draw(hand: Sequence[int], board: Sequence[int]) -> bool:
+    """If there are exactly 4 cards of a suit with at least one of them in the pocket"""
+    suits = [0] * 4
+    for index in tuple(hand) + tuple(board):
+        suits[index & 3] += 1
+    return any(suits[suit] == 4 for suit in {index & 3 for index in hand})
+
+
+def categories(strengths: np.ndarray) -> np.ndarray:
+    """The combination priority of each strength"""
+    return np.searchsorted(CATEGORY_STARTS_ARRAY, strengths, side='right') - 1
+
+
+def _improvements(categories: np.ndarray, current: int) -> dict[Combination, float]:
+    """Probability of each better combination among the equally possible categories"""
+    counts = np.bincount(categories, minlength=len(COMBINATIONS_BY_PRIORITY))
+    return {COMBINATIONS_BY_PRIORITY[priority]: int(counts[priority]) / len(categories)
+            for priority in range(current + 1, len(counts)) if counts[priority]}
+
+
+def analyse_draws(hand: Sequence[int], board: Sequence[int]) -> DrawAnalysis:
+    """Analyse the pocket cards on the flop or the turn given by cards indices"""
+    hand, board = tuple(hand), tuple(board)
+    if len(board) not in (3, 4):
+        raise ValueError('Draws are analysed on the flop or the turn')
+    known = hand + board
+    current = category(evaluate_indices(known))
+    unseen = np.array(deck_rest(known), dtype=np.int64)
+
+    next_categories = categories(evaluate_extensions(known, unseen[:, None]))
+    outs = {}
+    for priority in np.unique(next_categories[next_categories > current]):
+        cards = unseen[next_categories == priority]
+        outs[COMBINATIONS_BY_PRIORITY[priority]] = int(np.bitwise_or.reduce(np.left_shift(1, cards)))
+    next_card = _improvements(next_categories, current)
+    if len(board) == 3:
+        firsts, seconds = np.triu_indices(len(unseen), 1)
+        runouts = np.column_stack((unseen[firsts], unseen[seconds]))
+        by_river = _improvements(categories(evaluate_extensions(known, runouts)), current)
+    else:
+        by_river = next_card
+
+    completions = straight_completions(hand, board).bit_count()
+    return DrawAnalysis(COMBINATIONS_BY_PRIORITY[current], outs, flush_draw(hand, board),
+                        completions >= 2, completions == 1, next_card, by_river)
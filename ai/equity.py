@@ -0,0 +1,172 @@
+"""
+Equity of a hand against opponents' hands.
+Exact equity: runouts of the board and opponents' pocket cards are streamed as tuples of card indices
+and never stored, so the memory use doesn't depend on the number of enumerated situations.
+Monte Carlo equity: random runouts and opponents' pocket cards are sampled in batches until the samples limit,
+the time budget or the target standard error is reached, so the cost is chosen by the caller.
+All opponents of a sample share its runout, so the cost grows linearly with the number of opponents.
+"""
+from collections.abc import Iterator, Sequence
+from itertools import chain, combinations
+from math import sqrt
+from time import perf_counter
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from entities.batch_evaluator import evaluate_batch, evaluate_extensions
+from entities.cards import CARDS, Card, indices_mask
+from entities.evaluator import HandState
+
+
+class EquityResult(NamedTuple):
+    """Counts of won, tied and lost situations of a hand"""
+
+    wins: int
+    ties: int
+    losses: int
+
+    @property
+    def total(self) -> int:
+        """The number of counted situations"""
+        return self.wins + self.ties + self.losses
+
+    @property
+    def equity(self) -> float:
+        """The share of the pot the hand gets on average, ties split the pot"""
+        return (self.wins + self.ties / 2) / self.total if self.total else 0.0
+
+    def __add__(self, other: 'EquityResult') -> 'EquityResult':
+        return EquityResult(self.wins + other.wins, self.ties + other.ties, self.losses + other.losses)
+
+
+class EquityEstimate(NamedTuple):
+    """Estimated equity of a hand, its standard error and the number of samples it's based on"""
+
+    equity: float
+    standard_error: float
+    samples: int
+
+    def confidence_interval(self, z: float = 1.96) -> tuple[float, float]:
+        """The confidence interval of the equity, 95% by default"""
+        return max(self.equity - z * self.standard_error, 0.0), min(self.equity + z * self.standard_error, 1.0)
+
+    def __add__(self, other: 'EquityEstimate') -> 'EquityEstimate':
+        """The estimate made of the samples of both estimates"""
+        samples = self.samples + other.samples
+        equity = (self.equity * self.samples + other.equity * other.samples) / samples
+        # mean of squared scores of each estimate is its variance plus its squared equity
+        squares = sum(estimate.samples * (estimate.standard_error ** 2 * estimate.samples + estimate.equity ** 2)
+                      for estimate in (self, other))
+        return EquityEstimate(equity, sqrt(max(squares / samples - equity * equity, 0.0) / samples), samples)
+
+
+def deck_rest(*known: Sequence[int]) -> tuple[int, ...]:
+    """Indices of the cards that are not known"""
+    known_mask = indices_mask(chain.from_iterable(known))
+    return tuple(index for index in range(len(CARDS)) if not known_mask >> index & 1)
+
+
+def runouts(rest: Sequence[int], number: int) -> Iterator[tuple[int, ...]]:
+    """All the combinations of the number of cards from the rest of the deck"""
+    return combinations(rest, number)
+
+
+def runout_equity(hand: Sequence[int], board: Sequence[int], runout: Sequence[int],
+                  opponent_hands: np.ndarray, opponent_masks: np.ndarray) -> EquityResult:
+    """Counts of the hand against every opponent's hand not blocked by the runout"""
+    full_board = tuple(board) + tuple(runout)
+    hero = HandState.of(tuple(hand) + full_board).strength()
+    opponents = opponent_hands[(opponent_masks & indices_mask(runout)) == 0]
+    strengths = evaluate_extensions(full_board, opponents)
+    wins = int(np.count_nonzero(strengths < hero))
+    ties = int(np.count_nonzero(strengths == hero))
+    return EquityResult(wins, ties, len(opponents) - wins - ties)
+
+
+def opponent_hands(rest: Sequence[int]) -> tuple[np.ndarray, np.ndarray]:
+    """All pocket cards an opponent can have from the rest of the deck and their bitmasks"""
+    hands = np.array(list(combinations(rest, 2)), dtype=np.int64).reshape(-1, 2)
+    return hands, (1 << hands[:, 0]) | (1 << hands[:, 1])
+
+
+def exact_equity(hand: Sequence[int], board: Sequence[int] = (), dead: Sequence[int] = ()) -> EquityResult:
+    """
+    Exact counts of the hand against one opponent with random pocket cards
+    over every runout of the board and every opponent's hand.
+    Dead cards are known to be out of the deck. Meant for the flop and later stages:
+    on pre-flop there are billions of situations, so estimate them instead
+    """
+    rest = deck_rest(hand, board, dead)
+    hands, masks = opponent_hands(rest)
+    result = EquityResult(0, 0, 0)
+    for runout in runouts(rest, 5 - len(board)):
+        result += runout_equity(hand, board, runout, hands, masks)
+    return result
+
+
+def exact_equity_cards(hand: Sequence[Card], board: Sequence[Card] = ()) -> EquityResult:
+    """Exact counts of the hand against one opponent with random pocket cards"""
+    return exact_equity([card.index for card in hand], [card.index for card in board])
+
+
+def sample_cards(rest: Sequence[int], number: int, samples: int, rng: np.random.Generator) -> np.ndarray:
+    """A (samples, number) array of cards drawn without replacement from the rest of the deck for each sample"""
+    rest = np.asarray(rest, dtype=np.int64)
+    return rest[rng.random((samples, len(rest))).argpartition(number - 1, axis=1)[:, :number]]
+
+
+def multiway_scores(hero: np.ndarray, opponents: np.ndarray) -> np.ndarray:
+    """
+    The share of the pot the hero gets in each sample by the strengths of the hero (N,) and the opponents (N, k).
+    The pot is split between the hero and the opponents with equal best hands
+    """
+    best = opponents.max(axis=1)
+    ties = (opponents == hero[:, None]).sum(axis=1)
+    return np.where(hero > best, 1.0, np.where(hero == best, 1.0 / (1 + ties), 0.0))
+
+
+def monte_carlo_equity(hand: Sequence[int],
+                       board: Sequence[int] = (),
+                       dead: Sequence[int] = (),
+                       opponents: int = 1,
+                       max_samples: int = 100_000,
+                       time_budget: Optional[float] = None,
+                       target_error: Optional[float] = None,
+                       batch_size: int = 1000,
+                       rng: Optional[np.random.Generator] = None) -> EquityEstimate:
+    """
+    Estimate the equity of the hand against the number of opponents with random pocket cards by sampling.
+    Sampling stops when max_samples is reached, the time budget in seconds is spent
+    or the standard error is not greater than the target one, whichever comes first.
+    At least one batch is always sampled
+    """
+    rng = rng or np.random.default_rng()
+    deadline = perf_counter() + time_budget if time_budget is not None else None
+    hand, board = tuple(hand), tuple(board)
+    rest = deck_rest(hand, board, dead)
+    cards_to_open = 5 - len(board)
+    if cards_to_open + 2 * opponents > len(rest):
+        raise ValueError(f'Not enough cards in the deck for {opponents} opponents')
+    total = squares = 0.0
+    samples = 0
+    while True:
+        size = min(batch_size, max_samples - samples) or batch_size
+        drawn = sample_cards(rest, cards_to_open + 2 * opponents, size, rng)
+        boards = np.hstack((np.broadcast_to(np.asarray(board, dtype=np.int64), (size, len(board))),
+                            drawn[:, :cards_to_open]))
+        hero = evaluate_extensions(hand, boards)
+        opponents_strengths = np.column_stack([
+            evaluate_batch(np.hstack((boards, drawn[:, cards_to_open + 2 * i:cards_to_open + 2 * i + 2])))
+            for i in range(opponents)
+        ])
+        scores = multiway_scores(hero, opponents_strengths)
+        total += float(scores.sum())
+        squares += float((scores * scores).sum())
+        samples += size
+
+        equity = total / samples
+        standard_error = sqrt(max(squares / samples - equity * equity, 0.0) / samples)
+        if samples >= max_samples or (deadline is not None and perf_counter() >= deadline) or \
+                (target_error is not None and standard_error <= target_error):
+            return EquityEstimate(equity, standard_error, samples)
@@ -0,0 +1,146 @@
+"""
+Equity cache persisted across runs.
+Equities are stored in an SQLite file keyed by the suit-canonical hand and board and the number of opponents,
+so every process and every restart of the AI reuses the situations calculated before.
+The cache is read-through: a missing equity is calculated by the given function and stored.
+The number of entries is capped, the least recently used ones are evicted in batches when the cap is exceeded.
+Hits are only recorded in memory, the times of their use are written in batches with the next stored equity,
+when enough of them are pending or when the cache is closed.
+"""
+import atexit
+import sqlite3
+from functools import cache
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+from ai.canonical import CanonicalSituation
+from common.config import EQUITY_CACHE_PATH, EQUITY_CACHE_MAX_ENTRIES
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS equities (
+    cards BLOB NOT NULL,
+    opponents INTEGER NOT NULL,
+    equity REAL NOT NULL,
+    used INTEGER NOT NULL,
+    PRIMARY KEY (cards, opponents)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS equities_used ON equities (used);
+'''
+
+
+class CacheStats(NamedTuple):
+    """Counters of the cache use"""
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of lookups found in the cache"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class EquityCache:
+    """Persistent cache of equities of canonical situations"""
+
+    def __init__(self, path: Path, max_entries: int = 100_000, eviction_share: float = 0.1, used_batch: int = 1000):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.eviction_batch = max(int(max_entries * eviction_share), 1)
+        self.used_batch = used_batch
+        self.hits = self.misses = self.evictions = 0
+        self._used: dict[tuple[bytes, int], int] = {}  # usage clock of the hits not written yet
+        self._connection = sqlite3.connect(path)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(SCHEMA)
+        self._entries, last_used = self._connection.execute('SELECT COUNT(*), MAX(used) FROM equities').fetchone()
+        self._clock = last_used or 0
+
+    @staticmethod
+    def key(situation: CanonicalSituation) -> bytes:
+        """Cards of the situation packed to the key, the board is sorted, so the hand is split by its size"""
+        return bytes(situation.hand) + bytes(situation.board)
+
+    def _tick(self) -> int:
+        """The next value of the usage clock, the least recently used entries have the smallest ones"""
+        self._clock += 1
+        return self._clock
+
+    def get(self, situation: CanonicalSituation, opponents: int = 1) -> Optional[float]:
+        """The cached equity of the situation or None, counted as a hit or a miss"""
+        key = self.key(situation)
+        row = self._connection.execute('SELECT equity FROM equities WHERE cards = ? AND opponents = ?',
+                                       (key, opponents)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._used[key, opponents] = self._tick()
+        if len(self._used) >= self.used_batch:
+            with self._connection:
+                self._write_used()
+        return row[0]
+
+    def _write_used(self) -> None:
+        """Write the usage clock of the pending hits"""
+        if self._used:
+            self._connection.executemany('UPDATE equities SET used = ? WHERE cards = ? AND opponents = ?',
+                                         [(used, *key) for key, used in self._used.items()])
+            self._used.clear()
+
+    def put(self, situation: CanonicalSituation, opponents: int, equity: float) -> None:
+        """Store the equity of the situation, evicting the least recently used entries over the cap"""
+        with self._connection:
+            self._write_used()
+            values = (equity, self._tick(), self.key(situation), opponents)
+            updated = self._connection.execute(
+                'UPDATE equities SET equity = ?, used = ? WHERE cards = ? AND opponents = ?', values).rowcount
+            if not updated:
+                self._connection.execute('INSERT INTO equities (equity, used, cards, opponents) VALUES (?, ?, ?, ?)',
+                                         values)
+                self._entries += 1
+            if self._entries > self.max_entries:
+                self._evict(self._entries - self.max_entries + self.eviction_batch)
+
+    def _evict(self, number: int) -> None:
+        """Delete the number of the least recently used entries"""
+        evicted = self._connection.execute(
+            'DELETE FROM equities WHERE (cards, opponents) IN '
+            '(SELECT cards, opponents FROM equities ORDER BY used LIMIT ?)', (number,)).rowcount
+        self._entries -= evicted
+        self.evictions += evicted
+
+    def equity(self, situation: CanonicalSituation, opponents: int, calculate: Callable[[], float]) -> float:
+        """The cached equity of the situation, calculated and stored if it's missing"""
+        equity = self.get(situation, opponents)
+        if equity is None:
+            equity = calculate()
+            self.put(situation, opponents, equity)
+        return equity
+
+    def stats(self) -> CacheStats:
+        """Current counters of the cache"""
+        return CacheStats(self.hits, self.misses, self.evictions, self._entries)
+
+    def close(self) -> None:
+        """Write the pending hits and close the cache file"""
+        with self._connection:
+            self._write_used()
+        self._connection.close()
+
+
+@cache
+def equity_cache() -> Optional[EquityCache]:
+    """The cache opened on the first call or None if it's disabled or its file can not be opened"""
+    if EQUITY_CACHE_PATH is None:
+        return None
+    try:
+        cache = EquityCache(EQUITY_CACHE_PATH, EQUITY_CACHE_MAX_ENTRIES)
+    except (OSError, sqlite3.Error):
+        return None
+    atexit.register(cache.close)
+    return cache
@@ -0,0 +1,89 @@
+"""
+Hand strength, hand potential and effective hand strength of a hand against an opponent's range.
+- Hand strength (HS): the share of the range the hand beats now, ties counted as a half
+- Positive potential (PPot): the chance to get ahead by the river when behind now
+- Negative potential (NPot): the chance to fall behind by the river when ahead now
+- Effective hand strength: EHS = HS * (1 - NPot) + (1 - HS) * PPot
+- EHS²: the mean of the squared hand strength on the river, it rewards the hands that are often very strong
+All the metrics come from one pass over the runouts: the outcome of each pocket cards of the range now
+and on the river is counted in a 3x3 transitions matrix weighted by the range.
+"""
+from itertools import combinations
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from ai.equity import deck_rest
+from ai.preflop_equity import POCKET_MASKS
+from ai.ranges import POCKET_CARDS, Range
+from entities.batch_evaluator import evaluate_extensions
+from entities.cards import indices_mask
+from entities.evaluator import HandState
+
+AHEAD, TIED, BEHIND = range(3)
+
+
+class HandPotential(NamedTuple):
+    """Metrics of a hand against a range"""
+
+    hand_strength: float
+    positive_potential: float
+    negative_potential: float
+    effective_strength: float
+    effective_strength_squared: float
+    equity: float
+
+
+def _outcomes(hero: int, opponents: np.ndarray) -> np.ndarray:
+    """Outcome of the hand against each opponent's hand"""
+    return np.where(hero > opponents, AHEAD, np.where(hero == opponents, TIED, BEHIND))
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    return numerator / denominator if denominator else 0.0
+
+
+def hand_potential(hand: Sequence[int], board: Sequence[int], opponent_range: Optional[Range] = None,
+                   max_runouts: Optional[int] = None, rng: Optional[np.random.Generator] = None) -> HandPotential:
+    """
+    Metrics of the hand on the flop, the turn or the river against the range, all pocket cards by default.
+    All the runouts are counted unless max_runouts is given, then that many random runouts are
+    """
+    hand, board = tuple(hand), tuple(board)
+    if len(board) not in (3, 4, 5):
+        raise ValueError('Hand potential is calculated on the flop, the turn or the river')
+    probabilities = (opponent_range or Range()).probabilities(hand + board)
+    live = np.flatnonzero(probabilities)
+    now = _outcomes(HandState.of(hand + board).strength(), evaluate_extensions(board, POCKET_CARDS[live]))
+
+    runouts = list(combinations(deck_rest(hand, board), 5 - len(board)))
+    if max_runouts is not None and len(runouts) > max_runouts:
+        rng = rng or np.random.default_rng()
+        runouts = [runouts[i] for i in rng.choice(len(runouts), max_runouts, replace=False)]
+
+    transitions = np.zeros(9)
+    squares = 0.0
+    for runout in runouts:
+        kept = (POCKET_MASKS[live] & indices_mask(runout)) == 0
+        weights = probabilities[live[kept]]
+        full_board = board + runout
+        river = _outcomes(HandState.of(hand + full_board).strength(),
+                          evaluate_extensions(full_board, POCKET_CARDS[live[kept]]))
+        runout_transitions = np.bincount(3 * now[kept] + river, weights=weights, minlength=9)
+        transitions += runout_transitions
+        runout_weight = runout_transitions.sum()
+        river_strength = _ratio(runout_transitions[AHEAD::3].sum() + runout_transitions[TIED::3].sum() / 2,
+                                runout_weight)
+        squares += river_strength ** 2 * runout_weight
+
+    matrix = transitions.reshape(3, 3)
+    now_totals, river_totals, total = matrix.sum(axis=1), matrix.sum(axis=0), transitions.sum()
+    hand_strength = _ratio(now_totals[AHEAD] + now_totals[TIED] / 2, total)
+    positive = _ratio(matrix[BEHIND, AHEAD] + matrix[BEHIND, TIED] / 2 + matrix[TIED, AHEAD] / 2,
+                      now_totals[BEHIND] + now_totals[TIED] / 2)
+    negative = _ratio(matrix[AHEAD, BEHIND] + matrix[TIED, BEHIND] / 2 + matrix[AHEAD, TIED] / 2,
+                      now_totals[AHEAD] + now_totals[TIED] / 2)
+    return HandPotential(float(hand_strength), float(positive), float(negative),
+                         float(hand_strength * (1 - negative) + (1 - hand_strength) * positive),
+                         float(_ratio(squares, total)),
+                         float(_ratio(river_totals[AHEAD] + river_totals[TIED] / 2, total)))
@@ -0,0 +1,99 @@
+"""
+Equity calculations on a pool of processes.
+The evaluator tables are copied once into shared memory and every worker attaches to them, so nothing is copied
+per worker. Exact enumeration is split by the first card of the runout, sampling is split into equal parts with
+independent random streams, and the parts are merged in the order of the tasks, so the results are deterministic.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+
+from ai.equity import EquityEstimate, EquityResult, deck_rest, monte_carlo_equity, opponent_hands, runout_equity
+from entities import batch_evaluator, evaluator
+
+_attached_memory: Optional[SharedMemory] = None
+
+
+def _attach_tables(name: str, values_size: int, flushes_size: int) -> None:
+    """Worker initializer: use the evaluator tables from the shared memory"""
+    global _attached_memory
+    # workers share the resource tracker of the pool's process, so the memory is unlinked once, by the pool
+    _attached_memory = SharedMemory(name=name)
+    buffer = _attached_memory.buf
+    evaluator.install_tables(buffer[:2 * values_size].cast('H'),
+                             buffer[2 * values_size:2 * (values_size + flushes_size)].cast('H'))
+    # a forked worker inherits the parent's arrays of the batch evaluator, they are made again over the shared tables
+    batch_evaluator.tables.cache_clear()
+
+
+def _exact_equity_part(hand: Sequence[int], board: Sequence[int], dead: Sequence[int], first: int) -> EquityResult:
+    """Exact counts over the runouts starting with the first card of the rest of the deck"""
+    rest = deck_rest(hand, board, dead)
+    hands, masks = opponent_hands(rest)
+    cards_to_open = 5 - len(board)
+    if not cards_to_open:
+        return runout_equity(hand, board, (), hands, masks)
+    result = EquityResult(0, 0, 0)
+    for tail in combinations(rest[first + 1:], cards_to_open - 1):
+        result += runout_equity(hand, board, (rest[first],) + tail, hands, masks)
+    return result
+
+
+def _monte_carlo_part(hand: Sequence[int], board: Sequence[int], dead: Sequence[int], opponents: int,
+                      samples: int, seed: np.random.SeedSequence) -> EquityEstimate:
+    """Estimate made of the number of samples with its own random stream"""
+    return monte_carlo_equity(hand, board, dead, opponents, max_samples=samples, rng=np.random.default_rng(seed))
+
+
+class ParallelEquity:
+    """
+    Process pool for equity calculations with the evaluator tables in shared memory.
+    Must be closed to release the memory, so is better used as a context manager
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        values_table, flushes_table = evaluator.tables()
+        values_size, flushes_size = len(values_table), len(flushes_table)
+        self._memory = SharedMemory(create=True, size=2 * (values_size + flushes_size))
+        self._memory.buf[:2 * values_size] = memoryview(values_table).cast('B')
+        self._memory.buf[2 * values_size:2 * (values_size + flushes_size)] = memoryview(flushes_table).cast('B')
+        self._pool = ProcessPoolExecutor(workers, initializer=_attach_tables,
+                                         initargs=(self._memory.name, values_size, flushes_size))
+
+    def exact_equity(self, hand: Sequence[int], board: Sequence[int] = (), dead: Sequence[int] = ()) -> EquityResult:
+        """Exact counts of the hand against one opponent, the same as equity.exact_equity gives"""
+        hand, board, dead = tuple(hand), tuple(board), tuple(dead)
+        cards_to_open = 5 - len(board)
+        firsts = range(len(deck_rest(hand, board, dead)) - cards_to_open + 1) if cards_to_open else [0]
+        parts = self._pool.map(_exact_equity_part, *zip(*((hand, board, dead, first) for first in firsts)))
+        return sum(parts, EquityResult(0, 0, 0))
+
+    def monte_carlo_equity(self, hand: Sequence[int], board: Sequence[int] = (), dead: Sequence[int] = (),
+                           opponents: int = 1, samples: int = 1_000_000, parts: int = 32,
+                           seed: Optional[int] = None) -> EquityEstimate:
+        """Estimate of the equity made of the number of samples split into parts with independent random streams"""
+        hand, board, dead = tuple(hand), tuple(board), tuple(dead)
+        seeds = np.random.SeedSequence(seed).spawn(parts)
+        sizes = [samples // parts + (i < samples % parts) for i in range(parts)]
+        tasks = [(hand, board, dead, opponents, size, part_seed) for size, part_seed in zip(sizes, seeds) if size]
+        estimates = list(self._pool.map(_monte_carlo_part, *zip(*tasks)))
+        return sum(estimates[1:], estimates[0])
+
+    def map(self, function: Callable, *iterables: Iterable) -> Iterator:
+        """Run the module-level function on the workers, the results come in the order of the arguments"""
+        return self._pool.map(function, *iterables)
+
+    def close(self) -> None:
+        """Stop the workers and release the shared memory"""
+        self._pool.shutdown()
+        self._memory.close()
+        self._memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,12 +1,187 @@
 """
-todo: memorize the history of the decisions for each player to analyse their behavior
-What should we write down?
-- Player's Bet size
-- Known cards
-- Other players' bets
-- Player's hand if the round ended with a showdown
-
-What should we analyse?
-- How often does the player fold and what the stakes are
-- When do they bet: the possible win ratio at the each point and the stakes size
+History of the players' decisions to analyse their behavior.
+Every move is appended to a fixed-size ring buffer of the player, and the hands shown at showdowns to another one,
+so the memory use doesn't grow with the number of played rounds.
+Each move also updates the running counters of the player in O(1), so the statistics are read in constant time:
+- VPIP: share of rounds the player voluntarily put money in the pot on pre-flop
+- PFR: share of rounds the player raised on pre-flop
+- Aggression factor: raises to calls after pre-flop
+- Fold to bet: share of folds when facing a bet on each stage
+- Went to showdown and won at showdown
+The statistics are kept in memory as long as the players, every round is followed separately by its pot,
+so the stage of a move is right when several tables are played in one process.
 """
+from collections import deque
+from typing import NamedTuple, Optional
+from weakref import WeakKeyDictionary
+
+from common.config import HISTORY_SIZE
+from entities.bet import Bet
+from entities.cards import Card
+from entities.players import Player
+from entities.pot import Pot
+
+STAGE_BY_BOARD_SIZE = {0: 1, 3: 2, 4: 3, 5: 4}
+VOLUNTARY_ACTIONS = (Bet.CALL, Bet.RAISE, Bet.ALL_IN)
+AGGRESSIVE_ACTIONS = (Bet.RAISE, Bet.ALL_IN)
+
+
+class Move(NamedTuple):
+    """A player's move: the number of the round, the stage index, the action and the size of the bet"""
+
+    round: int
+    stage: int
+    action: Bet
+    size: float
+
+
+class Showdown(NamedTuple):
+    """The hand a player showed at a showdown and if it won"""
+
+    round: int
+    hand: tuple[Card, ...]
+    won: bool
+
+
+class RoundStage:
+    """The number of a followed round and its current stage index"""
+
+    def __init__(self, number: int):
+        self.number = number
+        self.stage = 1
+
+
+class PlayerStats:
+    """Running counters of a player's behavior and the last moves and showdowns"""
+
+    def __init__(self, history_size: int = HISTORY_SIZE):
+        self.moves: deque[Move] = deque(maxlen=history_size)
+        self.showdowns: deque[Showdown] = deque(maxlen=history_size)
+        self.rounds = 0
+        self.voluntary_rounds = 0
+        self.raised_rounds = 0
+        self.raises = 0
+        self.calls = 0
+        self.bets_faced = [0] * 5
+        self.folds_to_bet = [0] * 5
+        self.showdowns_played = 0
+        self.showdowns_won = 0
+        self.last_round = -1
+        self._voluntary = self._raised = False
+
+    def add_move(self, move: Move, faced_bet: bool) -> None:
+        """Count the move"""
+        self.moves.append(move)
+        if move.round != self.last_round:
+            self.last_round = move.round
+            self.rounds += 1
+            self._voluntary = self._raised = False
+
+        if move.stage == 1:
+            if move.action in VOLUNTARY_ACTIONS and not self._voluntary:
+                self._voluntary = True
+                self.voluntary_rounds += 1
+            if move.action in AGGRESSIVE_ACTIONS and not self._raised:
+                self._raised = True
+                self.raised_rounds += 1
+        else:
+            self.raises += move.action in AGGRESSIVE_ACTIONS
+            self.calls += move.action == Bet.CALL
+
+        if faced_bet:
+            self.bets_faced[move.stage] += 1
+            self.folds_to_bet[move.stage] += move.action == Bet.FOLD
+
+    def add_showdown(self, showdown: Showdown) -> None:
+        """Count the showdown"""
+        self.showdowns.append(showdown)
+        self.showdowns_played += 1
+        self.showdowns_won += showdown.won
+
+    @property
+    def vpip(self) -> float:
+        """Share of rounds the player voluntarily put money in the pot on pre-flop"""
+        return self.voluntary_rounds / self.rounds if self.rounds else 0.0
+
+    @property
+    def pfr(self) -> float:
+        """Share of rounds the player raised on pre-flop"""
+        return self.raised_rounds / self.rounds if self.rounds else 0.0
+
+    @property
+    def aggression_factor(self) -> Optional[float]:
+        """Raises to calls after pre-flop, None if the player never called"""
+        return self.raises / self.calls if self.calls else None
+
+    def fold_to_bet(self, stage: int) -> Optional[float]:
+        """Share of folds when facing a bet on the stage, None if the player never faced a bet there"""
+        return self.folds_to_bet[stage] / self.bets_faced[stage] if self.bets_faced[stage] else None
+
+    @property
+    def went_to_showdown(self) -> float:
+        """Share of rounds the player got to a showdown"""
+        return self.showdowns_played / self.rounds if self.rounds else 0.0
+
+    @property
+    def won_at_showdown(self) -> Optional[float]:
+        """Share of showdowns the player won, None if there were none"""
+        return self.showdowns_won / self.showdowns_played if self.showdowns_played else None
+
+
+class PlayersHistory:
+    """
+    Statistics of all the players, updated by the game events.
+    A round is found by its pot on a new stage and by the player on a move, as a player plays one round at a time
+    """
+
+    def __init__(self, history_size: int = HISTORY_SIZE):
+        self.history_size = history_size
+        # the statistics are dropped with the player, when the game the player has left or ended is released
+        self.players: WeakKeyDictionary[Player, PlayerStats] = WeakKeyDictionary()
+        self.rounds_started = 0
+        # the rounds are dropped on their end, or with their pots if they are abandoned
+        self.rounds: WeakKeyDictionary[Pot, RoundStage] = WeakKeyDictionary()
+        self.playing: WeakKeyDictionary[Player, RoundStage] = WeakKeyDictionary()
+
+    def stats(self, player: Player) -> PlayerStats:
+        """The statistics of the player, empty for a new one"""
+        if player not in self.players:
+            self.players[player] = PlayerStats(self.history_size)
+        return self.players[player]
+
+    def new_stage(self, board, pot: Pot) -> None:
+        """Start following the round on pre-flop, or on the first stage seen, and follow its stage"""
+        stage = STAGE_BY_BOARD_SIZE[len(board)]
+        if stage == 1 or pot not in self.rounds:
+            self.rounds_started += 1
+            self.rounds[pot] = RoundStage(self.rounds_started)
+            for player in pot.players:
+                self.playing[player] = self.rounds[pot]
+        self.rounds[pot].stage = stage
+
+    def player_moved(self, player: Player) -> None:
+        """Record the move, blinds are posted without asking the player, so they count only as taking part"""
+        round_stage = self.playing.get(player)
+        if round_stage is None or player.decision.action == Bet.NOT_DECIDED:
+            return
+        forced = not player.available_actions
+        action = Bet.BLIND if forced else player.decision.action
+        faced_bet = not forced and Bet.CHECK not in player.available_actions
+        move = Move(round_stage.number, round_stage.stage, action, player.decision.size)
+        self.stats(player).add_move(move, faced_bet)
+
+    def winners_calculated(self, game_round) -> None:
+        """Record the hands shown at the showdown"""
+        round_stage = self.rounds.get(game_round.pot)
+        if round_stage is None or len(game_round.active_players) < 2:
+            return
+        winners = game_round.rating[0][1]
+        for player in game_round.active_players:
+            self.stats(player).add_showdown(Showdown(round_stage.number, tuple(player.hand), player in winners))
+
+    def round_end(self, game_round) -> None:
+        """Stop following the round"""
+        round_stage = self.rounds.pop(game_round.pot, None)
+        for player in game_round.players:
+            if self.playing.get(player) is round_stage:
+                del self.playing[player]
@@ -0,0 +1,193 @@
+"""
+Pre-flop equity tables.
+There are 1326 pocket cards, but only 169 starting hands up to renaming the suits (13 pairs, 78 suited, 78 offsuit).
+The tables keep the equity of each starting hand against 1 to 8 opponents with random pocket cards
+and the heads-up equity of each starting hand against each of the 1326 pocket cards of the opponent.
+The equity of any pocket cards against any other ones is a lookup into the row of the starting hand
+by the opponent's cards renamed the same way, so the full 1326x1326 matrix is never stored.
+
+The tables are generated by sampling on all cores with `python -m ai.preflop_equity` into a versioned binary file
+with a checksum. Equities are stored as 16-bit fractions of 65535, the file takes less than 500KB.
+"""
+from argparse import ArgumentParser
+from functools import cache, cached_property
+from itertools import combinations, permutations
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from ai.canonical import canonicalize
+from ai.equity import deck_rest, monte_carlo_equity, sample_cards
+from ai.parallel_equity import ParallelEquity
+from common.config import PREFLOP_EQUITY_PATH
+from common.tables_file import load_tables_file, save_tables_file
+from entities.batch_evaluator import evaluate_extensions
+from errors.errors import EquityTablesError
+
+MAX_OPPONENTS = 8
+EQUITY_SCALE = 0xFFFF
+
+POCKETS = tuple(combinations(range(52), 2))
+POCKET_MASKS = np.array([1 << first | 1 << second for first, second in POCKETS], dtype=np.int64)
+SUIT_PERMUTATIONS = tuple(permutations(range(4)))
+
+
+def pocket_index(hand: Iterable[int]) -> int:
+    """Index of the pocket cards given by cards indices among all 1326 pocket cards"""
+    first, second = sorted(hand)
+    return first * (103 - first) // 2 + second - first - 1
+
+
+# pocket index of each pocket cards with the suits renamed by each suits permutation
+POCKET_PERMUTATIONS = np.array([[pocket_index(index & ~3 | suits[index & 3] for index in pocket) for pocket in POCKETS]
+                                for suits in SUIT_PERMUTATIONS], dtype=np.int64)
+_CANONICAL_POCKETS = [canonicalize(pocket) for pocket in POCKETS]
+STARTING_HANDS = tuple(sorted({situation.hand for situation in _CANONICAL_POCKETS}))
+# starting hand and the suits permutation that turns each pocket cards into it
+STARTING_HAND_OF_POCKET = np.array([STARTING_HANDS.index(situation.hand) for situation in _CANONICAL_POCKETS],
+                                   dtype=np.int64)
+PERMUTATION_OF_POCKET = np.array([SUIT_PERMUTATIONS.index(situation.suit_map) for situation in _CANONICAL_POCKETS],
+                                 dtype=np.int64)
+STARTING_HAND_COMBOS = np.bincount(STARTING_HAND_OF_POCKET, minlength=len(STARTING_HANDS))
+
+# tables file: the numbers in its header are the numbers of samples of the tables
+TABLES_MAGIC = b'PKPF'
+TABLES_VERSION = 1
+MULTIWAY_SHAPE = (len(STARTING_HANDS), MAX_OPPONENTS)
+HEADS_UP_SHAPE = (len(STARTING_HANDS), len(POCKETS))
+
+
+def starting_hand_index(hand: Iterable[int]) -> int:
+    """Index of the starting hand of the pocket cards among 169 starting hands"""
+    return int(STARTING_HAND_OF_POCKET[pocket_index(hand)])
+
+
+class PreFlopEquityTable:
+    """Equities of the starting hands against random opponents and against known pocket cards"""
+
+    def __init__(self, multiway: np.ndarray, heads_up: np.ndarray, scale: float = 1.0):
+        """The equities are fractions of the scale, e.g. the 16-bit ones of the tables file"""
+        self.multiway = multiway
+        self.heads_up_rows = heads_up
+        self.scale = scale
+
+    def equity(self, hand: Iterable[int], opponents: int = 1) -> float:
+        """Equity of the pocket cards against the number of opponents with random pocket cards"""
+        return float(self.multiway[starting_hand_index(hand), opponents - 1]) / self.scale
+
+    @cached_property
+    def percentiles(self) -> np.ndarray:
+        """Share of all pocket cards with a smaller equity for each starting hand and number of opponents"""
+        lower = self.multiway[None, :, :] < self.multiway[:, None, :]
+        return (lower * STARTING_HAND_COMBOS[None, :, None]).sum(axis=1) / len(POCKETS)
+
+    def percentile(self, hand: Iterable[int], opponents: int = 1) -> float:
+        """Share of all pocket cards with a smaller equity against the number of opponents"""
+        return float(self.percentiles[starting_hand_index(hand), opponents - 1])
+
+    def heads_up(self, hand: Iterable[int], opponent_hand: Iterable[int]) -> float:
+        """Equity of the pocket cards against the opponent's pocket cards"""
+        pocket = pocket_index(hand)
+        opponent_pocket = POCKET_PERMUTATIONS[PERMUTATION_OF_POCKET[pocket], pocket_index(opponent_hand)]
+        return float(self.heads_up_rows[STARTING_HAND_OF_POCKET[pocket], opponent_pocket]) / self.scale
+
+    @cached_property
+    def heads_up_matrix(self) -> np.ndarray:
+        """Equity of each of 1326 pocket cards against each other, 0 for the ones sharing a card"""
+        opponents = POCKET_PERMUTATIONS[PERMUTATION_OF_POCKET]
+        return self.heads_up_rows[STARTING_HAND_OF_POCKET[:, None], opponents] / self.scale
+
+
+def save_tables(path: Path, multiway: np.ndarray, heads_up: np.ndarray, samples: int, heads_up_samples: int) -> None:
+    """Write the tables file"""
+    save_tables_file(path, TABLES_MAGIC, TABLES_VERSION, (samples, heads_up_samples),
+                     [np.rint(table * EQUITY_SCALE).astype('<u2') for table in (multiway, heads_up)])
+
+
+def load_tables(path: Path) -> PreFlopEquityTable:
+    """Memory-map the tables file and check its version, size and checksum, the tables are views of the mapping"""
+    _, data = load_tables_file(path, TABLES_MAGIC, TABLES_VERSION, EquityTablesError)
+    multiway_size, heads_up_size = np.prod(MULTIWAY_SHAPE), np.prod(HEADS_UP_SHAPE)
+    if len(data) != 2 * (multiway_size + heads_up_size):
+        raise EquityTablesError(f"{path} is corrupted")
+
+    equities = np.frombuffer(data, dtype='<u2')
+    return PreFlopEquityTable(equities[:multiway_size].reshape(MULTIWAY_SHAPE),
+                              equities[multiway_size:].reshape(HEADS_UP_SHAPE), EQUITY_SCALE)
+
+
+@cache
+def preflop_table() -> Optional[PreFlopEquityTable]:
+    """The tables loaded on the first call or None if the tables file is not generated or invalid"""
+    try:
+        return load_tables(PREFLOP_EQUITY_PATH)
+    except EquityTablesError:
+        return None
+
+
+def _multiway_equity(hand: tuple[int, ...], opponents: int, samples: int, seed: np.random.SeedSequence) -> float:
+    """Sampled equity of the pocket cards against the number of opponents"""
+    return monte_carlo_equity(hand, opponents=opponents, max_samples=samples, batch_size=10_000,
+                              rng=np.random.default_rng(seed)).equity
+
+
+def _heads_up_equities(matchups: Sequence[tuple[tuple[int, ...], tuple[int, ...]]], samples: int,
+                       seed: np.random.SeedSequence) -> list[float]:
+    """Sampled equities of the pocket cards against the opponent's ones for each matchup"""
+    rng = np.random.default_rng(seed)
+    equities = []
+    for hand, opponent_hand in matchups:
+        boards = sample_cards(deck_rest(hand, opponent_hand), 5, samples, rng)
+        strengths, opponent_strengths = evaluate_extensions(hand, boards), evaluate_extensions(opponent_hand, boards)
+        equities.append(float(((strengths > opponent_strengths) + (strengths == opponent_strengths) / 2).mean()))
+    return equities
+
+
+def build_tables(samples: int, heads_up_samples: int, workers: Optional[int] = None, seed: Optional[int] = None,
+                 chunk_size: int = 500) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sample the multiway and the heads-up tables on the pool of processes.
+    Matchups equal up to renaming the suits are sampled once, and the matchup of the opponent against the hand
+    is given by the one of the hand against the opponent, so the heads-up equities of two hands sum up to 1
+    """
+    heads_up = np.zeros(HEADS_UP_SHAPE)
+    matchups, cells = {}, []
+    for row, hand in enumerate(STARTING_HANDS):
+        for column in np.flatnonzero((POCKET_MASKS & (1 << hand[0] | 1 << hand[1])) == 0):
+            opponent_hand = POCKETS[column]
+            key, reversed_key = canonicalize(hand, opponent_hand).key, canonicalize(opponent_hand, hand).key
+            if key == reversed_key:
+                # the hands are the same up to renaming the suits, so they split the pot on average
+                heads_up[row, column] = 0.5
+            elif key not in matchups and reversed_key in matchups:
+                cells.append((row, column, matchups[reversed_key], True))
+            else:
+                cells.append((row, column, matchups.setdefault(key, len(matchups)), False))
+
+    matchups = list(matchups)
+    chunks = [matchups[start:start + chunk_size] for start in range(0, len(matchups), chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks) + len(STARTING_HANDS) * MAX_OPPONENTS)
+    with ParallelEquity(workers) as pool:
+        equities = [equity for chunk_equities in pool.map(_heads_up_equities, chunks, [heads_up_samples] * len(chunks),
+                                                          seeds[:len(chunks)])
+                    for equity in chunk_equities]
+        tasks = [(hand, opponents) for hand in STARTING_HANDS for opponents in range(1, MAX_OPPONENTS + 1)]
+        multiway = np.array(list(pool.map(_multiway_equity, *zip(*tasks), [samples] * len(tasks),
+                                          seeds[len(chunks):]))).reshape(MULTIWAY_SHAPE)
+
+    for row, column, matchup, is_reversed in cells:
+        heads_up[row, column] = 1 - equities[matchup] if is_reversed else equities[matchup]
+    return multiway, heads_up
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Generate the pre-flop equity tables file')
+    parser.add_argument('--samples', type=int, default=1_000_000, help='samples per starting hand and opponents')
+    parser.add_argument('--heads-up-samples', type=int, default=20_000, help='samples per heads-up matchup')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes, all cores by default')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--path', type=Path, default=PREFLOP_EQUITY_PATH)
+    args = parser.parse_args()
+    save_tables(args.path, *build_tables(args.samples, args.heads_up_samples, args.workers, args.seed),
+                args.samples, args.heads_up_samples)
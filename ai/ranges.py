@@ -0,0 +1,237 @@
+"""
+Ranges of opponents' pocket cards.
+A range is a vector of weights of all 1326 pocket cards in the order of preflop_equity.POCKETS.
+Known cards remove the pocket cards holding them, observed actions multiply the weights by the likelihood
+of the action for the strength of each pocket cards on the current board (a Bayesian update),
+so the range narrows to the hands that play the way the opponent does. Updates are a few NumPy operations.
+
+The strength of pocket cards is their percentile among all pocket cards possible on the board:
+by the pre-flop equity tables (or a formula without them) on pre-flop and by the hand strength after it.
+"""
+from functools import lru_cache
+from itertools import combinations
+from math import sqrt
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from ai.equity import EquityEstimate, deck_rest, multiway_scores
+from ai.preflop_equity import POCKETS, POCKET_MASKS, STARTING_HAND_OF_POCKET, pocket_index, preflop_table
+from common.config import RANGE_RAISE_STRENGTH, RANGE_CALL_STRENGTH, RANGE_LIKELIHOOD_STEEPNESS, \
+    RANGE_BLUFF_LIKELIHOOD
+from entities.batch_evaluator import evaluate_batch, evaluate_extensions
+from entities.bet import Bet
+from entities.cards import indices_mask
+from entities.evaluator import HandState
+from entities.players import Player
+from entities.pot import Pot
+
+POCKET_CARDS = np.array(POCKETS, dtype=np.int64)
+
+
+def _percentiles(scores: np.ndarray, live: np.ndarray) -> np.ndarray:
+    """Share of the live pocket cards with a smaller score, ties counted as a half, 0 for the blocked ones"""
+    live_scores = np.sort(scores[live])
+    below = np.searchsorted(live_scores, scores, side='left')
+    equal = np.searchsorted(live_scores, scores, side='right') - below
+    return np.where(live, (below + equal / 2) / max(len(live_scores), 1), 0.0)
+
+
+@lru_cache(64)
+def pocket_strengths(board: tuple[int, ...] = ()) -> np.ndarray:
+    """Strength percentile of each of 1326 pocket cards on the board given by cards indices"""
+    live = (POCKET_MASKS & indices_mask(board)) == 0
+    if board:
+        scores = np.zeros(len(POCKETS), dtype=np.int64)
+        scores[live] = evaluate_extensions(board, POCKET_CARDS[live])
+        return _percentiles(scores, live)
+
+    table = preflop_table()
+    if table is not None:
+        return table.percentiles[STARTING_HAND_OF_POCKET, 0]
+    values, suits = POCKET_CARDS >> 2, POCKET_CARDS & 3
+    high, low = values.max(axis=1), values.min(axis=1)
+    scores = 2 * high + low + 13 * (high == low) + 2 * (suits[:, 0] == suits[:, 1]) - np.minimum(high - low, 5)
+    return _percentiles(scores, live)
+
+
+def _logistic(strengths: np.ndarray, threshold: float) -> np.ndarray:
+    return 1 / (1 + np.exp(-RANGE_LIKELIHOOD_STEEPNESS * (strengths - threshold)))
+
+
+def action_likelihoods(action: Bet, strengths: np.ndarray) -> np.ndarray:
+    """
+    Likelihood of the action for pocket cards of each strength.
+    Strong hands raise, medium ones call, weak ones check or fold. Any hand may bluff or slow-play
+    with a small likelihood, so an unexpected action never removes pocket cards from a range
+    """
+    if action in (Bet.RAISE, Bet.ALL_IN):
+        likelihoods = _logistic(strengths, RANGE_RAISE_STRENGTH)
+    elif action == Bet.CALL:
+        likelihoods = _logistic(strengths, RANGE_CALL_STRENGTH)
+    elif action == Bet.CHECK:
+        likelihoods = 1 - _logistic(strengths, RANGE_RAISE_STRENGTH)
+    elif action == Bet.FOLD:
+        likelihoods = 1 - _logistic(strengths, RANGE_CALL_STRENGTH)
+    else:
+        return np.ones_like(strengths)
+    return RANGE_BLUFF_LIKELIHOOD + (1 - RANGE_BLUFF_LIKELIHOOD) * likelihoods
+
+
+class Range:
+    """Weights of an opponent's possible pocket cards"""
+
+    def __init__(self, weights: Optional[np.ndarray] = None):
+        self.weights = np.ones(len(POCKETS)) if weights is None else np.asarray(weights, dtype=np.float64)
+
+    def copy(self) -> 'Range':
+        """An independent copy of the range"""
+        return Range(self.weights.copy())
+
+    def remove_cards(self, indices: Iterable[int]) -> None:
+        """Remove the pocket cards holding any of the known cards"""
+        self.weights[(POCKET_MASKS & indices_mask(indices)) != 0] = 0
+
+    def update(self, action: Bet, board: Sequence[int] = ()) -> None:
+        """Weigh the pocket cards by the likelihood of the observed action on the board"""
+        self.weights *= action_likelihoods(action, pocket_strengths(tuple(sorted(board))))
+        total = self.weights.sum()
+        if total:
+            self.weights /= total
+
+    def probabilities(self, known: Iterable[int] = ()) -> np.ndarray:
+        """Probability of each pocket cards not holding the known cards"""
+        weights = np.where((POCKET_MASKS & indices_mask(known)) == 0, self.weights, 0.0)
+        total = weights.sum()
+        return weights / total if total else weights
+
+    def weight(self, hand: Iterable[int]) -> float:
+        """The weight of the pocket cards given by cards indices"""
+        return float(self.weights[pocket_index(hand)])
+
+    @property
+    def size(self) -> int:
+        """The number of possible pocket cards"""
+        return int(np.count_nonzero(self.weights))
+
+
+def range_equity(hand: Sequence[int], board: Sequence[int], opponent_range: Range) -> float:
+    """
+    Exact equity of the hand against one opponent with the range.
+    Every runout is equally possible with every pocket cards it doesn't block,
+    so the pocket cards are weighted by the range on each runout.
+    On pre-flop the heads-up table is used and the equity is sampled without it
+    """
+    hand, board = tuple(hand), tuple(board)
+    probabilities = opponent_range.probabilities(hand + board)
+    table = preflop_table()
+    if not board and table is not None:
+        return float(probabilities @ table.heads_up_matrix[pocket_index(hand)])
+    if not board:
+        return sampled_range_equity(hand, board, [opponent_range]).equity
+
+    live = np.flatnonzero(probabilities)
+    score = total = 0.0
+    for runout in combinations(deck_rest(hand, board), 5 - len(board)):
+        pockets = live[(POCKET_MASKS[live] & indices_mask(runout)) == 0]
+        weights = probabilities[pockets]
+        full_board = board + runout
+        hero = HandState.of(hand + full_board).strength()
+        opponents = evaluate_extensions(full_board, POCKET_CARDS[pockets])
+        score += float(weights @ ((opponents < hero) + (opponents == hero) / 2))
+        total += float(weights.sum())
+    return score / total if total else 0.0
+
+
+def sampled_range_equity(hand: Sequence[int], board: Sequence[int], opponent_ranges: Sequence[Range],
+                         samples: int = 10_000, rng: Optional[np.random.Generator] = None) -> EquityEstimate:
+    """
+    Estimate the equity of the hand against the opponents with the ranges.
+    Pocket cards of the opponents are sampled from their ranges, the samples where opponents share a card are
+    dropped, then the runout is sampled from the rest of the deck
+    """
+    rng = rng or np.random.default_rng()
+    hand, board = tuple(hand), tuple(board)
+    pockets = np.column_stack([rng.choice(len(POCKETS), samples, p=opponent_range.probabilities(hand + board))
+                               for opponent_range in opponent_ranges])
+    masks = np.bitwise_or.reduce(POCKET_MASKS[pockets], axis=1)
+    pockets = pockets[np.bitwise_count(masks) == 2 * len(opponent_ranges)]
+    size = len(pockets)
+
+    cards_to_open = 5 - len(board)
+    keys = rng.random((size, 52))
+    keys[:, list(hand + board)] = 2
+    rows = np.arange(size)[:, None]
+    keys[rows, POCKET_CARDS[pockets].reshape(size, -1)] = 2
+    runouts = keys.argpartition(cards_to_open - 1, axis=1)[:, :cards_to_open] if cards_to_open else keys[:, :0]
+    boards = np.hstack((np.broadcast_to(np.asarray(board, dtype=np.int64), (size, len(board))), runouts))
+
+    hero = evaluate_extensions(hand, boards)
+    opponents = np.column_stack([evaluate_batch(np.hstack((boards, POCKET_CARDS[pockets[:, i]])))
+                                 for i in range(len(opponent_ranges))])
+    scores = multiway_scores(hero, opponents)
+    equity = float(scores.mean()) if size else 0.0
+    standard_error = sqrt(float(scores.var()) / size) if size else 0.0
+    return EquityEstimate(equity, standard_error, size)
+
+
+class RoundRanges:
+    """Ranges of the players of a round, narrowed by its board and the players' moves"""
+
+    def __init__(self):
+        self.ranges: dict[Player, Range] = {}
+        self.board: tuple[int, ...] = ()
+
+    def range_of(self, player: Player) -> Range:
+        """The range of the player, all pocket cards not blocked by the board before the player's first move"""
+        if player not in self.ranges:
+            self.ranges[player] = Range()
+            self.ranges[player].remove_cards(self.board)
+        return self.ranges[player]
+
+    def new_stage(self, board: tuple[int, ...]) -> None:
+        """Remove the board cards from the ranges"""
+        self.board = board
+        for player_range in self.ranges.values():
+            player_range.remove_cards(board)
+
+    def player_moved(self, player: Player) -> None:
+        """Update the range of the player by the action"""
+        self.range_of(player).update(player.decision.action, self.board)
+
+
+class RangeTracker:
+    """
+    Ranges of the players of the rounds being played, each round is followed separately.
+    A round is found by its pot on a new stage and by the player on a move, as a player plays one round at a time
+    """
+
+    def __init__(self):
+        self.rounds: dict[Pot, RoundRanges] = {}
+        self.players: dict[Player, RoundRanges] = {}
+
+    def round_ranges(self, pot: Pot) -> Optional[RoundRanges]:
+        """The ranges of the round with the pot, None if the round is not followed"""
+        return self.rounds.get(pot)
+
+    def new_stage(self, board, pot: Pot) -> None:
+        """Start following the round on pre-flop, or on the first stage seen, and remove the board cards after it"""
+        indices = tuple(card.index for card in board)
+        if not indices or pot not in self.rounds:
+            self.rounds[pot] = RoundRanges()
+            for player in pot.players:
+                self.players[player] = self.rounds[pot]
+        self.rounds[pot].new_stage(indices)
+
+    def player_moved(self, player: Player) -> None:
+        """Update the range of the player in the round the player plays"""
+        round_ranges = self.players.get(player)
+        if round_ranges is not None:
+            round_ranges.player_moved(player)
+
+    def round_end(self, game_round) -> None:
+        """Stop following the round"""
+        round_ranges = self.rounds.pop(game_round.pot, None)
+        for player in game_round.players:
+            if self.players.get(player) is round_ranges:
+                del self.players[player]
@@ -0,0 +1,140 @@
+"""
+Analysis of the board shared by all AI players on a stage.
+The board-only work is done once per stage, when the first player needs it: the completions of the board
+with an opponent's pocket cards and the numbers of their combinations. Each player then only removes
+the completions holding its own cards by subtracting the precomputed counts.
+
+The context is created on the NEW_STAGE event and dropped by the next stage or the ROUND_END event.
+Contexts are kept by their boards, so every table of a process gets its own one.
+"""
+from functools import cached_property, lru_cache
+from itertools import chain, combinations
+from math import comb
+from typing import Sequence
+
+import numpy as np
+
+from ai.canonical import canonicalize
+from ai.draws import categories
+from ai.equity import deck_rest
+from entities.batch_evaluator import evaluate_extensions
+from entities.combinations import Combination, COMBINATIONS, COMBINATIONS_BY_PRIORITY
+
+
+@lru_cache(16)
+def combination_indices(size: int, number: int) -> np.ndarray:
+    """All combinations of the number of positions out of the size as a (C(size, number), number) array"""
+    count = comb(size, number)
+    indices = np.fromiter(chain.from_iterable(combinations(range(size), number)), dtype=np.int64,
+                          count=count * number)
+    return indices.reshape(count, number)
+
+
+def category_counts(strengths: np.ndarray) -> np.ndarray:
+    """The number of hands of each combination priority"""
+    return np.bincount(categories(strengths), minlength=len(COMBINATIONS_BY_PRIORITY))
+
+
+def update_smallest(chances: dict[Combination: float]) -> None:
+    """find the smallest combination with >0 chance and set its chances to 1"""
+    for cmb in chances:
+        smaller_cmbs = COMBINATIONS[COMBINATIONS.index(cmb) + 1:]
+        if len(smaller_cmbs) == 0:
+            return
+
+        if max(chances[smaller_cmb] for smaller_cmb in smaller_cmbs) == 0 and chances[cmb] > 0:
+            chances[cmb] = 1.0
+            break
+
+
+def relative_chances(counts: np.ndarray) -> dict[Combination, float]:
+    """Chances of each combination by the numbers of hands making them"""
+    total = int(counts.sum())
+    chances = {cmb: int(counts[cmb.priority]) / total for cmb in COMBINATIONS}
+    update_smallest(chances)
+    return chances
+
+
+@lru_cache(2048)
+def opponent_category_counts(board: tuple[int, ...]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The numbers of the opponent's completions of the board making each combination:
+    of all of them and of the ones holding each card
+    """
+    completions = StageContext(board).opponent_completions
+    size = len(COMBINATIONS_BY_PRIORITY)
+    priorities = categories(evaluate_extensions(board, completions))
+    by_card = np.zeros(52 * size, dtype=np.int64)
+    for column in completions.T:
+        by_card += np.bincount(column * size + priorities, minlength=by_card.size)
+    return np.bincount(priorities, minlength=size), by_card.reshape(52, size)
+
+
+class StageContext:
+    """Board-only analysis of a stage given by the board cards indices"""
+
+    def __init__(self, board: Sequence[int]):
+        self.board = tuple(board)
+        self.deck_rest = np.array(deck_rest(self.board), dtype=np.int64)
+
+    def _completions(self, number: int) -> np.ndarray:
+        return self.deck_rest[combination_indices(len(self.deck_rest), number)]
+
+    @property
+    def opponent_completions(self) -> np.ndarray:
+        """All sets of an opponent's pocket cards with a runout"""
+        return self._completions(7 - len(self.board))
+
+    @cached_property
+    def opponent_category_counts(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The numbers of the opponent's completions making each combination: of all of them and of the ones holding
+        each card. They are counted on the canonical board and the cards are renamed back to the board's suits
+        """
+        situation = canonicalize((), self.board)
+        total, by_card = opponent_category_counts(situation.board)
+        cards = np.arange(52)
+        return total, by_card[cards & ~3 | np.array(situation.suit_map)[cards & 3]]
+
+    def opponent_combination_counts(self, hand: Sequence[int]) -> np.ndarray:
+        """
+        The number of the opponent's completions not holding our pocket cards making each combination.
+        The ones holding them are subtracted by the inclusion–exclusion principle,
+        only the few completions holding both pocket cards are evaluated
+        """
+        hand = tuple(hand)
+        total, by_card = self.opponent_category_counts
+        rest = self.deck_rest[(self.deck_rest != hand[0]) & (self.deck_rest != hand[1])]
+        both = rest[combination_indices(len(rest), 5 - len(self.board))]
+        return total - by_card[hand[0]] - by_card[hand[1]] + category_counts(
+            evaluate_extensions(self.board + hand, both))
+
+    def opponent_combination_chances(self, hand: Sequence[int]) -> dict[Combination, float]:
+        """Chances for an opponent to get each combination knowing our pocket cards"""
+        return relative_chances(self.opponent_combination_counts(hand))
+
+
+class StageContexts:
+    """The contexts of the current stages by their boards, a context is made once and shared by all players"""
+
+    def __init__(self):
+        self.contexts: dict[tuple[int, ...], StageContext] = {}
+
+    def context(self, board: Sequence[int]) -> StageContext:
+        """The context of the board, made if there is none yet"""
+        key = tuple(sorted(board))
+        if key not in self.contexts:
+            self.contexts[key] = StageContext(board)
+        return self.contexts[key]
+
+    def new_stage(self, board, *args) -> None:
+        """Make the context of the new stage in place of the previous stage, there is none on pre-flop"""
+        indices = tuple(card.index for card in board)
+        if not indices:
+            return
+        self.contexts.pop(tuple(sorted(indices[:-1])), None)
+        self.context(indices)
+
+    def round_end(self, game_round) -> None:
+        """Drop the context of the last stage of the round"""
+        self.contexts.pop(tuple(sorted(card.index for card in game_round.board)), None)
@@ -1,7 +1,47 @@
+from pathlib import Path
+
 # ai
 WEIGHT_QUOTIENT = 1.5
+# time budget of the Monte Carlo equity of a stage decision in seconds by the number of board cards,
+# exact enumeration for the rest
+EQUITY_TIME_BUDGET = {3: 0.05}
+EQUITY_TARGET_ERROR = 0.005
+EQUITY_MAX_SAMPLES = 100_000
+EQUITY_RANGE_SAMPLES = 10_000
+# number of random runouts the hand potential is counted on by the number of board cards, all runouts for the rest
+HAND_POTENTIAL_MAX_RUNOUTS = {3: 200}
+# positive potential from which a hand behind now with an uncertain equity is played as a draw on the flop and the turn
+HAND_POTENTIAL_DRAW = 0.3
+# opponents' ranges: strength percentiles around which hands start to raise and to call,
+# how sharp the switch is and the likelihood of any action for any hand (bluffs and slow-plays)
+RANGE_RAISE_STRENGTH = 0.75
+RANGE_CALL_STRENGTH = 0.4
+RANGE_LIKELIHOOD_STEEPNESS = 12
+RANGE_BLUFF_LIKELIHOOD = 0.05
+# follow the opponents' ranges in all games and decide by the equity against them, slower decisions
+AI_OPPONENT_RANGES = False
+# persistent cache of flop and turn equities, None disables it
+EQUITY_CACHE_PATH = Path(__file__).parent.parent / 'data' / 'equity_cache.sqlite'
+EQUITY_CACHE_MAX_ENTRIES = 200_000
+# number of the last moves and showdowns kept for each player
+HISTORY_SIZE = 1000
+# in-memory cache of the AI calculations: estimated size bound in bytes and the number of rounds the entries live
+DECISION_CACHE_MAX_BYTES = 32 * 2 ** 20
+DECISION_CACHE_TTL_ROUNDS = 100
+
+# random source of the games: 'secure' for real money, 'fast' for a seedable generator,
+# the seed of the fast one, None for a seed drawn from the system entropy
+RNG_SOURCE = 'fast'
+RNG_SEED = None
 
 # quick game settings
 DEFAULT_PLAYERS_NUM = 3
 DEFAULT_BUY_IN = 500
 DEFAULT_BLIND = 10
+
+# hand evaluator tables file, generated on the first use if missing
+EVALUATOR_TABLES_PATH = Path(__file__).parent.parent / 'data' / 'evaluator_tables.bin'
+# pre-flop equity tables file, generated by `python -m ai.preflop_equity`, pre-flop AI uses a formula without it
+PREFLOP_EQUITY_PATH = Path(__file__).parent.parent / 'data' / 'preflop_equity.bin'
+# texture features of all canonical flops, generated on the first use if missing
+BOARD_TEXTURES_PATH = Path(__file__).parent.parent / 'data' / 'board_textures.bin'
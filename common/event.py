@@ -1,6 +1,7 @@
 from collections import defaultdict
+from contextlib import contextmanager
 from enum import Enum, auto
-from typing import Callable
+from typing import Callable, Iterable, Iterator
 
 
 class EventType(Enum):
@@ -28,3 +29,17 @@ def post_event(event_type: EventType, *args, **kwargs):
         return
     for fn in subscribers[event_type]:
         fn(*args, **kwargs)
+
+
+@contextmanager
+def isolated_subscribers(subscriptions: Iterable[tuple[EventType, Callable]]) -> Iterator[None]:
+    """Replace all the subscribers with the given ones inside the block and restore them after it"""
+    saved = {event_type: fns.copy() for event_type, fns in subscribers.items()}
+    subscribers.clear()
+    for event_type, fn in subscriptions:
+        subscribe(event_type, fn)
+    try:
+        yield
+    finally:
+        subscribers.clear()
+        subscribers.update(saved)
@@ -0,0 +1,57 @@
+"""
+Sources of random numbers for dealing and for the AI decisions.
+- secure: the operating system's cryptographically secure source, for games played for real money.
+  It can't be seeded and makes a system call per draw
+- fast: a seedable pseudo-random generator (Mersenne Twister) for simulations, tests and benchmarks.
+  Each table or worker gets an independent stream derived from the seed and the number of the stream,
+  so the same seed replays the same games
+
+The source and the seed of the process are selected by RNG_SOURCE and RNG_SEED in the config.
+"""
+from random import Random
+from secrets import SystemRandom
+from typing import Optional
+
+import numpy as np
+
+from common.config import RNG_SOURCE, RNG_SEED
+
+SECURE = 'secure'
+FAST = 'fast'
+SOURCES = (SECURE, FAST)
+
+
+def stream_seed(seed: Optional[int], stream: int = 0) -> int:
+    """The seed of an independent stream, drawn from the system entropy if the seed is None"""
+    return int.from_bytes(np.random.SeedSequence(seed, spawn_key=(stream,)).generate_state(4).tobytes(), 'little')
+
+
+def make_rng(source: str = RNG_SOURCE, seed: Optional[int] = RNG_SEED, stream: int = 0) -> Random:
+    """A new generator of the source, seeded for the stream if it's the fast one"""
+    if source == SECURE:
+        return SystemRandom()
+    if source == FAST:
+        return Random(stream_seed(seed, stream))
+    raise ValueError(f'Unknown random source {source!r}, must be one of {SOURCES}')
+
+
+def make_numpy_rng(seed: Optional[int] = RNG_SEED, stream: int = 0) -> np.random.Generator:
+    """A NumPy generator of the stream for vectorized sampling, e.g. Monte Carlo equity"""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(stream,)))
+
+
+_process_rng: Optional[Random] = None
+
+
+def game_rng() -> Random:
+    """The generator shared by the games of the process that weren't given their own one"""
+    global _process_rng
+    if _process_rng is None:
+        _process_rng = make_rng()
+    return _process_rng
+
+
+def seed_game_rng(seed: Optional[int], source: str = FAST) -> None:
+    """Replace the shared generator of the process, e.g. to make a test or a benchmark reproducible"""
+    global _process_rng
+    _process_rng = make_rng(source, seed)
@@ -0,0 +1,57 @@
+"""
+Versioned binary tables files of the hand evaluator and the pre-flop equity tables.
+A file starts with a header padded to 64 bytes: the magic bytes of the kind of the tables, the version of their
+format, two numbers describing the tables and the sha256 checksum of the data, then the data follows.
+The file is replaced atomically, so readers never see a partial one, and is memory-mapped for reading,
+so processes started later share the same pages of the tables.
+"""
+import mmap
+import os
+import struct
+from hashlib import sha256
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Iterable
+
+HEADER = struct.Struct('<4sIII32s')
+HEADER_SIZE = 64
+
+
+def save_tables_file(path: Path, magic: bytes, version: int, numbers: tuple[int, int], chunks: Iterable) -> None:
+    """Write the header and the chunks of the data, any objects supporting the buffer protocol"""
+    chunks = list(chunks)
+    digest = sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    header = HEADER.pack(magic, version, *numbers, digest.digest())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with NamedTemporaryFile(dir=path.parent, prefix=path.name, delete=False) as file:
+        file.write(header.ljust(HEADER_SIZE, b'\0'))
+        for chunk in chunks:
+            file.write(chunk)
+    os.chmod(file.name, 0o644)
+    os.replace(file.name, path)
+
+
+def load_tables_file(path: Path, magic: bytes, version: int,
+                     error: type[BaseException]) -> tuple[tuple[int, int], memoryview]:
+    """
+    Memory-map the file and check its kind, version and checksum, the error is raised if any of them is wrong.
+    Gives the numbers describing the tables and the mapped data, its size is checked by the caller
+    """
+    try:
+        with open(path, 'rb') as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        raise error(f"Can not map {path}: {e}") from e
+
+    view = memoryview(mapped)
+    if len(view) < HEADER_SIZE:
+        raise error(f"{path} is too short")
+    file_magic, file_version, first, second, checksum = HEADER.unpack_from(view)
+    if (file_magic, file_version) != (magic, version):
+        raise error(f"{path} is made by another version of the tables")
+    data = view[HEADER_SIZE:]
+    if sha256(data).digest() != checksum:
+        raise error(f"{path} is corrupted")
+    return (first, second), data
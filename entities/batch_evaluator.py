@@ -0,0 +1,96 @@
+"""
+Vectorized evaluation of many hands at once with NumPy.
+Uses the same lookup tables as entities.evaluator, so the strengths are the same as evaluate_indices gives.
+Hands are given either as an (N, k) array of card indices with k from 5 to 7,
+or as an array of N bitmasks of 5 to 7 cards where the bit 4 * value_index + suit_index stands for a card.
+Memory use is a few times the size of the input, so huge studies should pass hands in chunks.
+"""
+from collections.abc import Sequence
+from functools import cache
+
+import numpy as np
+
+from entities import evaluator
+
+CARD_KEYS = np.array(evaluator.CARD_KEYS, dtype=np.int64)
+VALUE_WEIGHTS = np.array(evaluator.VALUE_WEIGHTS, dtype=np.int64)
+FLUSH_CHECK_BITS = np.array([evaluator.FLUSH_CHECK_MASK & 0xF << 4 * suit for suit in range(4)], dtype=np.int64)
+# number of cards and the suits counters of the 4 cards of one value given as a 4-bit nibble of a bitmask
+NIBBLE_COUNTS = np.array([nibble.bit_count() for nibble in range(16)], dtype=np.int64)
+NIBBLE_SUITS = np.array([sum(1 << 4 * suit for suit in range(4) if nibble >> suit & 1) for nibble in range(16)],
+                        dtype=np.int64)
+
+
+@cache
+def tables() -> tuple[np.ndarray, np.ndarray]:
+    """The evaluator tables as NumPy arrays sharing memory with the original ones"""
+    values_table, flushes_table = evaluator.tables()
+    return np.frombuffer(values_table, dtype=np.uint16), np.frombuffer(flushes_table, dtype=np.uint16)
+
+
+def _flush_suits(keys: np.ndarray) -> np.ndarray:
+    """Suit index of the flush for each key or -1 if there is no flush"""
+    flush_bits = (keys & evaluator.SUITS_KEY_MASK) + evaluator.FLUSH_CHECK_ADDEND & evaluator.FLUSH_CHECK_MASK
+    return np.searchsorted(FLUSH_CHECK_BITS, flush_bits) - (flush_bits == 0)
+
+
+def evaluate_batch(hands: np.ndarray) -> np.ndarray:
+    """Strengths of N hands given as an (N, k) array of card indices, 5 <= k <= 7"""
+    hands = np.asarray(hands, dtype=np.int64)
+    values_table, flushes_table = tables()
+    keys = CARD_KEYS[hands].sum(axis=1)
+    strengths = values_table[keys >> evaluator.VALUES_KEY_SHIFT]
+
+    suits = _flush_suits(keys)
+    flushed = np.flatnonzero(suits >= 0)
+    if flushed.size:
+        flush_hands = hands[flushed]
+        suited = (flush_hands & 3) == suits[flushed, None]
+        values_masks = np.bitwise_or.reduce(np.where(suited, 1 << (flush_hands >> 2), 0), axis=1)
+        strengths[flushed] = flushes_table[values_masks]
+    return strengths
+
+
+def evaluate_extensions(prefix: Sequence[int], extensions: np.ndarray) -> np.ndarray:
+    """
+    Strengths of the common prefix cards (e.g. the board) extended with each row of an (N, k) array of card indices.
+    The prefix key is summed once, only the hands with a possible flush are evaluated in full
+    """
+    extensions = np.asarray(extensions, dtype=np.int64)
+    values_table, _ = tables()
+    keys = sum(evaluator.CARD_KEYS[index] for index in prefix) + CARD_KEYS[extensions].sum(axis=1)
+    strengths = values_table[keys >> evaluator.VALUES_KEY_SHIFT]
+    flushed = np.flatnonzero(_flush_suits(keys) >= 0)
+    if flushed.size:
+        prefixes = np.broadcast_to(np.asarray(prefix, dtype=np.int64), (flushed.size, len(prefix)))
+        strengths[flushed] = evaluate_batch(np.hstack((prefixes, extensions[flushed])))
+    return strengths
+
+
+def evaluate_masks(masks: np.ndarray) -> np.ndarray:
+    """Strengths of N hands given as an array of cards bitmasks of 5 to 7 cards each"""
+    masks = np.asarray(masks, dtype=np.uint64).astype(np.int64)
+    values_table, flushes_table = tables()
+    values_keys = np.zeros(masks.shape, dtype=np.int64)
+    suits_keys = np.zeros(masks.shape, dtype=np.int64)
+    for value, weight in enumerate(VALUE_WEIGHTS):
+        nibbles = masks >> 4 * value & 0xF
+        values_keys += NIBBLE_COUNTS[nibbles] * weight
+        suits_keys += NIBBLE_SUITS[nibbles]
+    strengths = values_table[values_keys]
+
+    suits = _flush_suits(suits_keys)
+    flushed = np.flatnonzero(suits >= 0)
+    if flushed.size:
+        flush_masks = masks[flushed] >> suits[flushed]
+        values_masks = np.zeros(flushed.shape, dtype=np.int64)
+        for value in range(len(VALUE_WEIGHTS)):
+            values_masks |= (flush_masks >> 4 * value & 1) << value
+        strengths[flushed] = flushes_table[values_masks]
+    return strengths
+
+
+def indices_to_masks(hands: np.ndarray) -> np.ndarray:
+    """Convert an (N, k) array of card indices to N cards bitmasks"""
+    hands = np.asarray(hands, dtype=np.int64)
+    return np.bitwise_or.reduce(np.left_shift(1, hands), axis=1).astype(np.uint64)
@@ -1,5 +1,8 @@
 from dataclasses import dataclass, field
-from random import shuffle
+from random import Random
+from typing import Iterable, Optional
+
+from common.rng import game_rng
 
 
 @dataclass(repr=False)
@@ -65,16 +68,32 @@ VALUES = (
 ZERO_ACE: Value = Value(1, 'Ace', 'A')
 
 
+_SUIT_INDEX = {suit.short_name: i for i, suit in enumerate(SUITS)}
+
+
+def card_index(suit: Suit, value: Value) -> int:
+    """
+    The compact integer code of a card: 4 * value_index + suit_index.
+    Value index is 0 for Two and 12 for Ace, the zero ace is encoded as an ace.
+    """
+    return (value.order - 2) % 13 * 4 + _SUIT_INDEX[suit.short_name]
+
+
 @dataclass(order=True, eq=True)
 class Card:
     """
     The card
     Cards are comparable by value and suit.
     Cards are equal if their values are equal
+    Each card also has an integer index from 0 to 51 used by the engine internally
     """
 
     suit: Suit = field(hash=True, compare=False)
     value: Value
+    index: int = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self):
+        self.index = card_index(self.suit, self.value)
 
     def __str__(self):
         return self.value.short_name + self.suit.short_name
@@ -83,41 +102,140 @@ class Card:
         return self.__str__()
 
     def __hash__(self):
-        return hash(self.suit) + hash(self.value)
+        return self.index
+
+    @property
+    def mask(self) -> int:
+        """The bit of the card in a cards bitmask"""
+        return 1 << self.index
+
+
+# 52 interned cards ordered by their indices
+CARDS: tuple[Card, ...] = tuple(Card(suit, value) for value in VALUES for suit in SUITS)
+FULL_DECK_MASK = (1 << len(CARDS)) - 1
+
+
+def indices_mask(indices: Iterable[int]) -> int:
+    """Pack the cards given by their indices into a bitmask"""
+    mask = 0
+    for index in indices:
+        mask |= 1 << index
+    return mask
+
+
+def cards_mask(cards: Iterable[Card]) -> int:
+    """Pack the cards into a bitmask"""
+    return indices_mask(card.index for card in cards)
+
+
+def mask_cards(mask: int) -> tuple[Card, ...]:
+    """Unpack a bitmask into the interned cards"""
+    return tuple(card for card in CARDS if mask >> card.index & 1)
+
+
+def remaining_cards(known_cards: Iterable[Card]) -> tuple[Card, ...]:
+    """The cards of a full deck except the known ones"""
+    return mask_cards(FULL_DECK_MASK & ~cards_mask(known_cards))
 
 
 class Deck:
     """
     The Deck.
-    Contains 52 cards and mixed in the beginning
-    Cards are removed from the deck when dealt or hidden
+    Contains 52 cards drawn uniformly on demand by a partial Fisher–Yates shuffle of the cards indices:
+    a random card of the ones left is swapped to the border of the dealt ones and the border moves on.
+    Only the dealt cards are shuffled, and the deck is mixed again by moving the border back,
+    as any order of the cards left is as good as a fresh one for the random draws.
+    A snapshot finishes the shuffle of the cards left, so the deck restored from it deals the same cards.
+    Cards are removed from the deck when dealt, hidden or known to be out of it
     """
 
-    __cards: tuple[Card] = tuple(Card(s, v) for s in SUITS for v in VALUES)
-
-    def __init__(self):
-        self._order = []
-        self.mix()
+    def __init__(self, rng: Optional[Random] = None):
+        self.rng = rng or game_rng()
+        self._cards: list[int] = list(range(len(CARDS)))  # the dealt cards first, then the ones left
+        self._positions: list[int] = list(range(len(CARDS)))  # position of each card in the cards
+        self._dealt = 0
+        self._shuffled = False  # the cards left are in a random order and are dealt in it
+        self._snapshot: Optional[tuple[int, ...]] = None
 
     def mix(self) -> None:
-        """Shuffle the deck"""
-        self._order = list(self.__cards)
-        shuffle(self._order)
+        """Return all the cards to the deck, in time of the number of the dealt cards"""
+        self._dealt = 0
+        self._shuffled = False
+        self._snapshot = None
+
+    def _random_offset(self, left: int) -> int:
+        """A uniform offset below the number, drawn by rejection of random bits"""
+        bits = left.bit_length()
+        getrandbits = self.rng.getrandbits
+        while (offset := getrandbits(bits)) >= left:
+            continue
+        return offset
+
+    def _swap(self, position: int, other: int) -> None:
+        cards, positions = self._cards, self._positions
+        index, other_index = cards[position], cards[other]
+        cards[position], cards[other] = other_index, index
+        positions[index], positions[other_index] = other, position
+
+    def _take(self, index: int) -> None:
+        """Swap the card to the border of the dealt cards and move the border past it"""
+        self._swap(self._positions[index], self._dealt)
+        self._dealt += 1
+        self._snapshot = None
+
+    def _deal(self) -> int:
+        """Take a random card of the ones left, or the next one if they are already shuffled"""
+        dealt = self._dealt
+        if not self._shuffled:
+            self._swap(dealt + self._random_offset(len(CARDS) - dealt), dealt)
+        self._dealt = dealt + 1
+        self._snapshot = None
+        return self._cards[dealt]
 
     def draw_one(self) -> Card:
         """Deal a card to a player"""
-        return self._order.pop()
+        return CARDS[self._deal()]
 
     def hide_one(self) -> None:
         """Hide a card from the deck without giving it to anyone"""
-        self._order.pop()
+        self._deal()
+
+    def remove(self, cards: Iterable[Card]) -> None:
+        """Take the known cards out of the deck, e.g. the cards of a situation given to the AI"""
+        for card in cards:
+            if self._positions[card.index] < self._dealt:
+                raise ValueError(f'{card} is not in the deck')
+            self._take(card.index)
+
+    def snapshot(self) -> tuple[int, ...]:
+        """
+        The order in which the cards left will be dealt, the same tuple is shared by the snapshots until
+        a card is dealt. The first snapshot after the mix shuffles the cards left in time of their number
+        """
+        if self._snapshot is None:
+            if not self._shuffled:
+                for position in range(self._dealt, len(CARDS) - 1):
+                    self._swap(position + self._random_offset(len(CARDS) - position), position)
+                self._shuffled = True
+            self._snapshot = tuple(self._cards[self._dealt:])
+        return self._snapshot
+
+    def restore(self, order: tuple[int, ...]) -> None:
+        """Return the deck to the order of the snapshot"""
+        left = cards_mask(CARDS[index] for index in order)
+        self._cards = [index for index in range(len(CARDS)) if not left >> index & 1] + list(order)
+        for position, index in enumerate(self._cards):
+            self._positions[index] = position
+        self._dealt = len(CARDS) - len(order)
+        self._shuffled = True
+        self._snapshot = order
 
     @property
     def cards_left(self) -> int:
         """represents how many cards are left in the deck"""
-        return len(self._order)
+        return len(CARDS) - self._dealt
 
-    @classmethod
-    def all_cards(cls) -> set[Card]:
+    @staticmethod
+    def all_cards() -> set[Card]:
         """Return all possible cards in a deck"""
-        return set(cls.__cards)
+        return set(CARDS)
@@ -1,6 +1,7 @@
 from functools import lru_cache
-from typing import Iterable
+from typing import Iterable, Sequence
 
+from entities import evaluator
 from entities.cards import Suit, SUITS, Card, Value, VALUES, ZERO_ACE
 
 
@@ -43,10 +44,36 @@ class Combination:
 @lru_cache(maxsize=128)
 def duplicates(cards: Iterable[Card]) -> dict:
     """find how many duplicates are present in the known cards"""
-    _duplicates = {}
-    for value in VALUES:
-        _duplicates[value] = len([card for card in cards if card.value == value])
-    return _duplicates
+    return dict(zip(VALUES, _value_counts(cards)))
+
+
+def _value_counts(cards: Iterable[Card]) -> list[int]:
+    """Number of cards of each value indexed by the value index"""
+    counts = [0] * len(VALUES)
+    for card in cards:
+        counts[card.index >> 2] += 1
+    return counts
+
+
+def values_mask(indices: Iterable[int]) -> int:
+    """
+    Bitmask of the values of the cards given by their indices for straights search.
+    Bit 0 is the zero ace, bits 1 to 13 are the values from Two to Ace
+    """
+    mask = 0
+    for index in indices:
+        mask |= 2 << (index >> 2)
+    return mask | (mask >> 13 & 1)
+
+
+def _value_by_bit(bit: int) -> Value:
+    """Value of a bit of the straights bitmask"""
+    return VALUES[bit - 1] if bit else ZERO_ACE
+
+
+def _sorted_by_value(cards: Iterable[Card]) -> list[Card]:
+    """Cards sorted by value descending"""
+    return sorted(cards, key=lambda c: c.index >> 2, reverse=True)
 
 
 def _card_ranges() -> list[tuple[Value]]:
@@ -56,26 +83,22 @@ def _card_ranges() -> list[tuple[Value]]:
 
 
 CARD_RANGES = _card_ranges()
+_CARD_RANGES_MASKS = [0b11111 << i for i in range(len(CARD_RANGES))]
 
 
 def cards_in_ranges(cards: [list[Card], tuple[Card]]) -> dict[Value: int]:
     """Shows how many uniq cards values are present in each possible range"""
-    card_values_set = {c.value for c in cards}
-    # duplicate aces for a-to-5 straights
-    if Value(14, 'Ace', 'A') in card_values_set:
-        card_values_set.add(ZERO_ACE)
-
-    # count uniq values of given cards for each straight range
-    _cards_in_ranges = {}
-    for _range in CARD_RANGES:
-        _cards_in_ranges[_range] = len(set(_range).intersection(card_values_set))
-
-    return _cards_in_ranges
+    mask = values_mask(card.index for card in cards)
+    return {_range: (mask & range_mask).bit_count()
+            for _range, range_mask in zip(CARD_RANGES, _CARD_RANGES_MASKS)}
 
 
 def cards_by_suit(cards: [list[Card], tuple[Card]]) -> dict[Suit: int]:
     """Shows how many cards are present of each suit"""
-    return {suit: len([card for card in cards if card.suit == suit]) for suit in SUITS}
+    counts = [0] * len(SUITS)
+    for card in cards:
+        counts[card.index & 3] += 1
+    return dict(zip(SUITS, counts))
 
 
 def high_card(cards: Iterable[Card]) -> [None, tuple[Card, list[Card]]]:
@@ -86,7 +109,7 @@ def high_card(cards: Iterable[Card]) -> [None, tuple[Card, list[Card]]]:
     """
     if not cards:
         return None
-    _cards = sorted(cards, key=lambda c: c.value, reverse=True)
+    _cards = _sorted_by_value(cards)
     return _cards[0], tuple(_cards[1:min(5, len(_cards))])
 
 
@@ -95,15 +118,11 @@ def pair(cards: Iterable[Card]) -> [None, tuple[Value, list[Card]]]:
     Checks if there is exactly one pair in the hand
     Returns the value of the pair and top 3 cards by value
     """
-    values = {card.value for card in cards}
-    pair_values = []
-    for value in values:
-        if len([card for card in cards if card.value == value]) == 2:
-            pair_values.append(value)
+    counts = _value_counts(cards)
+    pair_values = [i for i, count in enumerate(counts) if count == 2]
     if len(pair_values) == 1:
-        return pair_values[0], tuple(sorted([card for card in cards if card.value != pair_values[0]],
-                                            key=lambda c: c.value,
-                                            reverse=True)[:3])
+        return VALUES[pair_values[0]], tuple([card for card in _sorted_by_value(cards)
+                                              if card.index >> 2 != pair_values[0]][:3])
 
     return None
 
@@ -115,18 +134,11 @@ def two_pairs(cards: list[Card]) -> [None, tuple[Value, Value, Card]]:
     """
     if len(cards) < 4:
         return None
-    values = {card.value for card in cards}
-    pair_values: list[Value] = []
-    for value in values:
-        if len([card for card in cards if card.value == value]) == 2:
-            pair_values.append(value)
-    pair_values.sort(reverse=True)
+    counts = _value_counts(cards)
+    pair_values = [i for i in range(len(counts) - 1, -1, -1) if counts[i] == 2]
     if len(pair_values) >= 2:
-        try:
-            return pair_values[0], pair_values[1], max((card for card in cards if card.value not in pair_values[:2]),
-                                                       key=lambda c: c.value)
-        except ValueError:
-            return pair_values[0], pair_values[1], None
+        rest = [card for card in _sorted_by_value(cards) if card.index >> 2 not in pair_values[:2]]
+        return VALUES[pair_values[0]], VALUES[pair_values[1]], rest[0] if rest else None
 
     return None
 
@@ -138,44 +150,22 @@ def three_of_a_kind(cards: list[Card]) -> [None, tuple[Value, list[Card]]]:
     """
     if len(cards) < 3:
         return None
-    values = {card.value for card in cards}
-    set_values = []
-    for value in values:
-        if len([card for card in cards if card.value == value]) == 3:
-            set_values.append(value)
+    counts = _value_counts(cards)
+    set_values = [i for i, count in enumerate(counts) if count == 3]
     if len(set_values) == 1:
-        return set_values[0], tuple(sorted([card for card in cards if card.value != set_values[0]],
-                                           key=lambda c: c.value,
-                                           reverse=True)[:2])
+        return VALUES[set_values[0]], tuple([card for card in _sorted_by_value(cards)
+                                             if card.index >> 2 != set_values[0]][:2])
     return None
 
 
-def _in_a_row(values: list[Value]) -> bool:
-    """Technical function to help with straight"""
-    return all(v.order + 1 == values[i + 1].order for i, v in enumerate(values[:-1]))
-
-
 def straight(cards: list[Card]) -> [None, list[Value]]:
     """defines if player's hand is straight"""
     if len(cards) < 5:
         return None
-    _cards = list(cards)
-    # duplicate aces for a-to-5 straights
-    for ace in (card for card in cards if card.value == Value(14, 'Ace', 'A')):
-        _cards.append(Card(ace.suit, ZERO_ACE))
-    # sort cards by values
-    card_values = {c.value for c in _cards}
-    if len(card_values) < 5:
+    top = evaluator.top_straight_bit(values_mask(card.index for card in cards))
+    if top is None:
         return None
-
-    max_range = len(card_values) - 4
-    sorted_cards_values = sorted(card_values)
-    # try to find a sequence of sorted cards
-    for i in list(range(0, max_range))[::-1]:
-        current_range = sorted_cards_values[0 + i: 5 + i]
-        if _in_a_row(current_range):
-            return tuple(current_range[::-1])
-    return None
+    return tuple(_value_by_bit(bit) for bit in range(top, top - 5, -1))
 
 
 def flush(cards: list[Card]) -> [None, tuple[Card]]:
@@ -185,10 +175,10 @@ def flush(cards: list[Card]) -> [None, tuple[Card]]:
     """
     if len(cards) < 5:
         return None
-    for suit in SUITS:
-        flush_cards = [card for card in cards if card.suit == suit]
+    for suit_index in range(len(SUITS)):
+        flush_cards = [card for card in cards if card.index & 3 == suit_index]
         if len(flush_cards) >= 5:
-            return tuple(sorted(flush_cards, key=lambda c: c.value, reverse=True)[:5])
+            return tuple(_sorted_by_value(flush_cards)[:5])
     return None
 
 
@@ -199,22 +189,15 @@ def full_house(cards: list[Card]) -> [None, tuple[Value, Value]]:
     """
     if len(cards) < 5:
         return None
-    values = {card.value for card in cards}
-    pair_values: list[Value] = []
-    set_values: list[Value] = []
-    for value in values:
-        if len([card for card in cards if card.value == value]) == 2:
-            pair_values.append(value)
-        elif len([card for card in cards if card.value == value]) == 3:
-            set_values.append(value)
-    pair_values.sort(reverse=True)
+    counts = _value_counts(cards)
+    pair_values = [i for i in range(len(counts) - 1, -1, -1) if counts[i] == 2]
+    set_values = [i for i in range(len(counts) - 1, -1, -1) if counts[i] == 3]
 
     if len(pair_values) >= 1 and len(set_values) == 1:
-        return set_values[0], pair_values[0]
+        return VALUES[set_values[0]], VALUES[pair_values[0]]
 
     if len(set_values) == 2:
-        set_values.sort(reverse=True)
-        return set_values[0], set_values[1]
+        return VALUES[set_values[0]], VALUES[set_values[1]]
 
     return None
 
@@ -226,18 +209,12 @@ def four_of_a_kind(cards: list[Card]) -> [None, tuple[Value, Value]]:
     """
     if len(cards) < 4:
         return None
-    values = {card.value for card in cards}
-    four_values: list[Value] = []
-    for value in values:
-        if len([card for card in cards if card.value == value]) == 4:
-            four_values.append(value)
+    counts = _value_counts(cards)
+    four_values = [i for i, count in enumerate(counts) if count == 4]
     if len(four_values) == 1:
-        try:
-            return four_values[0], max(card.value for card in cards if card.value not in four_values)  # noqa
-        except ValueError:
-            return four_values[0], None
-    else:
-        return None
+        rest = [i for i in range(len(counts) - 1, -1, -1) if counts[i] and i != four_values[0]]
+        return VALUES[four_values[0]], VALUES[rest[0]] if rest else None
+    return None
 
 
 def straight_flush(cards: list[Card]) -> [None, list[Card]]:
@@ -245,31 +222,20 @@ def straight_flush(cards: list[Card]) -> [None, list[Card]]:
     Defines if there is a straight flush in the given cards
     returns the values of the cards in the straight flush ordered by descending value
     """
-    _cards = list(cards)
-    # duplicate aces for a-to-5 straights
-    for ace in (card for card in cards if card.value == Value(14, 'Ace', 'A')):
-        _cards.append(Card(ace.suit, ZERO_ACE))
-    # sort cards by values
-    card_values = {c.value for c in _cards}
-    if len(card_values) < 5:
+    best_top, best_suit = None, None
+    for suit_index, suit in enumerate(SUITS):
+        top = evaluator.top_straight_bit(values_mask(card.index for card in cards if card.index & 3 == suit_index))
+        if top is not None and (best_top is None or top > best_top):
+            best_top, best_suit = top, suit
+    if best_top is None:
         return None
-
-    max_range = len(card_values) - 4
-    sorted_cards_values = sorted(card_values)
-    # try to find a sequence of sorted cards
-    for i in list(range(0, max_range))[::-1]:
-        current_range = sorted_cards_values[0 + i: 5 + i]
-        range_cards = [card for card in _cards if card.value in current_range]
-        if _in_a_row(current_range) and (f := flush(range_cards)):
-            return f
-
-    return None
+    return tuple(Card(best_suit, _value_by_bit(bit)) for bit in range(best_top, best_top - 5, -1))
 
 
 def royal_flush(cards: list[Card]) -> [None, list[Card]]:
     """Defines if there is a royal flush in the given cards"""
     _straight_flush = straight_flush(cards)
-    if _straight_flush and _straight_flush[0].value == Value(14, 'Ace', 'A'):
+    if _straight_flush and _straight_flush[0].value == VALUES[-1]:
         return _straight_flush
 
     return None
@@ -289,13 +255,50 @@ COMBINATIONS = (  # do not reorder
 )
 
 
-def best_hand(cards: Iterable[Card]) -> tuple[Combination, tuple]:
+COMBINATIONS_BY_PRIORITY = tuple(sorted(COMBINATIONS, key=lambda c: c.priority))
+
+
+def combination_of(strength: int) -> Combination:
+    """The combination of a hand by its evaluated strength"""
+    return COMBINATIONS_BY_PRIORITY[evaluator.category(strength)]
+
+
+def best_combination(cards: Sequence[Card]) -> Combination:
+    """The best combination of 5 to 7 cards found by the lookup tables evaluator"""
+    return combination_of(evaluator.evaluate(cards))
+
+
+class HandStrength(int):
+    """
+    The strength of the best hand made of 5 to 7 cards.
+    Strengths are totally ordered: the stronger hand has the bigger strength, hands of equal strength split the pot
+    """
+
+    @property
+    def combination(self) -> Combination:
+        """The combination of the hand"""
+        return combination_of(self)
+
+    def __repr__(self):
+        return f"{self.combination}({int(self)})"
+
+
+def hand_strength(cards: Sequence[Card]) -> HandStrength:
+    """The comparable strength of the best hand made of 5 to 7 cards"""
+    return HandStrength(evaluator.evaluate(cards))
+
+
+def best_hand(cards: Sequence[Card]) -> tuple[Combination, tuple]:
     """
     Defines the best hand that can be made from the given cards.
     Returns Combination class and the list of found cards to compare hands
     different hands can be "equal" if they have Combination of the same priority,
     and the same order of primary and secondary cards.
     """
+    if 5 <= len(cards) <= 7:
+        combination = best_combination(cards)
+        return combination, combination.check(cards)
+
     for combination in COMBINATIONS:
         found = combination.check(cards)
         if found:
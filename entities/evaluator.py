@@ -0,0 +1,310 @@
+"""
+Lookup tables hand evaluator.
+A hand of 5 to 7 cards is evaluated to a single integer strength from 1 to 7462, the stronger hand has the bigger one.
+Hands of equal strength split the pot.
+
+Each card index is mapped to a key, that packs the weight of the card value and the counter of the card suit.
+The sum of the card keys gives the number of cards of each suit and a value key, that is unique for each
+multiset of card values. So the hand is evaluated with one lookup into the values table or, if there are
+5 or more cards of a suit, with one lookup into the flushes table by the bitmask of the suited values.
+The tables are generated once into a versioned binary file with a checksum, and the file is memory-mapped
+on the first use, so processes started later share the same pages of the tables and start fast.
+
+HandState keeps the sum of card keys and the cards bitmask, so a known prefix of cards
+(pocket cards, the flop, the turn) is evaluated incrementally with every possible next card.
+"""
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import accumulate, combinations, combinations_with_replacement
+from pathlib import Path
+from typing import Optional
+
+from common.config import EVALUATOR_TABLES_PATH
+from common.tables_file import load_tables_file, save_tables_file
+from entities.cards import Card
+from errors.errors import EvaluatorTablesError
+
+# categories of hands, the same as combinations priorities
+HIGH_CARD = 0
+PAIR = 1
+TWO_PAIRS = 2
+THREE_OF_A_KIND = 3
+STRAIGHT = 4
+FLUSH = 5
+FULL_HOUSE = 6
+FOUR_OF_A_KIND = 7
+STRAIGHT_FLUSH = 8
+ROYAL_FLUSH = 9
+
+# number of different strengths of each category
+CATEGORY_SIZES = (1277, 2860, 858, 858, 10, 1277, 156, 156, 9, 1)
+CATEGORY_STARTS = tuple(accumulate(CATEGORY_SIZES[:-1], initial=1))
+MAX_STRENGTH = sum(CATEGORY_SIZES)
+
+# weights of card values, the sums of up to 7 weights with at most 4 of each value are unique
+VALUE_WEIGHTS = (1, 5, 24, 112, 521, 2247, 9244, 30823, 103066, 250154, 667453, 1526359, 3453520)
+VALUES_KEY_SHIFT = 16
+SUITS_KEY_MASK = (1 << VALUES_KEY_SHIFT) - 1
+SUIT_VALUES_MASK = sum(1 << 4 * value for value in range(13))
+# adding 3 to a suit counter sets its highest bit if there are at least 5 cards of the suit
+FLUSH_CHECK_ADDEND = 0x3333
+FLUSH_CHECK_MASK = 0x8888
+CARD_KEYS = tuple(VALUE_WEIGHTS[index >> 2] << VALUES_KEY_SHIFT | 1 << 4 * (index & 3) for index in range(52))
+VALUES_TABLE_SIZE = 4 * VALUE_WEIGHTS[-1] + 3 * VALUE_WEIGHTS[-2] + 1
+FLUSHES_TABLE_SIZE = 1 << len(VALUE_WEIGHTS)
+
+# tables file: the numbers in its header are the tables sizes
+TABLES_MAGIC = b'PKEV'
+TABLES_VERSION = 1
+
+
+def top_straight_bit(straights_mask: int) -> Optional[int]:
+    """
+    The bit of the highest value of the best straight in the straights bitmask or None.
+    Bit 0 of the bitmask is the ace as the lowest card, bits 1 to 13 are the values from Two to Ace
+    """
+    for top in range(13, 3, -1):
+        if straights_mask >> (top - 4) & 0b11111 == 0b11111:
+            return top
+    return None
+
+
+def _top_straight_value(values_mask: int) -> int:
+    """The index of the highest value of the best straight in the values bitmask or -1"""
+    top = top_straight_bit(values_mask << 1 | values_mask >> 12 & 1)
+    return -1 if top is None else top - 1
+
+
+def _values_hand_key(counts: Sequence[int]) -> tuple:
+    """The comparable key of the best not suited hand made of the cards with given values counts"""
+    values = [value for value in range(12, -1, -1) if counts[value]]
+    fours = [value for value in values if counts[value] == 4]
+    threes = [value for value in values if counts[value] == 3]
+    pairs = [value for value in values if counts[value] == 2]
+    if fours:
+        return FOUR_OF_A_KIND, fours[0], max(value for value in values if value != fours[0])
+    if threes and len(threes) + len(pairs) > 1:
+        return FULL_HOUSE, threes[0], max(threes[1:] + pairs)
+    top = _top_straight_value(sum(1 << value for value in values))
+    if top >= 0:
+        return STRAIGHT, top
+    if threes:
+        return (THREE_OF_A_KIND, threes[0], *[value for value in values if value != threes[0]][:2])
+    if len(pairs) > 1:
+        return TWO_PAIRS, pairs[0], pairs[1], max(value for value in values if value not in pairs[:2])
+    if pairs:
+        return (PAIR, pairs[0], *[value for value in values if value != pairs[0]][:3])
+    return (HIGH_CARD, *values[:5])
+
+
+def _flush_hand_key(values_mask: int) -> tuple:
+    """The comparable key of the best flush made of the suited cards with given values"""
+    top = _top_straight_value(values_mask)
+    if top == 12:
+        return ROYAL_FLUSH, top
+    if top >= 0:
+        return STRAIGHT_FLUSH, top
+    return (FLUSH, *[value for value in range(12, -1, -1) if values_mask >> value & 1][:5])
+
+
+def _values_multisets(number: int) -> Iterable[tuple[int, ...]]:
+    """All the multisets of card values possible for the number of cards"""
+    for values in combinations_with_replacement(range(13), number):
+        if all(values[i] != values[i + 4] for i in range(number - 4)):
+            yield values
+
+
+def _counts(values: Iterable[int]) -> list[int]:
+    """Number of cards of each value"""
+    counts = [0] * 13
+    for value in values:
+        counts[value] += 1
+    return counts
+
+
+def build_tables() -> tuple[array, array]:
+    """
+    Generate the values and the flushes tables.
+    All possible 5-card hands are sorted by their comparable keys to give the strengths,
+    then the best 5-card hand is stored for every multiset of 5 to 7 values and every set of 5 to 7 suited values.
+    """
+    five_cards_keys = {_values_hand_key(_counts(values)) for values in _values_multisets(5)}
+    five_cards_keys.update(_flush_hand_key(sum(1 << value for value in values))
+                           for values in combinations(range(13), 5))
+    strengths = {key: strength for strength, key in enumerate(sorted(five_cards_keys), 1)}
+
+    values_table = array('H', bytes(2 * VALUES_TABLE_SIZE))
+    flushes_table = array('H', bytes(2 * FLUSHES_TABLE_SIZE))
+    for number in range(5, 8):
+        for values in _values_multisets(number):
+            values_key = sum(VALUE_WEIGHTS[value] for value in values)
+            values_table[values_key] = strengths[_values_hand_key(_counts(values))]
+        for values in combinations(range(13), number):
+            values_mask = sum(1 << value for value in values)
+            flushes_table[values_mask] = strengths[_flush_hand_key(values_mask)]
+    return values_table, flushes_table
+
+
+def save_tables(path: Path, values_table: array, flushes_table: array) -> None:
+    """Write the tables file"""
+    save_tables_file(path, TABLES_MAGIC, TABLES_VERSION, (len(values_table), len(flushes_table)),
+                     (values_table, flushes_table))
+
+
+def load_tables(path: Path) -> tuple[memoryview, memoryview]:
+    """Memory-map the tables file and check its version, sizes and checksum"""
+    sizes, data = load_tables_file(path, TABLES_MAGIC, TABLES_VERSION, EvaluatorTablesError)
+    if sizes != (VALUES_TABLE_SIZE, FLUSHES_TABLE_SIZE):
+        raise EvaluatorTablesError(f"{path} is made by another version of the evaluator")
+    if len(data) != 2 * (VALUES_TABLE_SIZE + FLUSHES_TABLE_SIZE):
+        raise EvaluatorTablesError(f"{path} is corrupted")
+    return data[:2 * VALUES_TABLE_SIZE].cast('H'), data[2 * VALUES_TABLE_SIZE:].cast('H')
+
+
+def load_or_build_tables(path: Path) -> tuple[Sequence[int], Sequence[int]]:
+    """
+    Map the tables file, regenerating it if it's missing or invalid.
+    If the file can not be written, the generated tables are kept in the process memory
+    """
+    try:
+        return load_tables(path)
+    except EvaluatorTablesError:
+        pass
+
+    values_table, flushes_table = build_tables()
+    try:
+        save_tables(path, values_table, flushes_table)
+        return load_tables(path)
+    except (OSError, EvaluatorTablesError):
+        return values_table, flushes_table
+
+
+_tables: Optional[tuple[Sequence[int], Sequence[int]]] = None
+
+
+def tables() -> tuple[Sequence[int], Sequence[int]]:
+    """The values and the flushes tables, loaded once on the first call"""
+    global _tables
+    if _tables is None:
+        _tables = load_or_build_tables(EVALUATOR_TABLES_PATH)
+    return _tables
+
+
+def install_tables(values_table: Sequence[int], flushes_table: Sequence[int]) -> None:
+    """Use the given tables, e.g. attached from shared memory, instead of loading the tables file"""
+    global _tables
+    _tables = values_table, flushes_table
+
+
+def evaluate_indices(indices: Iterable[int]) -> int:
+    """The strength of the best hand made of 5 to 7 cards given by their indices"""
+    values_table, flushes_table = tables()
+    indices = tuple(indices)  # the cards of a flush are looked for once more
+    key = 0
+    for index in indices:
+        key += CARD_KEYS[index]
+    flush_suits = (key & SUITS_KEY_MASK) + FLUSH_CHECK_ADDEND & FLUSH_CHECK_MASK
+    if flush_suits:
+        suit = (flush_suits.bit_length() >> 2) - 1
+        values_mask = 0
+        for index in indices:
+            if index & 3 == suit:
+                values_mask |= 1 << (index >> 2)
+        return flushes_table[values_mask]
+    return values_table[key >> VALUES_KEY_SHIFT]
+
+
+def evaluate(cards: Sequence[Card]) -> int:
+    """The strength of the best hand made of 5 to 7 cards"""
+    if not 5 <= len(cards) <= 7:
+        raise ValueError(f'Can not evaluate {len(cards)} cards, 5 to 7 are required')
+    return evaluate_indices([card.index for card in cards])
+
+
+def category(strength: int) -> int:
+    """The category of the hand by its strength. The categories are the same as combinations priorities"""
+    return bisect_right(CATEGORY_STARTS, strength) - 1
+
+
+def _state_strength(key: int, mask: int) -> int:
+    """The strength of the hand by the sum of its card keys and the cards bitmask"""
+    values_table, flushes_table = tables()
+    flush_suits = (key & SUITS_KEY_MASK) + FLUSH_CHECK_ADDEND & FLUSH_CHECK_MASK
+    if flush_suits:
+        suited = mask >> (flush_suits.bit_length() >> 2) - 1 & SUIT_VALUES_MASK
+        values_mask = 0
+        while suited:
+            bit = suited & -suited
+            values_mask |= 1 << (bit.bit_length() >> 2)
+            suited ^= bit
+        return flushes_table[values_mask]
+    return values_table[key >> VALUES_KEY_SHIFT]
+
+
+class HandState:
+    """
+    Incremental evaluation state of a set of cards.
+    The state is immutable: adding cards makes a new state, so states of a common prefix are shared for free.
+    """
+
+    __slots__ = ('key', 'mask')
+
+    def __init__(self, key: int = 0, mask: int = 0):
+        self.key = key
+        self.mask = mask
+
+    @classmethod
+    def of(cls, indices: Iterable[int]) -> 'HandState':
+        """The state of the cards given by their indices"""
+        return cls().extend(indices)
+
+    def add(self, index: int) -> 'HandState':
+        """The state with one more card"""
+        return HandState(self.key + CARD_KEYS[index], self.mask | 1 << index)
+
+    def extend(self, indices: Iterable[int]) -> 'HandState':
+        """The state with more cards"""
+        key, mask = self.key, self.mask
+        for index in indices:
+            key += CARD_KEYS[index]
+            mask |= 1 << index
+        return HandState(key, mask)
+
+    def __add__(self, other: 'HandState') -> 'HandState':
+        """The state of two not intersecting sets of cards, e.g. pocket cards and the board"""
+        return HandState(self.key + other.key, self.mask | other.mask)
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def __contains__(self, index: int) -> bool:
+        return bool(self.mask >> index & 1)
+
+    def strength(self) -> int:
+        """The strength of the best hand of the state, must have 5 to 7 cards"""
+        return _state_strength(self.key, self.mask)
+
+    def completions(self, indices: Sequence[int], number: int, start: int = 0) -> Iterator['HandState']:
+        """States completed with every combination of the number of cards from the indices"""
+        if number == 0:
+            yield self
+            return
+        for i in range(start, len(indices) - number + 1):
+            yield from self.add(indices[i]).completions(indices, number - 1, i + 1)
+
+    def completions_strengths(self, indices: Sequence[int], number: int, start: int = 0) -> Iterator[int]:
+        """
+        Strengths of the hand completed with every combination of the number of cards from the indices.
+        The states of the prefixes are shared, the last card is evaluated without making a state
+        """
+        if number == 0:
+            yield self.strength()
+            return
+        if number == 1:
+            key, mask = self.key, self.mask
+            for index in indices[start:]:
+                yield _state_strength(key + CARD_KEYS[index], mask | 1 << index)
+            return
+        for i in range(start, len(indices) - number + 1):
+            yield from self.add(indices[i]).completions_strengths(indices, number - 1, i + 1)
@@ -1,3 +1,6 @@
+from random import Random
+from typing import Optional
+
 from entities.players import Player, Account
 from entities.round import Round
 from errors.errors import NotEnoughPlayers
@@ -9,7 +12,7 @@ class Game:
     Has logic of game initiation, adding or removing players, blind raises and Round initiation
     """
 
-    def __init__(self, blind: float, buy_in: float, continuous: bool = False):
+    def __init__(self, blind: float, buy_in: float, continuous: bool = False, rng: Optional[Random] = None):
         self.initial_blind = blind  # set initial size of blind bets
         self.buy_in = buy_in  # set initial chips on the game start
         self.continuous = continuous  # enable auto top-up for AI players
@@ -18,6 +21,7 @@ class Game:
         self.players: list[Player] = []  # init players list
         self.last_dealer_index: int = -1  # init dealer's position
         self.rounds_started = 0  # init rounds counter. Used for blinds raises
+        self.rng = rng  # random stream of the table's decks, the process one if None
 
     def add_human_player(self, account: Account):
         """Add a human player into the game, subtracting his stack from the account"""
@@ -58,7 +62,7 @@ class Game:
 
         # update blinds and start a new round
         self.raise_blind()
-        new_round = Round(self.players, self.last_dealer_index, self.blind)
+        new_round = Round(self.players, self.last_dealer_index, self.blind, rng=self.rng)
 
         # cycle dealer
         self.last_dealer_index += 1
@@ -195,6 +195,20 @@ class Player:
 
         self._made_decision = True
 
+    # snapshots
+    def snapshot(self) -> tuple:
+        """The state of the player as a flat tuple of immutable values"""
+        return (self.__stack, tuple(self.__hand), self.__all_in, self._in_the_game, self._made_decision,
+                tuple(self.available_actions), self.requested_bet, self.decision.action, self.decision.size)
+
+    def restore(self, state: tuple) -> None:
+        """Return the player to the state of the snapshot"""
+        (self.__stack, hand, self.__all_in, self._in_the_game, self._made_decision,
+         available_actions, self.requested_bet, action, size) = state
+        self.__hand = list(hand)
+        self.available_actions = list(available_actions)
+        self.decision = Decision(action, size)
+
     # money
     def add_money(self, amount):
         """When player buys credit or wins"""
@@ -246,5 +260,4 @@ class Account:
         self.games.pop(game)
 
 
-subscribe(EventType.PLAYER_PREPARE_MOVE, Player.ask_for_a_decision)
 subscribe(EventType.PLAYER_MOVED, Player.get_reduced_status)
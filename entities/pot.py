@@ -37,6 +37,24 @@ class Pot:
         self._contributions[player] += amount
         self.pot_size += amount
 
+    def snapshot(self) -> tuple:
+        """
+        The state of the pot as a flat tuple, the players are referenced, side pots are referenced by their order
+        """
+        pot_numbers = {id(side_pot): number for number, side_pot in enumerate(self.pots)}
+        return (tuple(self._players), tuple(self._contributions.values()), self.pot_size,
+                tuple((tuple(side_pot.players), side_pot.size) for side_pot in self.pots),
+                tuple((pot_numbers[id(side_pot)], tuple(winners.items()))
+                      for side_pot, winners in self.winners.items()))
+
+    def restore(self, state: tuple) -> None:
+        """Return the pot to the state of the snapshot"""
+        players, contributions, self.pot_size, pots, winners = state
+        self._players = list(players)
+        self._contributions = dict(zip(self._contributions, contributions))
+        self.pots = [SidePot(list(side_pot_players), size) for side_pot_players, size in pots]
+        self.winners = {self.pots[number]: dict(pot_winners) for number, pot_winners in winners}
+
     def unite_pots(self):
         """unite side pots with the same number of players"""
         # remove folded players from pots
@@ -80,12 +98,14 @@ class Pot:
             for winner, prize in winners_list.items():
                 winner.add_money(prize)
 
-    def distribute(self, rating: list[tuple[tuple, list[Player]]]):
+    def distribute(self, rating: list[tuple[int, list[Player]]]):
         """
         define the winners of each pot
         decide how much money to pay the winners of each pot
         there may be multiple winners in multiple pots
         """
+        # place of each player in the rating, players with equal hands share the place
+        places = {player: place for place, (_, players) in enumerate(rating) for player in players}
         for side_pot in self.pots:
             # case 1 player in the pot - make him winner
             if len(side_pot.players) == 1:
@@ -93,13 +113,8 @@ class Pot:
                 continue
 
             # case multiple players in the pot
-            side_pot_winners: list[Player] = []
-            for _, winners in rating:
-                for winner in winners:
-                    if winner in side_pot.players:
-                        side_pot_winners.append(winner)
-                if side_pot_winners:
-                    break
+            best_place = min(places[player] for player in side_pot.players if player in places)
+            side_pot_winners = [player for player in side_pot.players if places.get(player) == best_place]
 
             prize = side_pot.size / len(side_pot_winners)
             self.winners[side_pot] = {_winner: prize for _winner in side_pot_winners}
@@ -1,10 +1,35 @@
-from typing import Iterable, Union
+from operator import itemgetter
+from random import Random
+from typing import NamedTuple, Optional, Union
 
 from common.event import post_event, EventType
+from entities.bet import Decision
 from entities.cards import Card, Deck
-from entities.combinations import Combination, best_hand
+from entities.combinations import HandStrength
+from entities.evaluator import HandState
 from entities.players import Player
 from entities.pot import Pot
+from errors.errors import RoundIsOver, UnavailableDecision
+
+
+class RoundSnapshot(NamedTuple):
+    """The state of a round as flat tuples of immutable values and references to the round's players"""
+
+    stage_index: int
+    board: tuple[Card, ...]
+    board_state: HandState
+    rating: tuple
+    seat_to_act: Optional[int]
+    finished: bool
+    players_left: int
+    max_bet: float
+    pending: int
+    ring_size: int
+    next_seats: tuple[int, ...]
+    previous_seats: tuple[int, ...]
+    deck: tuple[int, ...]
+    pot: tuple
+    players: tuple[tuple, ...]
 
 
 class Round:
@@ -14,6 +39,11 @@ class Round:
     - round stages with dealing the community cards
     - blinds posting and betting cycles
     - determining the rating of players' combinations
+
+    The round is a state machine moved on by the players' moves with `step`, one move at a time.
+    Players are kept by their seats, the seats that can still bet are linked in a ring,
+    so the next player to act and the end of a betting cycle are found in constant time.
+    `play` drives the whole round by the events, asking each player to move with PLAYER_MAKE_MOVE
     """
 
     STAGES = ('deal', 'pre-flop', 'flop', 'turn', 'river', 'showdown')
@@ -26,21 +56,32 @@ class Round:
         5: 0   # showdown
     }
 
-    def __init__(self, players: list[Player], dealer_index: int, blind_size: float, debug: bool = False):
-        """Initialize the game"""
+    def __init__(self, players: list[Player], dealer_index: int, blind_size: float, debug: bool = False,
+                 rng: Optional[Random] = None):
+        """Initialize the game, the whole round is played by the events unless it's debug"""
         self.players: list[Union[Player]] = players[dealer_index + 1:] + players[:dealer_index + 1]
         self.blind_size = blind_size
         self.debug = debug
 
-        self.deck = Deck()
+        self.deck = Deck(rng)
         self._board: list[Card] = []
+        self.board_state = HandState()
         self.stage_index = 0
         self.pot: Pot = Pot(self.players)
         self.rating = []
 
+        self.seat_to_act: Optional[int] = None
+        self.finished = False
+        self._players_left = len(self.active_players)
+        self._max_bet = 0.0
+        self._pending = 0  # the number of the players in the ring who still have to act on the stage
+        self._ring_size = 0
+        self._next_seats = [0] * len(self.players)
+        self._previous_seats = [0] * len(self.players)
+
         if not self.debug:
-            self.deal_players_cards()
-            self.new_stage()
+            self.start()
+            self.play()
 
     @property
     def board(self):
@@ -50,32 +91,159 @@ class Round:
     def _deal_board(self, number: int):
         """Deal the number of cards to the board"""
         self.deck.hide_one()
-        self._board.extend([self.deck.draw_one() for _ in range(number)])
+        self._open_cards([self.deck.draw_one() for _ in range(number)])
+
+    def _open_cards(self, cards: list[Card]):
+        """Put the cards on the board and extend the board evaluation state with them"""
+        self._board.extend(cards)
+        self.board_state = self.board_state.extend(card.index for card in cards)
+
+    def hand_state(self, player: Player) -> HandState:
+        """The evaluation state of the player's pocket cards and the board"""
+        return HandState.of(card.index for card in player.hand) + self.board_state
+
+    def start(self) -> Optional[Player]:
+        """Deal the pocket cards and start pre-flop, returns the first player to act"""
+        self.deal_players_cards()
+        self.new_stage()
+        self._move_on()
+        return self.player_to_act
+
+    def play(self):
+        """Play the round to the end, each player is asked to move by the events"""
+        while (player := self.player_to_act) is not None:
+            post_event(EventType.PLAYER_PREPARE_MOVE, player, self._max_bet)
+            post_event(EventType.PLAYER_MAKE_MOVE, player, self)
+            self.step()
 
     def new_stage(self):
-        """New cards are dealt, players make their bets"""
+        """New cards are dealt, the blinds are posted on pre-flop and the betting cycle of the stage is opened"""
         self.stage_index += 1
         self._deal_board(self.NUMBER_OF_CARDS[self.stage_index])
+        self._max_bet = 0.0
 
         post_event(EventType.NEW_STAGE, self.board, self.pot)
 
-        # post blinds if pre-flop
+        # post blinds if pre-flop, the big blind is the last to act
         if self.stage_index == 1:
-            for i, player in enumerate(self.active_players[:2]):
-                amount = self.blind_size / 2 * (1 + i)
-                player.post_blind(amount)
+            blind_seats = [seat for seat, player in enumerate(self.players) if player.is_active][:2]
+            for i, seat in enumerate(blind_seats):
+                player = self.players[seat]
+                player.post_blind(self.blind_size / 2 * (1 + i))
+                self._max_bet = max(self._max_bet, player.decision.size)
                 post_event(EventType.PLAYER_MOVED, player)
-            if not self.debug:
-                self._bets_round(self.players[1])
-        elif not self.debug:
-            self._bets_round()
+            self._open_betting(blind_seats[-1] if blind_seats else -1)
+        else:
+            self._open_betting(-1)
 
-        if not self.debug:
-            # find winners if necessary or proceed to the next stage
-            if self._number_of_players_left == 1 or self.stage_index == 4:
+    def _open_betting(self, last_seat: int):
+        """Link the seats of the players who can bet in a ring, the one after the last seat acts first"""
+        seats = [seat for seat, player in enumerate(self.players) if player.is_active and not player.is_all_in]
+        for i, seat in enumerate(seats):
+            self._next_seats[seat] = seats[(i + 1) % len(seats)]
+            self._previous_seats[seat] = seats[i - 1]
+            self.players[seat].reset_decision()
+        self._ring_size = self._pending = len(seats)
+        following = [seat for seat in seats if seat > last_seat]
+        self.seat_to_act = (following or seats or [None])[0]
+
+    def _leave_ring(self, seat: int):
+        """Unlink the seat of a player who can't bet anymore"""
+        following, previous = self._next_seats[seat], self._previous_seats[seat]
+        self._next_seats[previous] = following
+        self._previous_seats[following] = previous
+        self._ring_size -= 1
+
+    @property
+    def player_to_act(self) -> Optional[Player]:
+        """The player whose move is awaited, None when the round is over"""
+        return None if self.seat_to_act is None else self.players[self.seat_to_act]
+
+    @property
+    def _betting_done(self) -> bool:
+        """Everyone has acted, or nobody is left to bet against"""
+        return self._players_left == 1 or not self._pending or self._ring_size <= 1 and not self._max_bet
+
+    def step(self, decision: Optional[Decision] = None) -> Optional[Player]:
+        """
+        Make the move of the player to act with the decision, or with the one the player has already made,
+        and move the round on to the next player, the next stage or the end.
+        Returns the next player to act, None when the round is over
+        """
+        if self.seat_to_act is None:
+            raise RoundIsOver
+        seat = self.seat_to_act
+        player = self.players[seat]
+        if decision is not None:
+            player.decide(decision)
+        elif not player.made_decision:
+            raise UnavailableDecision(f'{player} has not decided')
+        post_event(EventType.PLAYER_MOVED, player)
+
+        raised = player.decision.size > self._max_bet
+        self._max_bet = max(self._max_bet, player.decision.size)
+        following = self._next_seats[seat]
+        if not player.is_active:
+            self._players_left -= 1
+        in_ring = player.is_active and not player.is_all_in
+        if not in_ring:
+            self._leave_ring(seat)
+        if raised:
+            # everyone else who can bet has to answer the raise
+            self._pending = self._ring_size - in_ring
+            seat_to_reset = following
+            for _ in range(self._pending):
+                self.players[seat_to_reset].reset_decision()
+                seat_to_reset = self._next_seats[seat_to_reset]
+        else:
+            self._pending -= 1
+        self.seat_to_act = following if self._ring_size else None
+        self._move_on()
+        return self.player_to_act
+
+    def _move_on(self):
+        """Close the finished betting cycles, opening the next stages or ending the round, and prepare the move"""
+        while not self.finished and self._betting_done:
+            self._update_bank()
+            if self._players_left == 1 or self.stage_index == 4:
                 self._end()
             else:
                 self.new_stage()
+        if not self.finished:
+            self.players[self.seat_to_act].ask_for_a_decision(self._max_bet)
+
+    def snapshot(self) -> RoundSnapshot:
+        """
+        The state of the round with its deck, pot and players in time linear in their size.
+        Snapshots are immutable, so a search can restore one many times and share it between branches.
+        Moves made while searching post the events as usual, subscribers may be isolated for the search
+        """
+        return RoundSnapshot(
+            self.stage_index, tuple(self._board), self.board_state,
+            tuple((strength, tuple(players)) for strength, players in self.rating),
+            self.seat_to_act, self.finished, self._players_left, self._max_bet, self._pending, self._ring_size,
+            tuple(self._next_seats), tuple(self._previous_seats),
+            self.deck.snapshot(), self.pot.snapshot(), tuple(player.snapshot() for player in self.players)
+        )
+
+    def restore(self, snapshot: RoundSnapshot) -> None:
+        """Return the round, its deck, pot and players to the state of the snapshot"""
+        self.stage_index = snapshot.stage_index
+        self._board = list(snapshot.board)
+        self.board_state = snapshot.board_state
+        self.rating = [(strength, list(players)) for strength, players in snapshot.rating]
+        self.seat_to_act = snapshot.seat_to_act
+        self.finished = snapshot.finished
+        self._players_left = snapshot.players_left
+        self._max_bet = snapshot.max_bet
+        self._pending = snapshot.pending
+        self._ring_size = snapshot.ring_size
+        self._next_seats = list(snapshot.next_seats)
+        self._previous_seats = list(snapshot.previous_seats)
+        self.deck.restore(snapshot.deck)
+        self.pot.restore(snapshot.pot)
+        for player, state in zip(self.players, snapshot.players):
+            player.restore(state)
 
     @property
     def active_players(self) -> list[Player]:
@@ -85,52 +253,18 @@ class Round:
     @property
     def _number_of_players_left(self):
         """Number of players left in the game(not folded)"""
-        return len(self.active_players)
+        return self._players_left
 
     @property
     def max_bet(self):
         """The size of the biggest bet in the current game stage"""
-        return max(player.decision.size for player in self.players)
-
-    def _update_queue(self, last_raiser: Player) -> list[Player]:
-        """make a queue of players to move after the last raiser"""
-        try:
-            index = self.active_players.index(last_raiser)
-        except ValueError:
-            index = -1
-        return self.active_players[index + 1:] + self.active_players[:index + 1]
-
-    def _turns_queue(self, last_raiser: Player) -> Iterable[Union[Player]]:
-        """get the next player to move"""
-        while not_decided := [player for player in self._update_queue(last_raiser) if not player.made_decision]:
-            if len([player for player in self.active_players if not player.is_all_in]) == 1 and not self.max_bet:
-                break
-            yield not_decided[0]
-
-    def _bets_round(self, last_raiser: [Player] = None):
-        """cycle through active players and get players' moves"""
-        # reset each player's decision except the last raiser and the ones who are all-in
-        for player in self.active_players:
-            if player is not last_raiser and not player.is_all_in:
-                player.reset_decision()
-
-        # cycle through players and ask for a decision
-        for player in self._turns_queue(last_raiser):
-            current_max_bet = self.max_bet
-            post_event(EventType.PLAYER_PREPARE_MOVE, player, current_max_bet)
-            post_event(EventType.PLAYER_MAKE_MOVE, player, self)
-            post_event(EventType.PLAYER_MOVED, player)
-
-            if player.decision.size > current_max_bet:
-                last_raiser = player
-                self._bets_round(last_raiser)
-                return
-        self._update_bank()
+        return self._max_bet
 
     def deal_players_cards(self):
         """just deal cards starting from the next after dealer"""
         for player in self.players:
             player.new_game_round()
+        self._players_left = len(self.active_players)
         for _ in range(2):
             for player in self.active_players:
                 player.add_card(self.deck.draw_one())
@@ -149,17 +283,13 @@ class Round:
         else:
             self.stage_index = 5
 
-            # calculate each active player's combination
-            players_combinations: dict[Player: tuple]
-            players_combinations = {player: best_hand(player.hand + self.board) for player in self.active_players}
-            # combine all present combinations to a set
-            combs = {comb for _, comb in players_combinations.items()}
-            # group players that have the same combination
-            players_grouped_by_combinations: dict[Combination: list[Player]] = {comb: [] for comb in combs}
-            for player, comb in players_combinations.items():
-                players_grouped_by_combinations[comb].append(player)
-            # sort players groups by their combinations and store it
-            self.rating = sorted(players_grouped_by_combinations.items(), reverse=True)
+            # group players that have the same hand strength
+            players_grouped_by_strength: dict[HandStrength: list[Player]] = {}
+            for player in self.active_players:
+                strength = HandStrength(self.hand_state(player).strength())
+                players_grouped_by_strength.setdefault(strength, []).append(player)
+            # sort players groups by their hands strength and store it
+            self.rating = sorted(players_grouped_by_strength.items(), key=itemgetter(0), reverse=True)
 
     def _end(self):
         """Find winners and give them money"""
@@ -168,6 +298,8 @@ class Round:
         self.pot.distribute(self.rating)
         self.pot.pay_wins()
 
+        self.seat_to_act = None
+        self.finished = True
         post_event(EventType.WINNERS_CALCULATED, self)
         post_event(EventType.ROUND_END, self)
 
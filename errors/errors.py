@@ -2,6 +2,10 @@ class UnavailableDecision(BaseException):
     """Player can't choose this decision"""
 
 
+class RoundIsOver(BaseException):
+    """No more moves can be made in the round"""
+
+
 class TooManyCards(BaseException):
     """No more cards can be dealt to the player"""
 
@@ -28,3 +32,15 @@ class GameNotFoundError(BaseException):
 
 class TooSmallBetError(BaseException):
     """Player can't post a bet smaller than the current one except all-in"""
+
+
+class EvaluatorTablesError(BaseException):
+    """The evaluator tables file is missing, made by another version or corrupted"""
+
+
+class EquityTablesError(BaseException):
+    """The pre-flop equity tables file is missing, made by another version or corrupted"""
+
+
+class BoardTexturesError(BaseException):
+    """The flop textures file is missing, made by another version or corrupted"""
@@ -1,8 +1,8 @@
-from secrets import SystemRandom
 from typing import Union
 
 from ai.ai import AI
 from common.config import DEFAULT_PLAYERS_NUM, DEFAULT_BUY_IN, DEFAULT_BLIND
+from common.rng import game_rng
 from controller.cli import ask_for_int_input, ask_for_str_input, ask_for_bool_input
 from data.constants import NAMES
 from entities.game import Game, Player
@@ -10,8 +10,6 @@ from errors import errors
 from view.cli import CliView
 from view.interface import subscribe_view
 
-random = SystemRandom()
-
 
 def start_a_game(number_of_players: int, init_chips: float, blind: float, player_name: str) -> None:
     """
@@ -25,7 +23,7 @@ def start_a_game(number_of_players: int, init_chips: float, blind: float, player
     # create AI players and assign uniq names to them
     names = NAMES.copy()
     players: list[Union[Player, AI]]
-    players = [AI(init_chips, name=names.pop(random.randint(0, len(names)))) for _ in range(number_of_players - 1)]
+    players = [AI(init_chips, name=names.pop(game_rng().randrange(len(names)))) for _ in range(number_of_players - 1)]
     # add one human player
     players.append(Player(init_chips, is_ai=False, name=player_name))
     # create the game and add the players
@@ -0,0 +1,145 @@
+"""
+Headless simulation of games between AI players.
+Games are played without views and input, only the AI and the simulation itself follow the game events,
+so nothing is printed and the only output is the results of the hands passed to the sink.
+The subscribers of the process are restored after the simulation.
+
+Usage:
+    python simulation.py --games 10 --players 6 --output hands.jsonl
+    python simulation.py --hands 100000
+    python simulation.py --hands 1000 --ranges
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Callable, IO, Iterable, NamedTuple, Optional
+
+from ai.ai import AI, AI_SUBSCRIPTIONS, RANGE_SUBSCRIPTIONS
+from common.config import DEFAULT_BUY_IN, DEFAULT_BLIND
+from common.event import EventType, isolated_subscribers
+from common.rng import FAST, make_rng
+from entities.game import Game
+from entities.round import Round
+from errors.errors import NotEnoughPlayers
+
+
+class HandResult(NamedTuple):
+    """The result of a hand: the last stage, the board, the pot, the wins and the players' stacks after it"""
+
+    game: int
+    hand: int
+    stage: str
+    board: tuple[str, ...]
+    pot: float
+    winnings: dict[str, float]
+    stacks: dict[str, float]
+
+
+class SimulationStats(NamedTuple):
+    """The number of played games and hands and the time they took"""
+
+    games: int
+    hands: int
+    seconds: float
+
+    @property
+    def hands_per_second(self) -> float:
+        """Throughput of the simulation"""
+        return self.hands / self.seconds if self.seconds else 0.0
+
+
+class JsonLinesSink:
+    """Writes each hand result to the file as a line of JSON"""
+
+    def __init__(self, file: IO[str]):
+        self.file = file
+
+    def __call__(self, result: HandResult) -> None:
+        self.file.write(json.dumps(result._asdict()) + '\n')
+
+
+class Simulation:
+    """Games of AI players one after another, each hand result is passed to the sink"""
+
+    def __init__(self, players: int = 6, buy_in: float = DEFAULT_BUY_IN, blind: float = DEFAULT_BLIND,
+                 sink: Optional[Callable[[HandResult], None]] = None,
+                 subscriptions: Iterable[tuple[EventType, Callable]] = (), seed: Optional[int] = None):
+        self.players = players
+        self.buy_in = buy_in
+        self.blind = blind
+        self.sink = sink
+        self.subscriptions = tuple(subscriptions)
+        self.seed = seed
+        self.games = self.hands = 0
+
+    def round_end(self, game_round: Round) -> None:
+        """Count the hand and pass its result to the sink"""
+        self.hands += 1
+        if self.sink is None:
+            return
+        winnings: dict[str, float] = {}
+        for winners in game_round.pot.winners.values():
+            for player, prize in winners.items():
+                winnings[player.name] = winnings.get(player.name, 0.0) + prize
+        self.sink(HandResult(
+            self.games, self.hands, game_round.STAGES[game_round.stage_index],
+            tuple(str(card) for card in game_round.board), game_round.pot.pot_size, winnings,
+            {player.name: player.stack for player in game_round.players}
+        ))
+
+    def play_game(self, max_hands: Optional[int] = None) -> None:
+        """Play a game until one player is left or the total number of hands reaches the maximum"""
+        # each game is a table with its own random stream, the same seed replays the same games
+        rng = make_rng(stream=self.games) if self.seed is None else make_rng(FAST, self.seed, self.games)
+        game = Game(self.blind, self.buy_in, rng=rng)
+        for number in range(1, self.players + 1):
+            game.add_player(AI(self.buy_in, name=f'AI {number}', rng=rng))
+        self.games += 1
+        while max_hands is None or self.hands < max_hands:
+            try:
+                game.new_round()
+            except NotEnoughPlayers:
+                break
+
+    def run(self, games: Optional[int] = None, hands: Optional[int] = None) -> SimulationStats:
+        """Play the number of games or of hands, whichever is reached first, one game by default"""
+        if games is None and hands is None:
+            games = 1
+        games_before, hands_before = self.games, self.hands
+        subscriptions = (*AI_SUBSCRIPTIONS, (EventType.ROUND_END, self.round_end), *self.subscriptions)
+        start = time.perf_counter()
+        with isolated_subscribers(subscriptions):
+            while (games is None or self.games - games_before < games) and \
+                    (hands is None or self.hands - hands_before < hands):
+                self.play_game(None if hands is None else hands_before + hands)
+        return SimulationStats(self.games - games_before, self.hands - hands_before, time.perf_counter() - start)
+
+
+def main():
+    """Run a simulation from the command line and report its throughput"""
+    parser = argparse.ArgumentParser(description='Simulate games between AI players')
+    parser.add_argument('--games', type=int, help='number of games, 1 if the number of hands is not given')
+    parser.add_argument('--hands', type=int, help='number of hands')
+    parser.add_argument('--players', type=int, default=6)
+    parser.add_argument('--buy-in', type=float, default=DEFAULT_BUY_IN)
+    parser.add_argument('--blind', type=float, default=DEFAULT_BLIND)
+    parser.add_argument('--seed', type=int, help='seed of the fast random source to replay the same games')
+    parser.add_argument('--output', help='JSON lines file for the hands results, none are written by default')
+    parser.add_argument('--ranges', action='store_true', help="follow the opponents' ranges and decide by them")
+    args = parser.parse_args()
+
+    output = open(args.output, 'w') if args.output else None
+    try:
+        simulation = Simulation(args.players, args.buy_in, args.blind, JsonLinesSink(output) if output else None,
+                                RANGE_SUBSCRIPTIONS if args.ranges else (), args.seed)
+        stats = simulation.run(args.games, args.hands)
+    finally:
+        if output:
+            output.close()
+    sys.stderr.write(f'{stats.games} games, {stats.hands} hands in {stats.seconds:.1f}s, '
+                     f'{stats.hands_per_second:.1f} hands/s\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,14 @@
+from entities.cards import Card, SUITS, VALUES
+
+_VALUES = {value.short_name: value for value in VALUES}
+_SUITS = {suit.short_name: suit for suit in SUITS}
+
+
+def cards_of(*names: str) -> list[Card]:
+    """Make cards from short names like 'As' or 'Td'"""
+    return [Card(_SUITS[name[1]], _VALUES[name[0]]) for name in names]
+
+
+def indices_of(*names: str) -> list[int]:
+    """Indices of the cards with short names like 'As' or 'Td'"""
+    return [card.index for card in cards_of(*names)]
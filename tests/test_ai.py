@@ -1,9 +1,17 @@
+from random import Random
 from secrets import SystemRandom
 
 import pytest
 
-from ai.ai import all_possible_sets_to_open
-from entities.cards import Deck
+from ai import ai
+from ai.ai import StageBetAI, all_possible_sets_to_open
+from ai.decision_cache import DecisionCache
+from ai.equity import monte_carlo_equity
+from ai.equity_cache import EquityCache
+from common.config import EQUITY_TIME_BUDGET
+from entities.bet import Bet
+from entities.cards import CARDS, Deck
+from entities.players import Player
 
 secure_random = SystemRandom()
 
@@ -22,3 +30,71 @@ def test_unopened_count(number_of_known: int, expected: int):
     known_cards = tuple(secure_random.sample(list(Deck.all_cards()), number_of_known))
     assert len(all_possible_sets_to_open(known_cards)) == expected, \
         f'wrong amount of sets for {number_of_known} cards. Expected: {expected}'
+
+
+def _player(*indices: int) -> Player:
+    player = Player(500)
+    for index in indices:
+        player.add_card(CARDS[index])
+    return player
+
+
+def test_stage_decision_follows_the_equity_against_all_opponents():
+    board = tuple(CARDS[index] for index in (32, 36, 40, 44, 1))
+    nuts = StageBetAI(board, _player(48, 3), 10, 2, rng=Random(1))
+    assert nuts.equity == 1
+    assert nuts.should_i_bet(10)[0] == Bet.RAISE
+
+    heads_up = StageBetAI(board, _player(10, 6), 10, 2, rng=Random(1))
+    multiway = StageBetAI(board, _player(10, 6), 10, 6, rng=Random(1))
+    assert multiway.equity < heads_up.equity
+    assert multiway.equity_ratio == pytest.approx(6 * multiway.equity)
+
+
+def test_flop_decision_is_sampled_within_the_time_budget(monkeypatch):
+    budgets = []
+
+    def sampled_equity(*args, **kwargs):
+        budgets.append(kwargs['time_budget'])
+        return monte_carlo_equity(*args, **kwargs)
+
+    monkeypatch.setattr(ai, 'monte_carlo_equity', sampled_equity)
+    monkeypatch.setattr(ai, 'equity_cache', lambda: None)
+    monkeypatch.setattr(ai, 'decisions_cache', DecisionCache(10_000, 1))
+    board = tuple(CARDS[index] for index in (0, 22, 29))
+    StageBetAI(board, _player(48, 49), 10, 2, rng=Random(1)).should_i_bet(10)
+    assert budgets == [EQUITY_TIME_BUDGET[3]]
+
+
+def test_flop_decisions_share_the_persistent_cache(monkeypatch, tmp_path):
+    cache = EquityCache(tmp_path / 'cache.sqlite')
+    monkeypatch.setattr(ai, 'equity_cache', lambda: cache)
+    board = tuple(CARDS[index] for index in (0, 22, 29))
+    for _ in range(2):
+        monkeypatch.setattr(ai, 'decisions_cache', DecisionCache(10_000, 1))
+        StageBetAI(board, _player(48, 49), 10, 2, rng=Random(1)).should_i_bet(10)
+    assert cache.stats() == (1, 1, 0, 1)
+    cache.close()
+
+
+def test_seeded_decisions_sample_the_same_equity(monkeypatch):
+    monkeypatch.setattr(ai, 'equity_cache', lambda: None)
+    board = tuple(CARDS[index] for index in (0, 22, 29))
+    equities = []
+    for _ in range(2):
+        monkeypatch.setattr(ai, 'decisions_cache', DecisionCache(10_000, 1))
+        equities.append(StageBetAI(board, _player(48, 49), 10, 4, rng=Random(5)).equity)
+    assert equities[0] == equities[1]
+
+
+def test_uncertain_flush_draw_is_played_on(monkeypatch):
+    monkeypatch.setattr(ai, 'equity_cache', lambda: None)
+    monkeypatch.setattr(ai, 'decisions_cache', DecisionCache(10_000, 1))
+    board = tuple(CARDS[index] for index in (46, 30, 3))  # Kh 9h 2c
+    draw = StageBetAI(board, _player(14, 10), 10, 2, rng=Random(1))  # 5h 4h
+    assert 0.79 <= draw.equity_ratio <= 1
+    assert draw.is_draw
+    assert draw.should_i_bet(10)[0] == Bet.RAISE
+
+    river = StageBetAI(board + (CARDS[5], CARDS[41]), _player(14, 10), 10, 2, rng=Random(1))
+    assert not river.is_draw
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from entities import batch_evaluator, evaluator
+
+
+@pytest.fixture(scope='module')
+def rng():
+    return np.random.default_rng()
+
+
+@pytest.mark.parametrize('number', [5, 6, 7])
+def test_batch_matches_single_evaluation(rng, number):
+    hands = np.argsort(rng.random((5000, 52)), axis=1)[:, :number]
+    expected = [evaluator.evaluate_indices(hand) for hand in hands.tolist()]
+    assert batch_evaluator.evaluate_batch(hands).tolist() == expected
+
+
+@pytest.mark.parametrize('number', [5, 6, 7])
+def test_masks_match_indices(rng, number):
+    hands = np.argsort(rng.random((5000, 52)), axis=1)[:, :number]
+    masks = batch_evaluator.indices_to_masks(hands)
+    assert (batch_evaluator.evaluate_masks(masks) == batch_evaluator.evaluate_batch(hands)).all()
+
+
+def test_flushes_in_batch():
+    spades = np.arange(1, 52, 4)
+    hands = np.array([spades[:7], spades[6:], [spades[12], spades[11], spades[10], spades[9], spades[8], 0, 2]])
+    strengths = batch_evaluator.evaluate_batch(hands)
+    assert [evaluator.category(strength) for strength in strengths] == [
+        evaluator.STRAIGHT_FLUSH, evaluator.ROYAL_FLUSH, evaluator.ROYAL_FLUSH]
+
+
+def test_extensions_match_batch(rng):
+    for _ in range(20):
+        cards = np.argsort(rng.random(52))
+        prefix, rest = cards[:5].tolist(), cards[5:]
+        extensions = np.array([rest[i:i + 2] for i in range(0, 46, 2)])
+        hands = np.hstack((np.broadcast_to(prefix, (len(extensions), 5)), extensions))
+        assert (batch_evaluator.evaluate_extensions(prefix, extensions) == batch_evaluator.evaluate_batch(hands)).all()
@@ -0,0 +1,70 @@
+from itertools import combinations
+from random import sample
+
+import pytest
+
+from ai.analytics_probability_finder import ProbabilityCounter
+from ai import board_texture as textures
+from ai.board_texture import BoardTexture, board_rank, board_texture, flop_textures, texture_features
+from entities.cards import CARDS
+from errors.errors import BoardTexturesError
+from tests.helpers import indices_of
+
+
+def test_flop_ranks_are_dense():
+    assert sorted(board_rank(flop) for flop in combinations(range(52), 3)) == list(range(22100))
+
+
+def test_canonical_flops():
+    flop_rows, features = flop_textures()
+    assert features.shape == (1755, 5)
+    assert len(set(flop_rows.tolist())) == 1755
+
+
+def test_missing_textures_file_is_generated(tmp_path):
+    path = tmp_path / 'missing' / 'textures.bin'
+    flop_rows, features = textures.load_or_build_flop_textures(path)
+    assert path.exists()
+    assert isinstance(flop_rows.base, memoryview)
+    saved_rows, saved_features = flop_textures()
+    assert (flop_rows == saved_rows).all() and (features == saved_features).all()
+
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(data)
+    with pytest.raises(BoardTexturesError):
+        textures.load_flop_textures(path)
+
+
+@pytest.mark.parametrize(('board', 'texture'), [
+    (('2d', '7s', '9h'), BoardTexture(0, 1, 0, 7, 3)),
+    (('Ad', 'As', 'Ah'), BoardTexture(2, 1, 0, 12, 7)),
+    (('Kd', 'Ks', '5d'), BoardTexture(1, 2, 0, 11, 7)),
+    (('Td', 'Jd', 'Qd'), BoardTexture(0, 3, 3, 10, 9)),
+    (('Ad', '2s', '3h'), BoardTexture(0, 1, 1, 12, 4)),
+    (('Td', 'Jd', 'Qd', 'Kd'), BoardTexture(0, 4, 3, 11, 9)),
+    (('2d', '2s', '7h', '7c', 'Kd'), BoardTexture(2, 2, 0, 11, 7)),
+], ids=str)
+def test_board_texture(board, texture):
+    assert board_texture(indices_of(*board)) == texture
+
+
+def test_flops_match_calculated_features():
+    for flop in sample(list(combinations(range(52), 3)), 200):
+        assert board_texture(flop) == texture_features(flop)
+
+
+def test_high_card_class():
+    assert board_texture(indices_of('2d', '7s', '8h')).high_card_class == 0
+    assert board_texture(indices_of('2d', '7s', 'Jh')).high_card_class == 1
+    assert board_texture(indices_of('2d', '7s', 'Qh')).high_card_class == 2
+
+
+def test_board_size():
+    with pytest.raises(ValueError):
+        board_texture(indices_of('2d', '7s'))
+
+
+def test_probability_counter_texture():
+    assert ProbabilityCounter(CARDS[:2]).texture is None
+    assert ProbabilityCounter(CARDS[:2], CARDS[4:7]).texture == board_texture(range(4, 7))
@@ -0,0 +1,39 @@
+from itertools import combinations, permutations
+from random import sample
+
+import pytest
+
+from ai.canonical import apply_suit_map, canonicalize, inverse_suit_map
+
+
+def _rename_suits(indices, suits):
+    return [index & ~3 | suits[index & 3] for index in indices]
+
+
+@pytest.mark.parametrize('board_size', [0, 3, 4, 5])
+def test_isomorphic_situations_are_equal(board_size):
+    for _ in range(50):
+        cards = sample(range(52), 2 + board_size)
+        situation = canonicalize(cards[:2], cards[2:])
+        for suits in permutations(range(4)):
+            renamed = _rename_suits(cards, suits)
+            assert canonicalize(renamed[:2], renamed[2:]).key == situation.key
+
+
+def test_suit_map_gives_canonical_cards_back():
+    cards = sample(range(52), 5)
+    situation = canonicalize(cards[:2], cards[2:])
+    assert apply_suit_map(cards[:2], situation.suit_map) == situation.hand
+    assert apply_suit_map(situation.board, inverse_suit_map(situation.suit_map)) == tuple(sorted(cards[2:]))
+
+
+def test_hand_and_board_are_not_mixed():
+    assert canonicalize([0, 4], [8]).key != canonicalize([0, 8], [4]).key
+
+
+def test_number_of_canonical_starting_hands():
+    assert len({canonicalize(hand).key for hand in combinations(range(52), 2)}) == 169
+
+
+def test_number_of_canonical_flops():
+    assert len({canonicalize((), flop).key for flop in combinations(range(52), 3)}) == 1755
@@ -1,6 +1,7 @@
 import pytest
 
-from entities.cards import Deck, Value, Card, VALUES, SUITS
+from entities.cards import Deck, Value, Card, VALUES, SUITS, CARDS, ZERO_ACE, cards_mask, indices_mask, \
+    mask_cards, remaining_cards
 
 
 def test_all_cards_hashes_are_uniq():
@@ -26,14 +27,43 @@ def test_hiding_a_card_reduces_the_deck():
 
 def test_shuffle_makes_different_order():
     deck = Deck()
-    initial_order = deck._order.copy()
-    matches = 0
+    initial_order = [deck.draw_one() for _ in range(52)]
     deck.mix()
-    assert len(deck._order) == len(initial_order) == 52
-    for i in range(52):
-        if deck._order[i] == initial_order[i]:
-            matches += 1
-    assert matches < 30
+    assert deck.cards_left == 52
+    order = [deck.draw_one() for _ in range(52)]
+    assert sorted(order, key=hash) == sorted(initial_order, key=hash)
+    assert sum(card is initial_card for card, initial_card in zip(order, initial_order)) < 30
+
+
+def test_known_cards_are_removed():
+    deck = Deck()
+    deck.remove((CARDS[3], CARDS[40]))
+    assert deck.cards_left == 50
+    dealt = {deck.draw_one().index for _ in range(50)}
+    assert dealt == set(range(52)) - {3, 40}
+    with pytest.raises(ValueError):
+        deck.remove((CARDS[3],))
+
+
+def test_partial_shuffle_is_uniform():
+    counts = [0] * 52
+    deck = Deck()
+    for _ in range(5200):
+        deck.mix()
+        deck.hide_one()
+        counts[deck.draw_one().index] += 1
+    assert min(counts) > 50 and max(counts) < 160
+
+
+def test_restored_deck_deals_the_same_cards():
+    deck = Deck()
+    deck.draw_one()
+    snapshot = deck.snapshot()
+    first = [deck.draw_one().index for _ in range(10)]
+    deck.mix()
+    deck.restore(snapshot)
+    assert deck.cards_left == 51
+    assert [deck.draw_one().index for _ in range(10)] == first
 
 
 def test_card_values_equality():
@@ -66,3 +96,39 @@ def test_card_repr():
     """The name of card should be formed from the Value and Suit right"""
     a = Card(SUITS[0], Value(14, 'Ace', 'A'))
     assert repr(a) == repr(a.value) + repr(a.suit)
+
+
+def test_interned_cards_are_indexed_in_order():
+    assert len(CARDS) == 52
+    for i, card in enumerate(CARDS):
+        assert card.index == i
+        assert Card(card.suit, card.value).index == i
+
+
+def test_zero_ace_has_ace_index():
+    assert Card(SUITS[2], ZERO_ACE).index == Card(SUITS[2], VALUES[-1]).index
+
+
+def test_cards_mask_round_trip():
+    cards = (CARDS[0], CARDS[17], CARDS[51])
+    mask = cards_mask(cards)
+    assert mask.bit_count() == 3
+    assert mask_cards(mask) == cards
+
+
+def test_indices_mask_is_cards_mask():
+    assert indices_mask((0, 17, 51)) == cards_mask((CARDS[0], CARDS[17], CARDS[51])) == 1 | 1 << 17 | 1 << 51
+
+
+def test_remaining_cards_excludes_known():
+    known = (CARDS[3], CARDS[40])
+    rest = remaining_cards(known)
+    assert len(rest) == 50
+    assert not cards_mask(rest) & cards_mask(known)
+
+
+def test_deck_draws_interned_cards():
+    deck = Deck()
+    for _ in range(52):
+        card = deck.draw_one()
+        assert card is CARDS[card.index]
@@ -0,0 +1,57 @@
+from ai.decision_cache import DecisionCache, deep_sizeof
+
+
+def test_get_or_calculate():
+    cache = DecisionCache(max_bytes=10_000, ttl_rounds=2)
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_calculate(('key', 1), lambda value: calls.append(value) or value * 2, 21) == 42
+    assert calls == [21]
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (2, 1, 1)
+    assert stats.size == deep_sizeof(('key', 1)) + deep_sizeof(42)
+
+
+def test_size_bound_evicts_least_recently_used():
+    entry_size = deep_sizeof(0) + deep_sizeof('value')
+    cache = DecisionCache(max_bytes=3 * entry_size, ttl_rounds=10)
+    for key in range(3):
+        cache.put(key, 'value')
+    cache.get(0)
+    cache.put(3, 'value')
+    assert cache.get(1) is None
+    assert cache.get(0) == 'value'
+    assert cache.stats().evictions == 1
+    assert cache.stats().size <= cache.max_bytes
+
+
+def test_entries_expire_after_rounds():
+    cache = DecisionCache(max_bytes=10_000, ttl_rounds=2)
+    cache.put('old', 1)
+    cache.new_round()
+    cache.put('new', 2)
+    cache.new_round()
+    assert cache.get('old') is None
+    assert cache.get('new') == 2
+    cache.new_round()
+    assert cache.stats().entries == 0
+    assert cache.stats().expirations == 2
+    assert cache.stats().size == 0
+
+
+def test_too_big_value_is_not_stored():
+    cache = DecisionCache(max_bytes=100, ttl_rounds=2)
+    cache.put('key', list(range(100)))
+    assert cache.get('key') is None
+
+
+def test_stored_again_entry_moves_to_the_new_round():
+    cache = DecisionCache(max_bytes=10_000, ttl_rounds=2)
+    cache.put('key', 1)
+    cache.new_round()
+    cache.put('key', 2)
+    cache.new_round()
+    assert cache.get('key') == 2
+    assert list(cache._rounds) == [1]
+    cache.new_round()
+    assert cache.stats().entries == 0 and not cache._rounds
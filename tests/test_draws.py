@@ -0,0 +1,55 @@
+from itertools import combinations
+from random import sample
+
+import pytest
+
+from ai.analytics_probability_finder import ProbabilityCounter
+from ai.draws import analyse_draws, straight_completions
+from entities.cards import CARDS
+from entities.evaluator import category, evaluate_indices
+from tests.helpers import indices_of
+
+
+@pytest.mark.parametrize(('hand', 'board', 'flush_draw', 'open_ended', 'gutshot'), [
+    (('9d', '8d'), ('7d', '6s', '2d'), True, True, False),
+    (('Ad', '5s'), ('2d', '3s', 'Kh'), False, False, True),
+    (('9d', '9s'), ('2d', '7h', 'Kc'), False, False, False),
+    (('Ad', 'Kd'), ('Qd', 'Jd', '2s', '3c'), True, False, True),
+    (('2h', '3c'), ('Qd', 'Jd', 'Td', '9d'), False, False, False),
+], ids=str)
+def test_draws(hand, board, flush_draw, open_ended, gutshot):
+    analysis = analyse_draws(indices_of(*hand), indices_of(*board))
+    assert (analysis.flush_draw, analysis.open_ended, analysis.gutshot) == (flush_draw, open_ended, gutshot)
+
+
+def test_wheel_gutshot_completes_with_three():
+    assert straight_completions(indices_of('Ad', '5s'), indices_of('2d', '4s', 'Kh')) == 1 << 1
+
+
+@pytest.mark.parametrize('board_size', [3, 4])
+def test_outs_and_probabilities_match_brute_force(board_size):
+    for _ in range(20):
+        cards = sample(range(52), 2 + board_size)
+        analysis = analyse_draws(cards[:2], cards[2:])
+        current = category(evaluate_indices(cards))
+        rest = [index for index in range(52) if index not in cards]
+        outs = {}
+        for index in rest:
+            priority = category(evaluate_indices(cards + [index]))
+            if priority > current:
+                outs[priority] = outs.get(priority, 0) | 1 << index
+        assert {combination.priority: mask for combination, mask in analysis.outs.items()} == outs
+        assert sum(analysis.next_card.values()) == pytest.approx(analysis.total_outs / len(rest))
+
+        runouts = list(combinations(rest, 5 - board_size))
+        improved = sum(category(evaluate_indices(cards + list(runout))) > current for runout in runouts)
+        assert analysis.improvement_by_river == pytest.approx(improved / len(runouts))
+
+
+def test_probability_counter_draws():
+    hand = [CARDS[index] for index in indices_of('9d', '8d')]
+    board = [CARDS[index] for index in indices_of('7d', '6s', '2d')]
+    counter = ProbabilityCounter(hand, board)
+    assert counter.draws.outs_number(counter.draws.combination) == 0
+    assert counter.draws.total_outs == 14 + 6 + 9
+    assert ProbabilityCounter(hand).draws is None
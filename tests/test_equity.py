@@ -0,0 +1,90 @@
+from itertools import combinations
+from random import sample
+from time import perf_counter
+
+import numpy as np
+import pytest
+
+from ai.equity import EquityResult, exact_equity, monte_carlo_equity, multiway_scores
+from common.helpers import n_choose_k
+from entities.evaluator import evaluate_indices
+
+
+def _brute_force_equity(hand, board):
+    rest = [index for index in range(52) if index not in hand + board]
+    wins = ties = losses = 0
+    for runout in combinations(rest, 5 - len(board)):
+        full_board = board + list(runout)
+        hero = evaluate_indices(hand + full_board)
+        for opponent in combinations([index for index in rest if index not in runout], 2):
+            strength = evaluate_indices(list(opponent) + full_board)
+            wins += strength < hero
+            ties += strength == hero
+            losses += strength > hero
+    return EquityResult(wins, ties, losses)
+
+
+@pytest.mark.parametrize('board_size', [4, 5])
+def test_exact_equity_matches_brute_force(board_size):
+    cards = sample(range(52), 2 + board_size)
+    assert exact_equity(cards[:2], cards[2:]) == _brute_force_equity(cards[:2], cards[2:])
+
+
+def test_all_flop_situations_are_counted():
+    cards = sample(range(52), 5)
+    assert exact_equity(cards[:2], cards[2:]).total == n_choose_k(47, 2) * n_choose_k(45, 2)
+
+
+def test_dead_cards_are_excluded():
+    cards = sample(range(52), 8)
+    assert exact_equity(cards[:2], cards[2:7], dead=cards[7:]).total == n_choose_k(44, 2)
+
+
+def test_top_set_is_favourite():
+    aces, board = [48, 49], [50, 21, 6]
+    assert exact_equity(aces, board).equity > 0.9
+
+
+def test_equity_results_sum():
+    assert EquityResult(1, 2, 3) + EquityResult(4, 5, 6) == EquityResult(5, 7, 9)
+    assert EquityResult(1, 2, 1).equity == 0.5
+
+
+def test_monte_carlo_is_close_to_exact():
+    cards = sample(range(52), 5)
+    exact = exact_equity(cards[:2], cards[2:]).equity
+    estimate = monte_carlo_equity(cards[:2], cards[2:], max_samples=20_000, rng=np.random.default_rng(1))
+    assert estimate.samples == 20_000
+    assert abs(estimate.equity - exact) < 5 * estimate.standard_error + 1e-9
+    low, high = estimate.confidence_interval()
+    assert low <= estimate.equity <= high
+
+
+def test_monte_carlo_stops_at_target_error():
+    estimate = monte_carlo_equity([48, 49], max_samples=10 ** 9, target_error=0.01)
+    assert estimate.standard_error <= 0.01
+    assert estimate.samples < 10 ** 9
+
+
+def test_monte_carlo_stops_at_time_budget():
+    started = perf_counter()
+    estimate = monte_carlo_equity([48, 49], max_samples=10 ** 9, time_budget=0.05)
+    assert perf_counter() - started < 1
+    assert estimate.samples >= 1000
+
+
+def test_multiway_scores_split_the_pot():
+    hero = np.array([10, 10, 10, 5])
+    opponents = np.array([[9, 8], [10, 3], [10, 10], [6, 1]])
+    assert multiway_scores(hero, opponents).tolist() == [1.0, 0.5, 1 / 3, 0.0]
+
+
+@pytest.mark.parametrize(('opponents', 'expected'), [(1, 0.852), (2, 0.735), (5, 0.492)])
+def test_pocket_aces_against_several_opponents(opponents, expected):
+    estimate = monte_carlo_equity([48, 49], opponents=opponents, max_samples=50_000, rng=np.random.default_rng(2))
+    assert abs(estimate.equity - expected) < 5 * estimate.standard_error
+
+
+def test_too_many_opponents():
+    with pytest.raises(ValueError):
+        monte_carlo_equity([48, 49], list(range(5)), opponents=23)
@@ -0,0 +1,64 @@
+import pytest
+
+from ai.canonical import canonicalize
+from ai.equity_cache import EquityCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    equity_cache = EquityCache(tmp_path / 'cache.sqlite', max_entries=10, eviction_share=0.2)
+    yield equity_cache
+    equity_cache.close()
+
+
+def test_read_through(cache):
+    calls = []
+    situation = canonicalize((48, 49), (0, 22, 29))
+    for _ in range(3):
+        assert cache.equity(situation, 1, lambda: calls.append(1) or 0.75) == 0.75
+    assert len(calls) == 1
+    assert cache.stats()[:2] == (2, 1)
+
+
+def test_isomorphic_situations_share_entries(cache):
+    cache.put(canonicalize((48, 49), (0, 22, 29)), 1, 0.75)
+    assert cache.get(canonicalize((50, 51), (2, 20, 31)), 1) == 0.75
+    assert cache.get(canonicalize((50, 51), (2, 20, 31)), 2) is None
+
+
+def test_entries_are_persisted(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    first = EquityCache(path)
+    first.put(canonicalize((48, 49), (0, 22, 29)), 1, 0.75)
+    first.close()
+    second = EquityCache(path)
+    assert second.get(canonicalize((48, 49), (0, 22, 29)), 1) == 0.75
+    assert second.stats().entries == 1
+    second.close()
+
+
+def test_least_recently_used_are_evicted(cache):
+    situation = canonicalize((48, 49), (0, 22, 29))
+    for opponents in range(1, 11):
+        cache.put(situation, opponents, 0.5)
+    cache.get(situation, 1)
+    cache.put(situation, 11, 0.5)
+    stats = cache.stats()
+    assert stats.entries == 8
+    assert stats.evictions == 3
+    assert cache.get(situation, 1) == 0.5
+    assert cache.get(situation, 2) is None
+
+
+def test_hits_are_written_in_batches(tmp_path):
+    cache = EquityCache(tmp_path / 'cache.sqlite', used_batch=2)
+    situation = canonicalize((48, 49), (0, 22, 29))
+    cache.put(situation, 1, 0.75)
+    cache.put(situation, 2, 0.6)
+    changes = cache._connection.total_changes
+    cache.get(situation, 1)
+    cache.get(situation, 1)
+    assert cache._connection.total_changes == changes
+    cache.get(situation, 2)
+    assert cache._connection.total_changes == changes + 2
+    cache.close()
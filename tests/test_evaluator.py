@@ -0,0 +1,131 @@
+from array import array
+from itertools import combinations
+from random import sample
+
+import pytest
+
+from entities import evaluator
+from entities.cards import CARDS
+from entities.combinations import best_hand, combination_of
+from errors import errors
+from tests.helpers import cards_of
+
+
+@pytest.mark.parametrize(('names', 'name'), [
+    (('2d', '5s', '9h', 'Jc', 'Kd', '3h', '7c'), 'high_card'),
+    (('2d', '2s', '9h', 'Jc', 'Kd', '3h', '7c'), 'pair'),
+    (('2d', '2s', '9h', '9c', 'Kd', 'Kh', '7c'), 'two_pairs'),
+    (('2d', '2s', '2h', '9c', 'Kd', '3h', '7c'), 'three_of_a_kind'),
+    (('Ad', '2s', '3h', '4c', '5d', 'Kh', 'Kc'), 'straight'),
+    (('Ad', '2d', '9d', '4d', '5d', 'Kh', '5c'), 'flush'),
+    (('2d', '2s', '2h', '9c', '9d', '9h', '7c'), 'full_house'),
+    (('2d', '2s', '2h', '2c', 'Kd', 'Kh', 'Kc'), 'four_of_a_kind'),
+    (('Ad', '2d', '3d', '4d', '5d', 'Kh', 'Kc'), 'straight_flush'),
+    (('Ts', 'Js', 'Qs', 'Ks', 'As', '9s', '8s'), 'royal_flush'),
+], ids=str)
+def test_categories(names, name):
+    cards = cards_of(*names)
+    assert combination_of(evaluator.evaluate(cards)).name == name
+    assert best_hand(cards)[0].name == name
+
+
+@pytest.mark.parametrize(('weaker', 'stronger'), [
+    (('Ad', '2s', '3h', '4c', '5d'), ('2d', '3s', '4h', '5c', '6d')),
+    (('Ad', 'Ks', '9h', '9c', '5d'), ('Ad', 'Ks', '9h', '9c', '6d')),
+    (('Kd', 'Ks', '9h', '9c', 'Ad', '2c', '2d'), ('Kd', 'Ks', 'Th', 'Tc', '3d', '2c', '2s')),
+    (('8h', '8c', '8s', 'Ad', 'Ah'), ('9h', '9c', '9s', '2d', '2h')),
+    (('Ad', 'Kd', 'Qd', 'Jd', '9d'), ('2h', '2c', '2s', '3d', '3h')),
+], ids=str)
+def test_stronger_hand_has_bigger_strength(weaker, stronger):
+    assert evaluator.evaluate(cards_of(*weaker)) < evaluator.evaluate(cards_of(*stronger))
+
+
+def test_equal_hands_of_different_suits():
+    first = cards_of('Ad', 'Kd', '9h', '9c', '5d', '3s', '2s')
+    second = cards_of('Ah', 'Ks', '9s', '9d', '5c', '3h', '2h')
+    assert evaluator.evaluate(first) == evaluator.evaluate(second)
+
+
+@pytest.mark.parametrize('number', [6, 7])
+def test_best_of_five_card_subsets(number):
+    for _ in range(200):
+        indices = sample(range(len(CARDS)), number)
+        expected = max(evaluator.evaluate_indices(hand) for hand in combinations(indices, 5))
+        assert evaluator.evaluate_indices(indices) == expected
+
+
+def test_strengths_cover_all_categories():
+    values_table, flushes_table = evaluator.tables()
+    strengths = set(values_table) | set(flushes_table)
+    strengths.discard(0)
+    assert strengths == set(range(1, evaluator.MAX_STRENGTH + 1))
+    for category, start in enumerate(evaluator.CATEGORY_STARTS):
+        assert evaluator.category(start) == category
+        assert evaluator.category(start - 1) == category - 1
+
+
+def test_wrong_number_of_cards():
+    with pytest.raises(ValueError):
+        evaluator.evaluate(CARDS[:4])
+
+
+def test_hand_state_matches_evaluation():
+    for _ in range(200):
+        indices = sample(range(len(CARDS)), 7)
+        state = evaluator.HandState.of(indices[:2])
+        for index in indices[2:]:
+            state = state.add(index)
+        assert len(state) == 7
+        assert state.strength() == evaluator.evaluate_indices(indices)
+        assert (evaluator.HandState.of(indices[:2]) + evaluator.HandState.of(indices[2:])).strength() == \
+               state.strength()
+
+
+@pytest.mark.parametrize('number', [1, 2])
+def test_hand_state_completions(number):
+    known = sample(range(len(CARDS)), 7 - number)
+    rest = [index for index in range(len(CARDS)) if index not in known]
+    expected = [evaluator.evaluate_indices(known + list(cards)) for cards in combinations(rest, number)]
+    state = evaluator.HandState.of(known)
+    assert list(state.completions_strengths(rest, number)) == expected
+    assert [completed.strength() for completed in state.completions(rest, number)] == expected
+
+
+@pytest.fixture(scope='module')
+def tables_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp('tables') / 'tables.bin'
+    values_table, flushes_table = evaluator.tables()
+    evaluator.save_tables(path, array('H', values_table), array('H', flushes_table))
+    return path
+
+
+def test_tables_file_round_trip(tables_file):
+    values_table, flushes_table = evaluator.load_tables(tables_file)
+    assert list(flushes_table) == list(evaluator.tables()[1])
+    assert values_table[evaluator.VALUE_WEIGHTS[12] * 4 + evaluator.VALUE_WEIGHTS[11]] == \
+           evaluator.CATEGORY_STARTS[evaluator.STRAIGHT_FLUSH] - 1
+
+
+def test_corrupted_tables_file(tables_file, tmp_path):
+    corrupted = tmp_path / 'corrupted.bin'
+    data = bytearray(tables_file.read_bytes())
+    data[-1] ^= 0xFF
+    corrupted.write_bytes(data)
+    with pytest.raises(errors.EvaluatorTablesError):
+        evaluator.load_tables(corrupted)
+
+
+def test_tables_file_of_another_version(tables_file, tmp_path):
+    other = tmp_path / 'other.bin'
+    data = bytearray(tables_file.read_bytes())
+    data[4] += 1
+    other.write_bytes(data)
+    with pytest.raises(errors.EvaluatorTablesError):
+        evaluator.load_tables(other)
+
+
+def test_missing_tables_file_is_generated(tmp_path):
+    path = tmp_path / 'missing' / 'tables.bin'
+    values_table, _ = evaluator.load_or_build_tables(path)
+    assert path.exists()
+    assert isinstance(values_table, memoryview)
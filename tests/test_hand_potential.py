@@ -0,0 +1,59 @@
+from itertools import combinations
+from random import sample
+
+import numpy as np
+import pytest
+
+from ai.equity import exact_equity
+from ai.hand_potential import hand_potential
+from ai.ranges import Range
+from entities.bet import Bet
+from entities.evaluator import evaluate_indices
+
+
+def _brute_force_potential(hand, board):
+    rest = [index for index in range(52) if index not in hand + board]
+    counts = np.zeros((3, 3))
+    for opponent in combinations(rest, 2):
+        hero, villain = evaluate_indices(hand + board), evaluate_indices(list(opponent) + board)
+        now = 0 if hero > villain else 1 if hero == villain else 2
+        for runout in combinations([index for index in rest if index not in opponent], 5 - len(board)):
+            hero, villain = evaluate_indices(hand + board + list(runout)), \
+                evaluate_indices(list(opponent) + board + list(runout))
+            counts[now, 0 if hero > villain else 1 if hero == villain else 2] += 1
+    totals = counts.sum(axis=1)
+    positive = (counts[2, 0] + counts[2, 1] / 2 + counts[1, 0] / 2) / (totals[2] + totals[1] / 2)
+    negative = (counts[0, 2] + counts[1, 2] / 2 + counts[0, 1] / 2) / (totals[0] + totals[1] / 2)
+    return (totals[0] + totals[1] / 2) / totals.sum(), positive, negative
+
+
+def test_potential_matches_brute_force():
+    cards = sample(range(52), 6)
+    potential = hand_potential(cards[:2], cards[2:])
+    strength, positive, negative = _brute_force_potential(cards[:2], cards[2:])
+    assert potential.hand_strength == pytest.approx(strength)
+    assert potential.positive_potential == pytest.approx(positive)
+    assert potential.negative_potential == pytest.approx(negative)
+
+
+def test_effective_strength_against_all_hands_is_equity():
+    potential = hand_potential((48, 49), (0, 22, 29))
+    assert potential.effective_strength == pytest.approx(exact_equity((48, 49), (0, 22, 29)).equity)
+    assert potential.equity == pytest.approx(potential.effective_strength)
+    assert 0 < potential.effective_strength_squared < potential.effective_strength
+
+
+def test_river_has_no_potential():
+    potential = hand_potential((48, 49), (0, 22, 29, 33, 5))
+    assert potential.positive_potential == potential.negative_potential == 0
+    assert potential.effective_strength == potential.hand_strength
+
+
+def test_range_and_sampled_runouts():
+    opponent_range = Range()
+    opponent_range.update(Bet.RAISE, (0, 22, 29))
+    exact = hand_potential((48, 49), (0, 22, 29), opponent_range)
+    sampled = hand_potential((48, 49), (0, 22, 29), opponent_range, max_runouts=300, rng=np.random.default_rng(1))
+    assert exact.hand_strength < hand_potential((48, 49), (0, 22, 29)).hand_strength
+    assert sampled.hand_strength == pytest.approx(exact.hand_strength, abs=0.01)
+    assert sampled.equity == pytest.approx(exact.equity, abs=0.03)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from ai import equity, parallel_equity
+from ai.parallel_equity import ParallelEquity
+from entities import batch_evaluator
+
+
+@pytest.fixture(scope='module')
+def pool():
+    with ParallelEquity(2) as parallel:
+        yield parallel
+
+
+@pytest.mark.parametrize('board', [(0, 22, 29), (0, 22, 29, 33), (0, 22, 29, 33, 5)], ids=str)
+def test_exact_equity_matches_one_process(pool, board):
+    assert pool.exact_equity((48, 49), board) == equity.exact_equity((48, 49), board)
+
+
+def test_monte_carlo_is_reproducible_with_seed(pool):
+    first = pool.monte_carlo_equity((48, 49), opponents=2, samples=20_000, seed=7)
+    second = pool.monte_carlo_equity((48, 49), opponents=2, samples=20_000, seed=7)
+    assert first == second
+    assert first.samples == 20_000
+    assert 0.70 < first.equity < 0.77
+
+
+def _batch_tables_are_shared(_) -> bool:
+    shared = np.frombuffer(parallel_equity._attached_memory.buf, dtype=np.uint8)
+    start, end = shared.ctypes.data, shared.ctypes.data + shared.nbytes
+    return all(start <= table.ctypes.data < end for table in batch_evaluator.tables())
+
+
+def test_workers_evaluate_batches_on_shared_tables():
+    batch_evaluator.tables()
+    with ParallelEquity(1) as parallel:
+        assert all(parallel.map(_batch_tables_are_shared, [0]))
+
+
+def test_merged_estimates():
+    merged = equity.EquityEstimate(0.5, 0.05, 100) + equity.EquityEstimate(0.5, 0.05, 100)
+    assert merged.samples == 200
+    assert merged.equity == pytest.approx(0.5)
+    assert merged.standard_error == pytest.approx(0.05 / 2 ** 0.5, rel=1e-2)
@@ -0,0 +1,97 @@
+import gc
+
+import pytest
+
+from ai.players_history import PlayersHistory
+from entities.bet import Bet, Decision
+from entities.cards import CARDS
+from entities.players import Player
+from entities.pot import Pot
+from entities.round import Round
+
+
+def _move(history: PlayersHistory, player: Player, action: Bet, size: float = 0, requested_bet: float = 0):
+    player.ask_for_a_decision(requested_bet)
+    player.decision = Decision(action, size)
+    history.player_moved(player)
+
+
+@pytest.fixture
+def history():
+    return PlayersHistory(history_size=4)
+
+
+def test_preflop_stats(history):
+    player = Player(1000)
+    pot = Pot([player])
+    history.new_stage([], pot)
+    player.post_blind(10)
+    history.player_moved(player)
+    _move(history, player, Bet.RAISE, 40, requested_bet=20)
+    _move(history, player, Bet.CALL, 80, requested_bet=80)
+    history.new_stage([], pot)
+    _move(history, player, Bet.FOLD, requested_bet=20)
+    stats = history.stats(player)
+    assert stats.rounds == 2
+    assert stats.vpip == 0.5
+    assert stats.pfr == 0.5
+    assert stats.fold_to_bet(1) == pytest.approx(1 / 3)
+
+
+def test_postflop_stats(history):
+    player = Player(1000)
+    pot = Pot([player])
+    history.new_stage([], pot)
+    _move(history, player, Bet.CHECK)
+    history.new_stage(CARDS[:3], pot)
+    _move(history, player, Bet.RAISE, 20)
+    _move(history, player, Bet.CALL, 60, requested_bet=60)
+    history.new_stage(CARDS[:4], pot)
+    _move(history, player, Bet.FOLD, requested_bet=30)
+    stats = history.stats(player)
+    assert stats.vpip == 0
+    assert stats.aggression_factor == 1
+    assert stats.fold_to_bet(2) == 0
+    assert stats.fold_to_bet(3) == 1
+    assert stats.fold_to_bet(4) is None
+
+
+def test_history_is_bounded(history):
+    player = Player(1000)
+    pot = Pot([player])
+    for _ in range(10):
+        history.new_stage([], pot)
+        _move(history, player, Bet.CALL, 20, requested_bet=20)
+    stats = history.stats(player)
+    assert len(stats.moves) == 4
+    assert stats.moves[-1].round == 10
+    assert stats.rounds == 10
+    assert stats.vpip == 1
+
+
+def test_stats_are_dropped_with_the_player(history):
+    player = Player(1000)
+    game_round = Round([player, Player(1000)], 1, 10, True)
+    history.new_stage([], game_round.pot)
+    _move(history, player, Bet.CHECK)
+    assert len(history.players) == 1
+    history.round_end(game_round)
+    del player, game_round
+    gc.collect()
+    assert len(history.players) == 0
+
+
+def test_rounds_are_kept_apart(history):
+    first, second = Player(1000), Player(1000)
+    first_round, second_round = Round([first, Player(1000)], 1, 10, True), Round([second, Player(1000)], 1, 10, True)
+    history.new_stage([], first_round.pot)
+    history.new_stage([], second_round.pot)
+    history.new_stage(CARDS[:3], first_round.pot)
+    _move(history, second, Bet.CALL, 20, requested_bet=20)
+    _move(history, first, Bet.CHECK)
+    assert history.stats(second).moves[-1].stage == 1
+    assert history.stats(first).moves[-1].stage == 2
+    history.round_end(first_round)
+    assert first_round.pot not in history.rounds and first not in history.playing
+    _move(history, first, Bet.CHECK)
+    assert len(history.stats(first).moves) == 1
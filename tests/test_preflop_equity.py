@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from ai import ai, preflop_equity
+from ai.preflop_equity import PreFlopEquityTable, POCKETS, STARTING_HANDS, STARTING_HAND_COMBOS
+from entities.cards import CARDS
+from entities.players import Player
+from errors import errors
+
+
+def test_pocket_indices():
+    assert [preflop_equity.pocket_index(pocket) for pocket in POCKETS] == list(range(len(POCKETS)))
+    assert preflop_equity.pocket_index((49, 48)) == preflop_equity.pocket_index((48, 49))
+
+
+def test_starting_hands():
+    assert len(STARTING_HANDS) == 169
+    assert sorted(set(STARTING_HAND_COMBOS)) == [4, 6, 12]
+    assert preflop_equity.starting_hand_index((48, 49)) == preflop_equity.starting_hand_index((50, 51))
+    assert preflop_equity.starting_hand_index((48, 44)) != preflop_equity.starting_hand_index((48, 45))
+
+
+@pytest.fixture(scope='module')
+def table(tmp_path_factory):
+    rng = np.random.default_rng(1)
+    multiway = rng.random(preflop_equity.MULTIWAY_SHAPE)
+    heads_up = rng.random(preflop_equity.HEADS_UP_SHAPE)
+    path = tmp_path_factory.mktemp('preflop') / 'preflop.bin'
+    preflop_equity.save_tables(path, multiway, heads_up, 10, 10)
+    return path
+
+
+def test_tables_file_round_trip(table):
+    loaded = preflop_equity.load_tables(table)
+    aces = STARTING_HANDS.index((48, 49))
+    assert loaded.equity((50, 51), 3) == pytest.approx(loaded.multiway[aces, 2] / preflop_equity.EQUITY_SCALE)
+    # the tables are read from the mapped file without copies
+    assert not loaded.multiway.flags.owndata and not loaded.heads_up_rows.flags.owndata
+    assert 0 <= loaded.percentile((50, 51), 3) < 1
+
+
+def test_corrupted_tables_file(table, tmp_path):
+    corrupted = tmp_path / 'corrupted.bin'
+    data = bytearray(table.read_bytes())
+    data[-1] ^= 0xFF
+    corrupted.write_bytes(data)
+    with pytest.raises(errors.EquityTablesError):
+        preflop_equity.load_tables(corrupted)
+
+
+def test_heads_up_lookup_is_suit_isomorphic(table):
+    loaded = preflop_equity.load_tables(table)
+    # AsKs against 2h2c and AhKh against 2s2c after swapping spades and hearts
+    assert loaded.heads_up((49, 45), (2, 3)) == loaded.heads_up((50, 46), (1, 3))
+    matrix = loaded.heads_up_matrix
+    hand, opponent = preflop_equity.pocket_index((49, 45)), preflop_equity.pocket_index((2, 3))
+    assert matrix[hand, opponent] == loaded.heads_up((49, 45), (2, 3))
+
+
+def test_sampled_heads_up_equity():
+    seed = np.random.SeedSequence(1)
+    aces_against_kings, = preflop_equity._heads_up_equities([((48, 49), (44, 45))], 20_000, seed)
+    assert aces_against_kings == pytest.approx(0.82, abs=0.02)
+
+
+def test_decider_uses_percentile(monkeypatch):
+    multiway = np.tile(np.linspace(0, 1, len(STARTING_HANDS))[:, None], (1, preflop_equity.MAX_OPPONENTS))
+    table = PreFlopEquityTable(multiway, np.zeros(preflop_equity.HEADS_UP_SHAPE))
+    monkeypatch.setattr(ai, 'preflop_table', lambda: table)
+    player = Player(100)
+    player.add_card(CARDS[51])
+    player.add_card(CARDS[50])
+    decider = ai.PreFlopDecider(player, opponents=12)
+    assert decider.opponents == preflop_equity.MAX_OPPONENTS
+    assert decider.weight() == table.percentile((51, 50), preflop_equity.MAX_OPPONENTS)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from ai import ranges
+from ai.equity import exact_equity
+from ai.preflop_equity import pocket_index
+from ai.ranges import Range, RangeTracker, range_equity, sampled_range_equity
+from entities.bet import Bet, Decision
+from entities.cards import CARDS
+from entities.players import Player
+from entities.pot import Pot
+from entities.round import Round
+
+BOARD = (0, 22, 29)
+
+
+def test_card_removal():
+    opponent_range = Range()
+    opponent_range.remove_cards(BOARD)
+    assert opponent_range.size == 49 * 48 // 2
+    assert opponent_range.weight((0, 1)) == 0
+
+
+def test_strengths_on_board():
+    strengths = ranges.pocket_strengths(BOARD)
+    # trips of the board's two beat a pair of aces
+    assert strengths[pocket_index((1, 2))] > strengths[pocket_index((48, 49))]
+    assert strengths[pocket_index((0, 1))] == 0
+    assert 0 <= strengths.min() and strengths.max() <= 1
+
+
+def test_raise_narrows_to_strong_hands():
+    opponent_range = Range()
+    opponent_range.remove_cards(BOARD)
+    opponent_range.update(Bet.RAISE, BOARD)
+    assert opponent_range.weight((1, 2)) > 10 * opponent_range.weight((4, 9))
+    assert opponent_range.weight((4, 9)) > 0
+    assert opponent_range.probabilities().sum() == pytest.approx(1)
+
+
+def test_uniform_range_equity_is_exact_equity():
+    assert range_equity((48, 49), BOARD, Range()) == pytest.approx(exact_equity((48, 49), BOARD).equity)
+
+
+def test_equity_drops_against_raising_range():
+    opponent_range = Range()
+    opponent_range.update(Bet.RAISE, BOARD)
+    assert range_equity((48, 49), BOARD, opponent_range) < range_equity((48, 49), BOARD, Range()) - 0.05
+
+
+def test_sampled_equity_matches_exact():
+    estimate = sampled_range_equity((48, 49), BOARD, [Range()], samples=20_000, rng=np.random.default_rng(1))
+    assert estimate.equity == pytest.approx(exact_equity((48, 49), BOARD).equity, abs=4 * estimate.standard_error)
+
+
+def test_tracker_follows_the_round():
+    tracker = RangeTracker()
+    player = Player(100)
+    pot = Pot([player])
+    tracker.new_stage([], pot)
+    player.decision = Decision(Bet.RAISE, 20)
+    tracker.player_moved(player)
+    round_ranges = tracker.round_ranges(pot)
+    preflop_weights = round_ranges.range_of(player).weights.copy()
+    tracker.new_stage([CARDS[index] for index in BOARD], pot)
+    assert round_ranges.range_of(player).weight((0, 1)) == 0
+    assert round_ranges.range_of(player).weight((48, 49)) == preflop_weights[pocket_index((48, 49))]
+    tracker.new_stage([], pot)
+    assert tracker.round_ranges(pot).ranges == {}
+
+
+def test_tracker_keeps_rounds_apart():
+    tracker = RangeTracker()
+    first, second = Player(100), Player(100)
+    first_round, second_round = Round([first, Player(100)], 1, 10, True), Round([second, Player(100)], 1, 10, True)
+    tracker.new_stage([], first_round.pot)
+    tracker.new_stage([], second_round.pot)
+    tracker.new_stage([CARDS[index] for index in BOARD], first_round.pot)
+    second.decision = Decision(Bet.CALL, 20)
+    tracker.player_moved(second)
+    assert tracker.round_ranges(first_round.pot).board == BOARD
+    assert tracker.round_ranges(second_round.pot).board == ()
+    assert first not in tracker.round_ranges(second_round.pot).ranges
+    tracker.round_end(first_round)
+    assert tracker.round_ranges(first_round.pot) is None and first not in tracker.players
@@ -0,0 +1,39 @@
+from secrets import SystemRandom
+
+import pytest
+
+from common.rng import FAST, SECURE, game_rng, make_numpy_rng, make_rng, seed_game_rng
+from entities.cards import Deck
+
+
+def test_fast_source_is_reproducible():
+    assert make_rng(FAST, 42).random() == make_rng(FAST, 42).random()
+    assert make_numpy_rng(42).random() == make_numpy_rng(42).random()
+
+
+def test_streams_are_independent():
+    assert make_rng(FAST, 42, 0).random() != make_rng(FAST, 42, 1).random()
+    assert make_numpy_rng(42, 0).random() != make_numpy_rng(42, 1).random()
+
+
+def test_unseeded_streams_differ():
+    assert make_rng(FAST, None).random() != make_rng(FAST, None).random()
+
+
+def test_secure_source():
+    assert isinstance(make_rng(SECURE, 42), SystemRandom)
+    with pytest.raises(ValueError):
+        make_rng('dice')
+
+
+def test_seeded_decks_deal_the_same():
+    first, second = Deck(make_rng(FAST, 7)), Deck(make_rng(FAST, 7))
+    assert [first.draw_one().index for _ in range(52)] == [second.draw_one().index for _ in range(52)]
+
+
+def test_process_rng_is_replaced():
+    seed_game_rng(3)
+    first = game_rng().random()
+    seed_game_rng(3)
+    assert game_rng().random() == first
+    seed_game_rng(None)
@@ -1,7 +1,11 @@
 import pytest
 
+from entities.bet import Bet, Decision
+from entities.combinations import hand_strength
 from entities.game import Round
 from entities.players import Player
+from errors.errors import RoundIsOver
+from tests.helpers import cards_of
 
 
 @pytest.fixture(scope='class')
@@ -24,6 +28,7 @@ class TestRoundCards:
         assert game_round.get_status()['stage'] == 'pre-flop'
         for player in game_round.players:
             assert len(player.hand) == 2
+            assert len(game_round.hand_state(player)) == 2
 
     def test_three_community_cards_are_open_on_flop(self, game_round):
         game_round.new_stage()
@@ -39,6 +44,8 @@ class TestRoundCards:
         game_round.new_stage()
         assert game_round.get_status()['stage'] == 'river'
         assert len(game_round.board) == 5
+        for player in game_round.players:
+            assert game_round.hand_state(player).strength() == hand_strength(player.hand + game_round.board)
 
 
 class TestBetsCollection:
@@ -60,5 +67,133 @@ class TestBetsCollection:
         pass
 
 
+def _stepped_round(*stacks: float) -> Round:
+    """Start a round of the players with the stacks to be moved on by steps, the last player is the dealer"""
+    players = [Player(stack, name=str(i)) for i, stack in enumerate(stacks)]
+    game_round = Round(players, len(players) - 1, 10, debug=True)
+    game_round.start()
+    return game_round
+
+
+class TestSteps:
+    """Make sure the round is moved on by the players' moves in the right order"""
+
+    def test_big_blind_acts_last_on_pre_flop(self):
+        game_round = _stepped_round(300, 300, 300)
+        assert game_round.player_to_act.name == '2'
+        assert game_round.step(Decision(Bet.CALL)).name == '0'
+        assert game_round.step(Decision(Bet.CALL)).name == '1'
+        assert game_round.step(Decision(Bet.CHECK)).name == '0'
+        assert game_round.get_status()['stage'] == 'flop'
+        assert len(game_round.board) == 3
+        assert game_round.pot.pot_size == 30
+
+    def test_raise_is_answered_by_everyone(self):
+        game_round = _stepped_round(300, 300, 300)
+        for decision in (Decision(Bet.CALL), Decision(Bet.CALL), Decision(Bet.CHECK), Decision(Bet.CHECK)):
+            game_round.step(decision)
+        assert game_round.step(Decision(Bet.RAISE, 20)).name == '2'
+        assert game_round.step(Decision(Bet.CALL)).name == '0'
+        assert game_round.step(Decision(Bet.FOLD)).name == '1'
+        assert game_round.get_status()['stage'] == 'turn'
+        assert game_round.pot.pot_size == 70
+        for _ in range(4):
+            game_round.step(Decision(Bet.CHECK))
+        assert game_round.finished and game_round.player_to_act is None
+        assert sum(player.stack for player in game_round.players) == 900
+        with pytest.raises(RoundIsOver):
+            game_round.step(Decision(Bet.CHECK))
+
+    def test_round_ends_when_everyone_folds(self):
+        game_round = _stepped_round(300, 300, 300)
+        game_round.step(Decision(Bet.FOLD))
+        assert game_round.step(Decision(Bet.FOLD)) is None
+        assert game_round.finished
+        assert game_round.board == ()
+        assert [player.stack for player in game_round.players] == [295, 305, 300]
+
+    def test_all_in_players_get_the_whole_board(self):
+        game_round = _stepped_round(100, 200, 300)
+        game_round.step(Decision(Bet.ALL_IN))
+        game_round.step(Decision(Bet.ALL_IN))
+        assert game_round.step(Decision(Bet.ALL_IN)) is None
+        assert game_round.finished
+        assert len(game_round.board) == 5
+        assert sum(player.stack for player in game_round.players) == 600
+
+
+def _showdown(board: list[str], *hands: tuple[str, str]) -> Round:
+    """Make a round with given pocket cards and the board and find the winners"""
+    players = [Player(300, name=str(i)) for i in range(len(hands))]
+    game_round = Round(players, len(players) - 1, 10, debug=True)
+    for player, hand in zip(players, hands):
+        for card in cards_of(*hand):
+            player.add_card(card)
+    game_round._open_cards(cards_of(*board))
+    game_round._find_winners()
+    return game_round
+
+
 class TestWinners:
     """Make sure winners are defined right and the prize is distributed to the right people in the right amount"""
+
+    def test_kicker_decides(self):
+        game_round = _showdown(['Ad', '9s', '9h', '5c', '2d'], ('Kd', '3c'), ('Qs', 'Jh'), ('Ks', '4c'))
+        assert [[player.name for player in players] for _, players in game_round.rating] == [['0', '2'], ['1']]
+
+    def test_two_pairs_kicker(self):
+        game_round = _showdown(['Ad', 'As', '9h', '9c', '2d'], ('Kd', '3c'), ('Qs', 'Jh'))
+        assert [[player.name for player in players] for _, players in game_round.rating] == [['0'], ['1']]
+
+    def test_board_plays_for_everyone(self):
+        game_round = _showdown(['Td', 'Js', 'Qh', 'Kc', 'Ad'], ('2d', '3c'), ('4s', '5h'), ('6s', '7c'))
+        assert len(game_round.rating) == 1
+        assert len(game_round.rating[0][1]) == 3
+        assert game_round.rating[0][0].combination.name == 'straight'
+
+    def test_rating_is_sorted_by_strength(self):
+        game_round = _showdown(['2d', '7s', '9h', 'Jc', 'Kd'], ('2s', '3c'), ('Ks', 'Kh'), ('Ts', '8c'), ('Ah', '4c'))
+        strengths = [strength for strength, _ in game_round.rating]
+        assert strengths == sorted(strengths, reverse=True)
+        assert [players[0].name for _, players in game_round.rating] == ['2', '1', '0', '3']
+
+
+class TestSnapshots:
+    """Make sure a round continues the same way from a restored snapshot"""
+
+    @staticmethod
+    def _play_out(game_round: Round) -> dict:
+        while game_round.player_to_act is not None:
+            game_round.step(Decision(Bet.CALL if Bet.CALL in game_round.player_to_act.available_actions
+                                     else Bet.CHECK))
+        return game_round.end_stats()
+
+    def test_restored_round_plays_the_same(self):
+        game_round = _stepped_round(300, 300, 300)
+        game_round.step(Decision(Bet.RAISE, 40))
+        snapshot = game_round.snapshot()
+        status = game_round.get_status()
+        hands = [player.hand for player in game_round.players]
+        first = self._play_out(game_round)
+
+        game_round.restore(snapshot)
+        assert game_round.get_status() == status
+        assert [player.hand for player in game_round.players] == hands
+        assert self._play_out(game_round) == first
+
+    def test_snapshot_is_restored_many_times(self):
+        game_round = _stepped_round(300, 300)
+        snapshot = game_round.snapshot()
+        game_round.step(Decision(Bet.FOLD))
+        assert game_round.finished
+        game_round.restore(snapshot)
+        assert not game_round.finished
+        game_round.step(Decision(Bet.ALL_IN))
+        game_round.restore(snapshot)
+        assert game_round.snapshot() == snapshot
+
+    def test_deck_snapshot_is_shared_until_a_card_is_dealt(self):
+        game_round = _stepped_round(300, 300, 300)
+        assert game_round.snapshot().deck is game_round.snapshot().deck
+        game_round.deck.draw_one()
+        assert len(game_round.snapshot().deck) == game_round.deck.cards_left
@@ -0,0 +1,57 @@
+import gc
+import io
+import json
+
+from ai.ai import RANGE_SUBSCRIPTIONS, opponent_ranges, players_history
+from common.event import EventType, subscribe, subscribers
+from simulation import JsonLinesSink, Simulation
+
+
+def test_hands_are_streamed_to_the_sink():
+    output = io.StringIO()
+    stats = Simulation(players=3, sink=JsonLinesSink(output)).run(hands=5)
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert stats.hands == len(results) == 5
+    assert [result['hand'] for result in results] == [1, 2, 3, 4, 5]
+    for result in results:
+        assert sum(result['winnings'].values()) == result['pot']
+        assert sum(result['stacks'].values()) == 3 * Simulation().buy_in
+
+
+def test_games_are_played_to_the_end():
+    simulation = Simulation(players=2)
+    stats = simulation.run(games=1)
+    assert stats.games == 1 and stats.hands == simulation.hands
+    assert stats.hands_per_second > 0
+
+
+def test_other_subscribers_are_isolated(capsys):
+    calls = []
+    subscribe(EventType.ROUND_END, calls.append)
+    try:
+        Simulation(players=2).run(hands=2)
+    finally:
+        subscribers[EventType.ROUND_END].remove(calls.append)
+    assert not calls
+    assert not capsys.readouterr().out
+
+
+def test_seed_replays_the_same_games():
+    outputs = []
+    for _ in range(2):
+        output = io.StringIO()
+        Simulation(players=3, sink=JsonLinesSink(output), seed=11).run(hands=8)
+        outputs.append(output.getvalue())
+    assert outputs[0] == outputs[1]
+
+
+def test_ranges_are_followed_on_demand():
+    stats = Simulation(players=3, subscriptions=RANGE_SUBSCRIPTIONS, seed=5).run(hands=3)
+    assert stats.hands == 3
+    assert not opponent_ranges.rounds and not opponent_ranges.players
+
+
+def test_finished_games_release_their_players():
+    Simulation(players=2, seed=3).run(games=2)
+    gc.collect()
+    assert len(players_history.players) == 0
@@ -0,0 +1,59 @@
+from math import comb
+from random import sample
+
+import numpy as np
+import pytest
+
+from ai.stage_context import StageContext, StageContexts, combination_indices, update_smallest
+from entities.cards import CARDS
+from entities.combinations import COMBINATIONS, combination_of
+from entities.evaluator import HandState
+
+
+def _enumerated_chances(known: tuple[int, ...], dead: tuple[int, ...]) -> dict:
+    """Chances of each combination made of the known cards and every completion to 7 cards without the dead ones"""
+    counts = {cmb: 0 for cmb in COMBINATIONS}
+    state = HandState.of(known)
+    deck_rest = tuple(index for index in range(len(CARDS)) if index not in state and index not in dead)
+    cards_to_open = 7 - len(state)
+    for strength in state.completions_strengths(deck_rest, cards_to_open):
+        counts[combination_of(strength)] += 1
+    chances = {cmb: count / comb(len(deck_rest), cards_to_open) for cmb, count in counts.items()}
+    update_smallest(chances)
+    return chances
+
+
+@pytest.mark.parametrize('board_size', [3, 4, 5])
+def test_opponent_chances_match_enumeration(board_size):
+    cards = tuple(sample(range(52), board_size + 2))
+    hand, board = cards[:2], cards[2:]
+    assert StageContext(board).opponent_combination_chances(hand) == pytest.approx(_enumerated_chances(board, hand))
+
+
+def test_completions():
+    context = StageContext((0, 1, 2))
+    assert context.opponent_completions.shape == (211876, 4)
+    assert not np.isin(context.opponent_completions, (0, 1, 2)).any()
+
+
+def test_combination_indices():
+    assert combination_indices(4, 2).tolist() == [[0, 1], [0, 2], [0, 3], [1, 2], [1, 3], [2, 3]]
+    assert combination_indices(45, 0).shape == (1, 0)
+
+
+class _Round:
+    def __init__(self, board):
+        self.board = board
+
+
+def test_contexts_follow_stages():
+    contexts = StageContexts()
+    contexts.new_stage(())
+    assert not contexts.contexts
+    contexts.new_stage(CARDS[:3])
+    flop = contexts.context([2, 1, 0])
+    assert contexts.context([0, 1, 2]) is flop
+    contexts.new_stage(CARDS[:4])
+    assert list(contexts.contexts) == [(0, 1, 2, 3)]
+    contexts.round_end(_Round(CARDS[:4]))
+    assert not contexts.contexts